@@ -0,0 +1,222 @@
+import asyncio
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Set
+
+from cluster import CLUSTER_PROCESSES
+
+logger = logging.getLogger('MusicBot.AudioCache')
+
+# ═══════════════════════════════════════════════════════════════
+# KONFIGURASI AUDIO CACHE
+# ═══════════════════════════════════════════════════════════════
+
+DATA_DIR = os.environ.get('DATA_DIR', 'data')
+AUDIO_CACHE_DIR = os.environ.get('AUDIO_CACHE_DIR', os.path.join(DATA_DIR, 'audio'))
+
+# Batas ukuran cache dalam MB. 0 = cache mati
+AUDIO_CACHE_MAX_MB = int(os.environ.get('AUDIO_CACHE_MAX_MB', '0'))
+
+# Mode cluster: direktori dipakai bersama, tapi tiap worker punya index sendiri
+# dan hanya tahu file yang dia download. Batas dibagi rata supaya total file
+# baru semua worker tetap di bawah AUDIO_CACHE_MAX_MB
+AUDIO_CACHE_WORKER_BYTES = AUDIO_CACHE_MAX_MB * 1024 * 1024 // max(CLUSTER_PROCESSES, 1)
+
+# Lagu lebih panjang dari ini (detik) tidak di-cache, live tidak pernah
+AUDIO_CACHE_MAX_DURATION = int(os.environ.get('AUDIO_CACHE_MAX_DURATION', '1200'))
+
+# Download paralel maksimal, supaya tidak berebut bandwidth dengan stream aktif
+AUDIO_CACHE_DOWNLOADS = int(os.environ.get('AUDIO_CACHE_DOWNLOADS', '1'))
+
+# File .part milik process yang sudah mati, atau setua ini, adalah sisa download terputus
+PARTIAL_STALE_SECONDS = 3600
+
+VIDEO_ID_RE = re.compile(r'^[a-zA-Z0-9_-]{11}$')
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # Ada, tapi milik user lain
+        return True
+    return True
+
+
+class AudioCache:
+    """Cache file Opus (Ogg) di disk dengan batas ukuran dan eviction LRU"""
+
+    def __init__(
+        self,
+        directory: str = AUDIO_CACHE_DIR,
+        max_bytes: int = AUDIO_CACHE_WORKER_BYTES,
+        max_duration: int = AUDIO_CACHE_MAX_DURATION,
+        downloads: int = AUDIO_CACHE_DOWNLOADS
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_duration = max_duration
+        self._slots = asyncio.Semaphore(downloads)
+        self._index: Optional[OrderedDict] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+        # PID ffmpeg download yang sedang jalan (bukan stray)
+        self.pids: Set[int] = set()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(self._load_index().values())
+
+    def _file(self, video_id: str) -> str:
+        return os.path.join(self.directory, f"{video_id}.ogg")
+
+    def _partial(self, video_id: str) -> str:
+        # Per PID: worker cluster lain bisa sedang men-download video yang sama
+        return os.path.join(self.directory, f"{video_id}.{os.getpid()}.part")
+
+    def _stale_partial(self, entry: os.DirEntry) -> bool:
+        """Sisa download yang terputus (bukan download worker lain yang masih jalan)"""
+        try:
+            if time.time() - entry.stat().st_mtime > PARTIAL_STALE_SECONDS:
+                return True
+            pid = int(entry.name.rsplit('.', 2)[-2])
+        except (OSError, ValueError, IndexError):
+            return False
+        return pid == os.getpid() or not _pid_alive(pid)
+
+    def _load_index(self) -> OrderedDict:
+        """video_id → ukuran file, urut dari yang paling lama tidak dipakai"""
+        if self._index is None:
+            os.makedirs(self.directory, exist_ok=True)
+            files = []
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith('.ogg'):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+                elif entry.name.endswith('.part') and self._stale_partial(entry):
+                    self._discard(entry.path)
+            self._index = OrderedDict((vid, size) for _, vid, size in sorted(files))
+        return self._index
+
+    def path(self, video_id: Optional[str]) -> Optional[str]:
+        """Path file cache untuk video ini (dan tandai baru dipakai), atau None"""
+        if not self.enabled or not video_id:
+            return None
+        index = self._load_index()
+        if video_id not in index:
+            return None
+        path = self._file(video_id)
+        if not os.path.exists(path):
+            del index[video_id]
+            return None
+        index.move_to_end(video_id)
+        try:
+            # mtime = urutan LRU setelah restart
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def contains(self, video_id: Optional[str]) -> bool:
+        return bool(self.enabled and video_id and video_id in self._load_index())
+
+    def schedule(self, song):
+        """Download audio lagu ini di background kalau belum ada di cache"""
+        video_id = song.video_id
+        if (
+            not self.enabled
+            or not video_id
+            or not VIDEO_ID_RE.match(video_id)
+            or not song.duration
+            or song.duration > self.max_duration
+            or not song.stream_url
+            or video_id in self._tasks
+        ):
+            return
+        if self.contains(video_id):
+            self.hits += 1
+            return
+
+        self.misses += 1
+        task = asyncio.create_task(self._download(video_id, song.stream_url, song.acodec))
+        self._tasks[video_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(video_id, None))
+
+    async def _download(self, video_id: str, stream_url: str, acodec: Optional[str]):
+        async with self._slots:
+            target = self._file(video_id)
+            partial = self._partial(video_id)
+            # Opus dari YouTube cukup di-remux, format lain di-encode sekali
+            codec = ['-c:a', 'copy'] if acodec and acodec.startswith('opus') else ['-c:a', 'libopus', '-b:a', '128k']
+
+            proc = await asyncio.create_subprocess_exec(
+                'ffmpeg', '-nostdin', '-loglevel', 'error',
+                '-reconnect', '1', '-reconnect_streamed', '1', '-reconnect_delay_max', '5',
+                '-i', stream_url,
+                '-vn', '-map', '0:a:0', *codec, '-f', 'ogg', partial,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE
+            )
+            self.pids.add(proc.pid)
+            try:
+                _, stderr = await proc.communicate()
+            except asyncio.CancelledError:
+                proc.kill()
+                await proc.wait()
+                self._discard(partial)
+                raise
+            finally:
+                self.pids.discard(proc.pid)
+
+            if proc.returncode != 0:
+                logger.warning(f"Audio cache gagal ({video_id}): {stderr.decode(errors='ignore')[:80]}")
+                self._discard(partial)
+                return
+
+            try:
+                os.replace(partial, target)
+                size = os.path.getsize(target)
+            except OSError as e:
+                # Mis. direktori dibersihkan dari luar selagi download
+                logger.warning(f"Audio cache gagal ({video_id}): {e}")
+                self._discard(partial)
+                return
+            index = self._load_index()
+            index[video_id] = size
+            index.move_to_end(video_id)
+            logger.info(f"💾 Cached audio: {video_id} ({index[video_id] // 1024} KB)")
+            self.evict()
+
+    def _discard(self, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def evict(self):
+        """Hapus file paling lama tidak dipakai sampai di bawah batas ukuran"""
+        index = self._load_index()
+        total = sum(index.values())
+        while index and total > self.max_bytes:
+            video_id, size = index.popitem(last=False)
+            self._discard(self._file(video_id))
+            total -= size
+            logger.info(f"🗑️ Evicted audio: {video_id}")
+
+    def stop(self):
+        for task in list(self._tasks.values()):
+            task.cancel()
+
+
+# Dipakai bersama oleh semua server
+AUDIO_CACHE = AudioCache()
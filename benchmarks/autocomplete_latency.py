@@ -0,0 +1,107 @@
+"""
+Benchmark title index autocomplete /play: waktu build, memory, dan latency
+search per ketikan (Discord membatalkan autocomplete yang tidak dijawab
+dalam 3 detik; target di sini jauh di bawah itu, < 5ms p99).
+
+Judul sintetis (artis - judul (keterangan)) memakai kosakata acak dengan
+distribusi Zipf seperti judul asli: sedikit kata sangat umum, banyak kata
+jarang. Query mensimulasikan user mengetik judul huruf demi huruf, sebagian typo.
+
+Jalankan:  python benchmarks/autocomplete_latency.py [--titles 20000] [--queries 500]
+"""
+import argparse
+import gc
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SUFFIXES = ['(Official Video)', '(Lyrics)', '(Live)', '[Audio]', 'ft. DJ Nara', '(Remix)', '']
+LETTERS = 'aaaeeeiioouunnrrsstlkmdgbhpy'
+VOCABULARY = 20000
+
+
+class Words:
+    """Kosakata acak; kata ke-k dipilih dengan peluang ~ 1/k (Zipf)"""
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.words = [''.join(rng.choice(LETTERS) for _ in range(rng.randint(2, 9))) for _ in range(VOCABULARY)]
+        self.weights = [1 / (k + 1) for k in range(VOCABULARY)]
+
+    def pick(self, n: int) -> str:
+        return ' '.join(self.rng.choices(self.words, self.weights, k=n)).title()
+
+
+def make_title(words: Words):
+    artist = words.pick(words.rng.randint(1, 2))
+    song = words.pick(words.rng.randint(1, 5))
+    return f"{artist} - {song} {words.rng.choice(SUFFIXES)}".strip(), artist
+
+
+def typo(text: str, rng: random.Random) -> str:
+    if len(text) < 4:
+        return text
+    i = rng.randrange(1, len(text) - 1)
+    return text[:i] + text[i + 1] + text[i] + text[i + 2:]
+
+
+def rss_mb() -> float:
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        return 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--titles', type=int, default=20000)
+    parser.add_argument('--queries', type=int, default=500)
+    args = parser.parse_args()
+
+    from title_index import TitleIndex
+
+    rng = random.Random(1)
+    words = Words(rng)
+    titles = [make_title(words) for _ in range(args.titles)]
+
+    gc.collect()
+    before = rss_mb()
+    index = TitleIndex(max_entries=args.titles)
+    started = time.perf_counter()
+    for i, (title, artist) in enumerate(titles):
+        index.add(f"{i:011d}", title, artist, float(i))
+    build = time.perf_counter() - started
+    gc.collect()
+    memory = rss_mb() - before
+
+    latencies = []
+    found = 0
+    for _ in range(args.queries):
+        title, _ = titles[rng.randrange(args.titles)]
+        text = title.split(' - ', 1)[-1]
+        if rng.random() < 0.2:
+            text = typo(text, rng)
+        # Tiap ketikan (mulai huruf ke-2) memicu satu request autocomplete
+        for end in range(2, min(len(text), 20) + 1):
+            started = time.perf_counter()
+            results = index.search(text[:end])
+            latencies.append(time.perf_counter() - started)
+        found += any(entry.title == title for entry in results)
+
+    latencies.sort()
+    ms = lambda q: latencies[min(int(len(latencies) * q), len(latencies) - 1)] * 1000
+    print(f"{args.titles} judul, {len(latencies)} request autocomplete")
+    print(f"build      {build:.2f}s ({build / args.titles * 1e6:.1f}µs/judul)")
+    print(f"memory     {memory:.1f} MB RSS ({index.stats()['trigrams']} trigram)")
+    print(f"latency    p50 {ms(0.5):.2f}ms  p99 {ms(0.99):.2f}ms  max {latencies[-1] * 1000:.2f}ms  "
+          f"mean {statistics.mean(latencies) * 1000:.2f}ms")
+    print(f"ketemu     {found / args.queries:.0%} judul target ada di 25 saran setelah ketikan terakhir")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+"""
+Benchmark memori gateway: RSS per 1000 server, mode default vs LOW_MEMORY_MODE.
+
+Tiap mode dijalankan di process terpisah. Payload GUILD_CREATE sintetis
+(bentuk sama seperti yang dikirim Discord tanpa intent members/presences:
+role, channel, emoji, sticker, scheduled event, voice state + member di
+voice) di-parse langsung oleh ConnectionState discord.py, lalu beberapa
+MESSAGE_CREATE per server untuk mengisi message cache.
+
+Jalankan:  python benchmarks/gateway_memory.py [--guilds 2000] [--messages 3]
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import random
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BOT_ID = 10 ** 17
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def rss_bytes() -> int:
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def snowflake(guild: int, kind: int, i: int) -> str:
+    return str(BOT_ID + guild * 100000 + kind * 1000 + i + 1)
+
+
+def user(user_id: str, rng: random.Random) -> dict:
+    return {
+        'id': user_id,
+        'username': f"user{user_id[-6:]}",
+        'global_name': f"User {user_id[-4:]}",
+        'discriminator': '0',
+        'avatar': '%032x' % rng.getrandbits(128),
+    }
+
+
+def member(user_id: str, role_ids: list, rng: random.Random) -> dict:
+    return {
+        'user': user(user_id, rng),
+        'roles': rng.sample(role_ids, 2),
+        'joined_at': '2023-05-01T12:00:00.000000+00:00',
+        'deaf': False,
+        'mute': False,
+        'flags': 0,
+    }
+
+
+def make_guild(g: int, rng: random.Random) -> dict:
+    guild_id = snowflake(g, 0, 0)
+    roles = [{
+        'id': guild_id if i == 0 else snowflake(g, 1, i),
+        'name': '@everyone' if i == 0 else f"role-{i}",
+        'color': rng.randrange(0xFFFFFF),
+        'hoist': i % 5 == 0,
+        'position': i,
+        'permissions': '1071698660929',
+        'managed': False,
+        'mentionable': False,
+        'flags': 0,
+    } for i in range(15)]
+    role_ids = [r['id'] for r in roles[1:]]
+
+    channels = []
+    for i in range(2):
+        channels.append({'id': snowflake(g, 2, i), 'type': 4, 'guild_id': guild_id, 'name': f"category-{i}",
+                         'position': i, 'permission_overwrites': []})
+    for i in range(20):
+        channels.append({
+            'id': snowflake(g, 3, i), 'type': 0, 'guild_id': guild_id, 'name': f"text-{i}",
+            'position': i, 'parent_id': snowflake(g, 2, i % 2), 'nsfw': False, 'rate_limit_per_user': 0,
+            'topic': 'Channel untuk ngobrol dan request lagu. Baca rules dulu ya!' * 2,
+            'last_message_id': snowflake(g, 9, i),
+            'permission_overwrites': [
+                {'id': rid, 'type': 0, 'allow': '3072', 'deny': '0'} for rid in role_ids[:3]
+            ],
+        })
+    for i in range(8):
+        channels.append({
+            'id': snowflake(g, 4, i), 'type': 2, 'guild_id': guild_id, 'name': f"voice-{i}",
+            'position': i, 'parent_id': snowflake(g, 2, 1), 'bitrate': 64000, 'user_limit': 0,
+            'rtc_region': None, 'nsfw': False, 'rate_limit_per_user': 0, 'permission_overwrites': [],
+        })
+
+    emojis = [{
+        'id': snowflake(g, 5, i), 'name': f"emoji_{i}", 'roles': [], 'require_colons': True,
+        'managed': False, 'animated': i % 4 == 0, 'available': True,
+    } for i in range(40)]
+    stickers = [{
+        'id': snowflake(g, 6, i), 'name': f"sticker-{i}", 'description': 'Sticker server',
+        'tags': 'music', 'type': 2, 'format_type': 1, 'available': True, 'guild_id': guild_id,
+    } for i in range(3)]
+    events = [{
+        'id': snowflake(g, 7, i), 'guild_id': guild_id, 'channel_id': snowflake(g, 4, 0),
+        'creator_id': snowflake(g, 8, 0), 'name': f"Listening party #{i}",
+        'description': 'Dengerin playlist bareng di voice channel', 'scheduled_start_time': '2030-01-01T20:00:00+00:00',
+        'scheduled_end_time': None, 'privacy_level': 2, 'status': 1, 'entity_type': 2, 'entity_id': None,
+        'entity_metadata': None, 'user_count': 12, 'image': None,
+    } for i in range(2)]
+
+    # Tanpa intent members/presences Discord hanya mengirim bot + member di voice
+    voice_users = [snowflake(g, 8, i) for i in range(3)]
+    members = [member(str(BOT_ID), role_ids, rng)] + [member(uid, role_ids, rng) for uid in voice_users]
+    voice_states = [{
+        'user_id': uid, 'channel_id': snowflake(g, 4, 0), 'session_id': '%032x' % rng.getrandbits(128),
+        'deaf': False, 'mute': False, 'self_deaf': False, 'self_mute': False, 'self_video': False,
+        'suppress': False, 'request_to_speak_timestamp': None,
+    } for uid in voice_users]
+
+    return {
+        'id': guild_id, 'name': f"guild-{g}", 'icon': '%032x' % rng.getrandbits(128), 'owner_id': voice_users[0],
+        'afk_channel_id': None, 'afk_timeout': 300, 'verification_level': 1,
+        'default_message_notifications': 1, 'explicit_content_filter': 2, 'mfa_level': 0,
+        'features': ['COMMUNITY', 'NEWS', 'ANIMATED_ICON', 'INVITE_SPLASH'],
+        'system_channel_id': snowflake(g, 3, 0), 'rules_channel_id': snowflake(g, 3, 1),
+        'max_members': 500000, 'vanity_url_code': None, 'description': None, 'banner': None,
+        'premium_tier': 1, 'premium_subscription_count': 3, 'preferred_locale': 'en-US', 'nsfw_level': 0,
+        'member_count': 800, 'large': True, 'unavailable': False, 'joined_at': '2023-05-01T12:00:00.000000+00:00',
+        'roles': roles, 'emojis': emojis, 'stickers': stickers, 'channels': channels, 'threads': [],
+        'members': members, 'voice_states': voice_states, 'presences': [], 'stage_instances': [],
+        'guild_scheduled_events': events,
+    }
+
+
+def make_message(g: int, i: int, rng: random.Random) -> dict:
+    author_id = snowflake(g, 8, i % 3)
+    return {
+        'id': snowflake(g, 9, 100 + i), 'channel_id': snowflake(g, 3, 0), 'guild_id': snowflake(g, 0, 0),
+        'author': user(author_id, rng),
+        'member': {'roles': [], 'joined_at': '2023-05-01T12:00:00.000000+00:00', 'deaf': False, 'mute': False, 'flags': 0},
+        'content': '!play ' + 'lagu yang enak buat kerja ' * 4, 'timestamp': '2024-01-01T00:00:00.000000+00:00',
+        'edited_timestamp': None, 'tts': False, 'mention_everyone': False, 'mentions': [], 'mention_roles': [],
+        'attachments': [], 'pinned': False, 'type': 0,
+        'embeds': [{'type': 'rich', 'title': 'Now Playing', 'description': 'x' * 120, 'color': 0x2ECC71}],
+    }
+
+
+async def measure(low_memory: bool, guilds: int, messages: int) -> dict:
+    import discord
+    from gateway import client_options, setup_client
+
+    client = discord.Client(**client_options(low_memory))
+    setup_client(client, low_memory)
+    state = client._connection
+    state.user = discord.ClientUser(state=state, data=dict(user(str(BOT_ID), random.Random(0)), bot=True))
+    parsers = state.parsers
+
+    gc.collect()
+    before = rss_bytes()
+    rng = random.Random(1)
+    for g in range(guilds):
+        parsers['GUILD_CREATE'](make_guild(g, rng))
+    for g in range(guilds):
+        for i in range(messages):
+            parsers['MESSAGE_CREATE'](make_message(g, i, rng))
+    await asyncio.sleep(0)
+    gc.collect()
+    after = rss_bytes()
+
+    return {
+        'mode': 'low' if low_memory else 'default',
+        'guilds': len(client.guilds),
+        'cached_members': sum(len(guild.members) for guild in client.guilds),
+        'cached_emojis': len(client.emojis),
+        'cached_messages': len(client.cached_messages),
+        'rss_mb': round(after / 2 ** 20, 1),
+        'rss_per_1k_guilds_mb': round((after - before) / 2 ** 20 / guilds * 1000, 2),
+    }
+
+
+def run_child(mode: str, guilds: int, messages: int) -> dict:
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', mode,
+         '--guilds', str(guilds), '--messages', str(messages)],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--guilds', type=int, default=2000)
+    parser.add_argument('--messages', type=int, default=3, help='MESSAGE_CREATE per server')
+    parser.add_argument('--child', choices=('default', 'low'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        result = asyncio.run(measure(args.child == 'low', args.guilds, args.messages))
+        print(json.dumps(result))
+        return
+
+    results = [run_child(mode, args.guilds, args.messages) for mode in ('default', 'low')]
+    keys = [k for k in results[0] if k != 'mode']
+    print(f"{args.guilds} server, {args.messages} pesan per server")
+    print(f"{'':<22} {'default':>10} {'low':>10}")
+    for key in keys:
+        print(f"{key:<22} {results[0][key]:>10} {results[1][key]:>10}")
+    saved = results[0]['rss_per_1k_guilds_mb'] - results[1]['rss_per_1k_guilds_mb']
+    print(f"hemat {saved:.2f} MB per 1000 server "
+          f"({saved / results[0]['rss_per_1k_guilds_mb']:.0%})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,432 @@
+"""
+Komponen palsu untuk benchmark offline (tanpa YouTube, tanpa Discord).
+
+- FakeYoutubeDL      : yt_dlp.YoutubeDL asli dengan extractor palsu (profil latency/gagal per method)
+- AudioServer        : HTTP server lokal yang menyajikan file audio sebagai "stream URL"
+- HTTPFrameSource    : AudioSource pure-Python (dipakai kalau ffmpeg tidak ada)
+- FakeVoiceClient    : membaca frame tiap 20ms seperti AudioPlayer discord.py
+- FakeContext & co.  : cukup untuk memanggil Music.play / Music.play_next
+"""
+import asyncio
+import hashlib
+import http.server
+import os
+import random
+import shutil
+import subprocess
+import threading
+import time
+import urllib.parse
+import urllib.request
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import discord
+import yt_dlp
+from discord.ext import commands
+from yt_dlp.extractor.common import InfoExtractor
+from yt_dlp.utils import ExtractorError
+
+FRAME_SECONDS = 0.02
+
+# Ukuran frame Opus ~96 kbps (dipakai HTTPFrameSource)
+OPUS_FRAME_BYTES = 240
+
+METHOD_CLIENTS = ['android_music', 'ios', 'tv_embedded', 'web', 'mweb']
+
+
+# ═══════════════════════════════════════════════════════════════
+# FAKE YT-DLP
+# ═══════════════════════════════════════════════════════════════
+
+@dataclass
+class MethodProfile:
+    latency: float = 0.3
+    jitter: float = 0.1
+    failure_rate: float = 0.0
+
+
+@dataclass
+class ExtractorProfile:
+    methods: List[MethodProfile] = field(default_factory=lambda: [MethodProfile() for _ in METHOD_CLIENTS])
+    # Sebagian video "private" (fatal, tidak perlu coba method lain)
+    fatal_rate: float = 0.0
+    # Peluang YouTube menjawab "Sign in to confirm you're not a bot" (throttling)
+    throttle_rate: float = 0.0
+    track_seconds: float = 3.0
+
+
+PROFILES = {
+    'fast': ExtractorProfile(),
+    # Method pertama sering 403, method kedua lambat: menguji hedging / adaptive order
+    'flaky': ExtractorProfile(methods=[
+        MethodProfile(latency=0.8, failure_rate=0.6),
+        MethodProfile(latency=3.0, jitter=1.0),
+        MethodProfile(latency=0.5),
+        MethodProfile(latency=0.6, failure_rate=0.2),
+        MethodProfile(latency=0.7),
+    ]),
+    'slow': ExtractorProfile(methods=[MethodProfile(latency=2.5, jitter=1.0) for _ in METHOD_CLIENTS]),
+}
+
+
+class FakeYoutubeIE(InfoExtractor):
+    """
+    Extractor palsu (menjawab semua URL dan ytsearch:) dengan profil
+    latency/gagal per method. Error dilempar sebagai ExtractorError seperti
+    extractor YouTube asli, jadi yt-dlp sendiri yang menentukan hasilnya:
+    DownloadError, atau None kalau `ignoreerrors` aktif.
+    """
+
+    IE_NAME = 'fakeyoutube'
+    _VALID_URL = r'.+'
+
+    def __init__(self, owner: 'FakeYoutubeDL', method: int):
+        super().__init__()
+        self.owner = owner
+        self.method = method
+
+    def _real_extract(self, url: str):
+        owner = self.owner
+        profile = self.method_profile()
+        time.sleep(max(random.gauss(profile.latency, profile.jitter), 0.01))
+        if random.random() < owner.profile.throttle_rate:
+            raise ExtractorError('Sign in to confirm you’re not a bot. Use --cookies-from-browser or --cookies '
+                                 'for the authentication.', expected=True)
+        if random.random() < profile.failure_rate:
+            raise ExtractorError('Unable to download API page: HTTP Error 403: Forbidden')
+
+        params = urllib.parse.parse_qs(urllib.parse.urlparse(url).query)
+        video_id = params['v'][0] if 'v' in params else hashlib.sha1(url.removeprefix('ytsearch:').encode()).hexdigest()[:11]
+        if random.Random(video_id).random() < owner.profile.fatal_rate:
+            raise ExtractorError("Private video. Sign in if you've been granted access to this video",
+                                 expected=True, video_id=video_id)
+
+        info = {
+            'id': video_id,
+            'title': f"Fake Song {video_id}",
+            'webpage_url': f"https://www.youtube.com/watch?v={video_id}",
+            'url': f"{owner.base_url}/audio/{video_id}.{owner.ext}?expire={int(time.time()) + 21600}",
+            'duration': owner.profile.track_seconds,
+            'uploader': 'Fake Artist',
+            'acodec': owner.acodec,
+            'vcodec': 'none',
+            'ext': owner.ext,
+        }
+        if url.startswith('ytsearch:'):
+            return self.playlist_result([info], url, url)
+        return info
+
+    def method_profile(self) -> MethodProfile:
+        return self.owner.profile.methods[self.method]
+
+
+class FakeYoutubeDL(yt_dlp.YoutubeDL):
+    """
+    yt_dlp.YoutubeDL asli (opsi, error handling, format selection) tapi
+    hanya dengan FakeYoutubeIE - kelas-level config di-set oleh harness
+    """
+
+    profile: ExtractorProfile = PROFILES['fast']
+    base_url = 'http://127.0.0.1:0'
+    ext = 'webm'
+    acodec = 'opus'
+    calls = 0
+    _lock = threading.Lock()
+
+    def __init__(self, params: Optional[dict] = None, auto_init: bool = True):
+        params = dict(params or {})
+        client = (params.get('extractor_args') or {}).get('youtube', {}).get('player_client', ['android_music'])[0]
+        super().__init__(params, auto_init=False)
+        self.add_info_extractor(FakeYoutubeIE(self, METHOD_CLIENTS.index(client) if client in METHOD_CLIENTS else 0))
+
+    def extract_info(self, url: str, *args, **kwargs):
+        with FakeYoutubeDL._lock:
+            FakeYoutubeDL.calls += 1
+        return super().extract_info(url, *args, **kwargs)
+
+
+# ═══════════════════════════════════════════════════════════════
+# AUDIO SERVER
+# ═══════════════════════════════════════════════════════════════
+
+class AudioServer:
+    """HTTP server lokal (thread sendiri): semua /audio/<id>.<ext> → file yang sama"""
+
+    def __init__(self, directory: str, track_seconds: float):
+        self.directory = directory
+        self.track_seconds = track_seconds
+        self.has_ffmpeg = shutil.which('ffmpeg') is not None
+        self.ext = 'webm' if self.has_ffmpeg else 'raw'
+        self.path = os.path.join(directory, f"track.{self.ext}")
+        self._server: Optional[http.server.ThreadingHTTPServer] = None
+
+    def prepare(self):
+        os.makedirs(self.directory, exist_ok=True)
+        if self.has_ffmpeg:
+            subprocess.run([
+                'ffmpeg', '-y', '-loglevel', 'error', '-f', 'lavfi',
+                '-i', f"sine=frequency=440:duration={self.track_seconds}",
+                '-c:a', 'libopus', '-b:a', '96k', self.path
+            ], check=True)
+        else:
+            frames = int(self.track_seconds / FRAME_SECONDS)
+            with open(self.path, 'wb') as f:
+                f.write(os.urandom(OPUS_FRAME_BYTES) * frames)
+
+    def start(self) -> str:
+        path = self.path
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                with open(path, 'rb') as f:
+                    body = f.read()
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+
+
+class HTTPFrameSource(discord.AudioSource):
+    """Stream frame Opus (atau PCM untuk crossfade) dari HTTP - tanpa ffmpeg"""
+
+    # Tiruan waktu start FFmpeg (spawn, connect, probe) sebelum frame pertama
+    startup_seconds = 0.0
+
+    def __init__(self, url: str, pcm: bool = False):
+        self._resp = urllib.request.urlopen(url)
+        self._pcm = pcm
+        self._frame_bytes = discord.opus.Encoder.FRAME_SIZE if pcm else OPUS_FRAME_BYTES
+        self._started = False
+
+    def read(self) -> bytes:
+        if not self._started:
+            self._started = True
+            time.sleep(self.startup_seconds)
+        # Satu frame file = 20ms, berapa pun ukuran frame yang diminta
+        data = self._resp.read(OPUS_FRAME_BYTES)
+        if len(data) != OPUS_FRAME_BYTES:
+            return b''
+        return data if not self._pcm else bytes(self._frame_bytes)
+
+    def is_opus(self) -> bool:
+        return not self._pcm
+
+    def cleanup(self):
+        self._resp.close()
+
+
+# ═══════════════════════════════════════════════════════════════
+# FAKE DISCORD
+# ═══════════════════════════════════════════════════════════════
+
+class GuildRecorder:
+    """Timeline frame satu server"""
+
+    GAP_THRESHOLD = 0.06
+
+    def __init__(self):
+        self.started: Optional[float] = None
+        self.first_frame: Optional[float] = None
+        self.last_frame: Optional[float] = None
+        self.frames = 0
+        self.gaps: List[float] = []
+
+    def frame(self, now: float):
+        if self.first_frame is None:
+            self.first_frame = now
+        elif now - self.last_frame > self.GAP_THRESHOLD:
+            self.gaps.append(now - self.last_frame - FRAME_SECONDS)
+        self.last_frame = now
+        self.frames += 1
+
+
+class FakeVoiceClient:
+    def __init__(self, guild: 'FakeGuild', channel: 'FakeVoiceChannel'):
+        self.guild = guild
+        self.channel = channel
+        self._playing = False
+        self._stop = threading.Event()
+        self.source = None
+
+    def is_connected(self) -> bool:
+        return self.guild.voice_client is self
+
+    def is_playing(self) -> bool:
+        return self._playing
+
+    def is_paused(self) -> bool:
+        return False
+
+    def play(self, source: discord.AudioSource, *, after=None):
+        if self._playing:
+            raise discord.ClientException('Already playing audio.')
+        self._playing = True
+        self._stop.clear()
+        self.source = source
+        threading.Thread(target=self._run, args=(source, after), daemon=True).start()
+
+    def _run(self, source, after):
+        # Sama seperti discord.player.AudioPlayer: baca satu frame tiap 20ms
+        error = None
+        next_at = time.perf_counter()
+        try:
+            while not self._stop.is_set():
+                data = source.read()
+                if not data:
+                    break
+                self.guild.recorder.frame(time.perf_counter())
+                next_at += FRAME_SECONDS
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_at = time.perf_counter()
+        except Exception as e:
+            error = e
+        finally:
+            source.cleanup()
+            self._playing = False
+            self.source = None
+            if after:
+                after(error)
+
+    def stop(self):
+        self._stop.set()
+
+    async def disconnect(self, *, force: bool = False):
+        self.stop()
+        self.guild.voice_client = None
+
+    async def move_to(self, channel):
+        self.channel = channel
+
+
+class FakeMessage:
+    def __init__(self, channel: 'FakeTextChannel'):
+        self.channel = channel
+
+    async def edit(self, **kwargs):
+        self.channel.edits += 1
+        return self
+
+    async def delete(self):
+        pass
+
+
+class FakeTextChannel:
+    def __init__(self, channel_id: int):
+        self.id = channel_id
+        self.sent = 0
+        self.edits = 0
+
+    async def send(self, content=None, **kwargs):
+        self.sent += 1
+        return FakeMessage(self)
+
+
+class FakeVoiceChannel:
+    def __init__(self, guild: 'FakeGuild'):
+        self.guild = guild
+        self.id = guild.id * 10 + 1
+        self.name = f"voice-{guild.id}"
+        self.bitrate = 64000
+        self.members: list = []
+
+    async def connect(self, *, self_deaf: bool = False, **kwargs):
+        self.guild.voice_client = FakeVoiceClient(self.guild, self)
+        return self.guild.voice_client
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int):
+        self.id = guild_id
+        self.name = f"guild-{guild_id}"
+        self.voice_client: Optional[FakeVoiceClient] = None
+        self.recorder = GuildRecorder()
+        self.voice_channel = FakeVoiceChannel(self)
+        self.text_channel = FakeTextChannel(guild_id * 10 + 2)
+
+
+class FakeMember:
+    def __init__(self, member_id: int, guild: FakeGuild):
+        self.id = member_id
+        self.mention = f"<@{member_id}>"
+        self.display_name = f"user-{member_id}"
+        self.bot = False
+        self.voice = type('VoiceState', (), {'channel': guild.voice_channel})()
+        guild.voice_channel.members.append(self)
+
+
+class FakeContext(commands.Context):
+    """commands.Context tanpa message/gateway - cukup untuk callback command cog"""
+
+    # Bukan slash command: ctx.defer() tidak melakukan apa-apa
+    interaction = None
+
+    def __init__(self, guild: FakeGuild, author: FakeMember):
+        self._guild = guild
+        self._author = author
+
+    @property
+    def guild(self):
+        return self._guild
+
+    @property
+    def author(self):
+        return self._author
+
+    @property
+    def channel(self):
+        return self._guild.text_channel
+
+    @property
+    def voice_client(self):
+        return self._guild.voice_client
+
+    async def send(self, content=None, **kwargs):
+        return await self._guild.text_channel.send(content, **kwargs)
+
+
+class FakeBot:
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.latency = 0.05
+        self.guilds: Dict[int, FakeGuild] = {}
+
+    @property
+    def voice_clients(self) -> List[FakeVoiceClient]:
+        return [g.voice_client for g in self.guilds.values() if g.voice_client]
+
+    def get_guild(self, guild_id: int) -> Optional[FakeGuild]:
+        return self.guilds.get(guild_id)
+
+
+def install(profile: ExtractorProfile, server: AudioServer, base_url: str, ffmpeg_startup: float = 0.0):
+    """Ganti yt_dlp.YoutubeDL dengan FakeYoutubeDL (dan FFmpeg kalau tidak terpasang)"""
+    from song import Song
+
+    FakeYoutubeDL.profile = profile
+    FakeYoutubeDL.base_url = base_url
+    FakeYoutubeDL.ext = server.ext
+    FakeYoutubeDL.acodec = 'opus'
+    yt_dlp.YoutubeDL = FakeYoutubeDL
+
+    if not server.has_ffmpeg:
+        HTTPFrameSource.startup_seconds = ffmpeg_startup
+
+        def create_source(self, pcm: bool = False, bitrate: Optional[int] = None):
+            return HTTPFrameSource(self.stream_url, pcm=pcm)
+        Song.create_source = create_source
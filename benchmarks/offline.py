@@ -0,0 +1,194 @@
+"""
+Benchmark offline end-to-end: Music.play → extract_info → play_next → voice.
+
+Tidak butuh YouTube maupun Discord. yt-dlp diganti FakeYoutubeDL (profil
+latency/gagal per method), stream URL disajikan HTTP server lokal, dan
+voice client palsu membaca frame tiap 20ms seperti discord.py. Kalau ffmpeg
+tidak terpasang, source diganti HTTPFrameSource (pure Python) yang meniru
+waktu start FFmpeg (--ffmpeg-startup) - jeda inilah yang ditutup gapless.
+
+Laporan:
+  - TTFA          : waktu dari !play pertama sampai frame audio pertama per server
+  - gap           : jeda antar frame > 60ms setelah audio mulai (antar lagu / underrun).
+                    Lagu pendek + worker extraction sedikit juga menghasilkan gap:
+                    lagu berikutnya belum selesai di-resolve saat lagu sekarang habis
+  - extraction    : jumlah panggilan yt-dlp dan throughput per detik
+  - CPU / stream  : CPU process (+ child ffmpeg) per detik audio yang diputar
+  - memory / guild: kenaikan RSS puncak dibagi jumlah server
+
+Jalankan:  python benchmarks/offline.py [--guilds 200] [--songs 3] [--profile fast|flaky|slow]
+           [--track-seconds 3] [--unique 0] [--ramp 2] [--workers N] [--ffmpeg-startup 0.3] [--json]
+           (GAPLESS_PLAYBACK=1 untuk membandingkan gap dengan/tanpa gapless)
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Harus di-set sebelum import music_cog / extraction
+if '--workers' in sys.argv:
+    os.environ['EXTRACT_WORKERS'] = sys.argv[sys.argv.index('--workers') + 1]
+os.environ['YTDLP_UPDATE'] = 'off'
+os.environ['EXTRACT_BACKEND'] = 'thread'
+os.environ.setdefault('SEARCH_CACHE_PATH', '')
+os.environ.setdefault('AUDIO_CACHE_MAX_MB', '0')
+os.environ.setdefault('QUEUE_STORE_PATH', '')
+
+import harness  # noqa: E402
+
+
+def rss_bytes() -> int:
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * pct / 100), len(values) - 1)]
+
+
+def summarize(values) -> dict:
+    return {
+        'n': len(values),
+        'p50': round(percentile(values, 50), 4),
+        'p95': round(percentile(values, 95), 4),
+        'max': round(max(values, default=0.0), 4),
+    }
+
+
+async def run_guild(cog, bot, guild_id: int, queries, ramp: float, timeout: float):
+    guild = harness.FakeGuild(guild_id)
+    bot.guilds[guild_id] = guild
+    ctx = harness.FakeContext(guild, harness.FakeMember(guild_id * 100, guild))
+
+    await asyncio.sleep(random.uniform(0, ramp))
+    guild.recorder.started = time.perf_counter()
+    for query in queries:
+        await cog.play.callback(cog, ctx, query=query)
+
+    # Selesai kalau audio sudah pernah keluar dan queue habis
+    deadline = time.monotonic() + timeout
+    player = cog.get_player(guild_id)
+    while time.monotonic() < deadline:
+        voice = guild.voice_client
+        if guild.recorder.frames and not player.queue and not player.current and not (voice and voice.is_playing()):
+            break
+        await asyncio.sleep(0.1)
+    if guild.voice_client:
+        await guild.voice_client.disconnect()
+    return guild
+
+
+async def sample_rss(state: dict):
+    while True:
+        state['peak'] = max(state['peak'], rss_bytes())
+        await asyncio.sleep(0.25)
+
+
+async def main(args):
+    logging.basicConfig(level=logging.ERROR)
+
+    profile = harness.PROFILES[args.profile]
+    profile.track_seconds = args.track_seconds
+
+    server = harness.AudioServer(tempfile.mkdtemp(prefix='musicbot-bench-'), args.track_seconds)
+    server.prepare()
+    harness.install(profile, server, server.start(), args.ffmpeg_startup)
+
+    import music_cog
+    from extraction import EXTRACTOR
+
+    bot = harness.FakeBot(asyncio.get_running_loop())
+    cog = music_cog.Music(bot)
+
+    total = args.guilds * args.songs
+    pool = args.unique or total
+    queries = [f"benchmark song {i % pool}" for i in range(total)]
+
+    baseline = rss_bytes()
+    rss = {'peak': baseline}
+    sampler = asyncio.create_task(sample_rss(rss))
+
+    cpu0, times0 = time.process_time(), os.times()
+    started = time.perf_counter()
+    timeout = args.timeout or (args.songs * (args.track_seconds + 15) + args.ramp + 30)
+    guilds = await asyncio.gather(*[
+        run_guild(cog, bot, gid, queries[i * args.songs:(i + 1) * args.songs], args.ramp, timeout)
+        for i, gid in enumerate(range(1, args.guilds + 1))
+    ])
+    wall = time.perf_counter() - started
+    times1 = os.times()
+    cpu = time.process_time() - cpu0
+    child_cpu = (times1.children_user - times0.children_user) + (times1.children_system - times0.children_system)
+    sampler.cancel()
+
+    ttfa = [g.recorder.first_frame - g.recorder.started for g in guilds if g.recorder.first_frame]
+    gaps = [gap for g in guilds for gap in g.recorder.gaps]
+    audio_seconds = sum(g.recorder.frames for g in guilds) * harness.FRAME_SECONDS
+    extraction = EXTRACTOR.stats()
+
+    report = {
+        'guilds': args.guilds,
+        'songs_per_guild': args.songs,
+        'profile': args.profile,
+        'ffmpeg': server.has_ffmpeg,
+        'gapless': music_cog.GAPLESS_ENABLED,
+        'wall_seconds': round(wall, 2),
+        'silent_guilds': sum(1 for g in guilds if not g.recorder.frames),
+        'ttfa_seconds': summarize(ttfa),
+        'gap_seconds': summarize(gaps),
+        'gaps_per_guild': round(len(gaps) / args.guilds, 2),
+        'extraction': {
+            'workers': EXTRACTOR.workers,
+            'ytdlp_calls': harness.FakeYoutubeDL.calls,
+            'completed': extraction.get('completed'),
+            'calls_per_second': round(harness.FakeYoutubeDL.calls / wall, 2),
+        },
+        'audio_seconds': round(audio_seconds, 1),
+        'cpu_seconds': round(cpu + child_cpu, 2),
+        'cpu_per_stream_pct': round(100 * (cpu + child_cpu) / audio_seconds, 3) if audio_seconds else None,
+        'memory_per_guild_kb': round((rss['peak'] - baseline) / args.guilds / 1024, 1),
+        'messages_sent': sum(g.text_channel.sent for g in guilds),
+        'message_edits': sum(g.text_channel.edits for g in guilds),
+    }
+
+    for player in cog.players.values():
+        player.prefetcher.stop()
+    EXTRACTOR.shutdown()
+    server.stop()
+
+    if args.json:
+        print(json.dumps(report))
+        return
+    width = max(len(k) for k in report)
+    for key, value in report.items():
+        print(f"{key:<{width}}  {value}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--guilds', type=int, default=200)
+    parser.add_argument('--songs', type=int, default=3, help='lagu per server')
+    parser.add_argument('--profile', choices=sorted(harness.PROFILES), default='fast')
+    parser.add_argument('--track-seconds', type=float, default=3.0)
+    parser.add_argument('--unique', type=int, default=0, help='jumlah query unik (0 = semua unik)')
+    parser.add_argument('--ramp', type=float, default=2.0, help='sebar !play pertama dalam N detik')
+    parser.add_argument('--timeout', type=float, default=0, help='batas waktu per server (0 = otomatis)')
+    parser.add_argument('--workers', type=int, help='EXTRACT_WORKERS (default: config bot)')
+    parser.add_argument('--ffmpeg-startup', type=float, default=0.3, help='detik sebelum frame pertama (tanpa ffmpeg)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+    random.seed(args.seed)
+    asyncio.run(main(args))
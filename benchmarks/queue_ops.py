@@ -0,0 +1,169 @@
+"""
+Benchmark operasi queue: deque (lama) vs SongQueue (chunked list).
+
+Setiap operasi dijalankan pada queue berisi N lagu (default 50.000) dan
+dilaporkan dalam mikrodetik per operasi:
+  - append / popleft         : jalur normal play_next
+  - getitem_mid              : baca posisi tengah ("position #N")
+  - remove_mid / move_mid    : !remove / !move di tengah queue
+  - jump_mid                 : !jump ke tengah queue
+  - page_mid                 : render satu halaman !queue di tengah
+  - requester_page           : halaman lagu milik satu requester (jarang)
+  - contains_video           : cek duplikat saat !play
+  - shuffle                  : !shuffle
+
+Jalankan:  python benchmarks/queue_ops.py [--size 50000] [--repeat 200] [--check]
+
+--check: exit 1 kalau SongQueue lebih lambat dari batas MIN_SPEEDUP
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from collections import deque
+from itertools import islice
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from song_queue import SongQueue  # noqa: E402
+
+# Speedup minimal SongQueue vs deque untuk --check. Shuffle memang sedikit
+# lebih lambat (queue_key semua lagu ditulis ulang), yang lain harus menang.
+MIN_SPEEDUP = {
+    'remove_mid': 1.0,
+    'jump_mid': 1.0,
+    'page_mid': 1.0,
+    'requester_page': 1.0,
+    'contains_video': 1.0,
+    'shuffle': 0.5,
+}
+
+
+class Requester:
+    __slots__ = ('id',)
+
+    def __init__(self, user_id: int):
+        self.id = user_id
+
+
+class FakeSong:
+    __slots__ = ('video_id', 'requester', 'queue_key')
+
+    def __init__(self, i: int, requester: Requester):
+        self.video_id = f"{i:011d}"
+        self.requester = requester
+
+
+def make_songs(size: int):
+    users = [Requester(i) for i in range(50)]
+    # Satu requester "langka" hanya punya beberapa lagu di akhir queue
+    rare = Requester(999)
+    songs = [FakeSong(i, random.choice(users)) for i in range(size)]
+    for i in range(5):
+        songs[size - 1 - i * 7].requester = rare
+    return songs
+
+
+def per_op(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def bench_deque(songs, repeat: int) -> dict:
+    q = deque(songs)
+    mid = len(q) // 2
+    results = {}
+    results['append'] = per_op(lambda: q.append(songs[0]), repeat)
+    results['popleft'] = per_op(q.popleft, repeat)
+    results['getitem_mid'] = per_op(lambda: q[mid], repeat)
+
+    def remove_mid():
+        song = q[mid]
+        q.remove(song)
+        q.append(song)
+    results['remove_mid'] = per_op(remove_mid, repeat)
+
+    def move_mid():
+        song = q[mid]
+        del q[mid]
+        q.insert(mid // 2, song)
+    results['move_mid'] = per_op(move_mid, repeat)
+
+    def jump_mid():
+        r = deque(q)
+        started = time.perf_counter()
+        for _ in range(mid):
+            r.popleft()
+        return time.perf_counter() - started
+    # Hanya jump yang diukur (bukan copy queue)
+    runs = max(repeat // 20, 1)
+    results['jump_mid'] = sum(jump_mid() for _ in range(runs)) / runs * 1e6
+    results['page_mid'] = per_op(lambda: list(islice(q, mid, mid + 10)), repeat)
+    results['requester_page'] = per_op(lambda: [s for s in q if s.requester.id == 999][:10], max(repeat // 20, 1))
+    results['contains_video'] = per_op(lambda: any(s.video_id == 'missing' for s in q), max(repeat // 20, 1))
+
+    def shuffle():
+        items = list(q)
+        random.shuffle(items)
+        return deque(items)
+    results['shuffle'] = per_op(shuffle, max(repeat // 20, 1))
+    return results
+
+
+def bench_song_queue(songs, repeat: int) -> dict:
+    q = SongQueue(songs)
+    mid = len(q) // 2
+    results = {}
+    results['append'] = per_op(lambda: q.append(songs[0]), repeat)
+    results['popleft'] = per_op(q.popleft, repeat)
+    results['getitem_mid'] = per_op(lambda: q[mid], repeat)
+    results['remove_mid'] = per_op(lambda: q.append(q.pop(mid)), repeat)
+    results['move_mid'] = per_op(lambda: q.move(mid, mid // 2), repeat)
+
+    def jump_mid():
+        r = SongQueue(())
+        r._rebuild(list(q))
+        started = time.perf_counter()
+        r.jump(mid)
+        return time.perf_counter() - started
+    # Hanya jump yang diukur (bukan copy queue)
+    runs = max(repeat // 20, 1)
+    results['jump_mid'] = sum(jump_mid() for _ in range(runs)) / runs * 1e6
+    results['page_mid'] = per_op(lambda: q.page(mid, 10), repeat)
+    results['requester_page'] = per_op(lambda: q.by_requester(999, 0, 10), repeat)
+    results['contains_video'] = per_op(lambda: q.contains_video('missing'), repeat)
+    results['shuffle'] = per_op(q.shuffle, max(repeat // 20, 1))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--check', action='store_true', help='gagal kalau ada operasi di bawah MIN_SPEEDUP')
+    args = parser.parse_args()
+
+    random.seed(1)
+    songs = make_songs(args.size)
+    old = bench_deque(songs, args.repeat)
+    new = bench_song_queue(songs, args.repeat)
+
+    print(f"Queue {args.size} lagu (µs per operasi)")
+    print(f"{'operation':<16} {'deque':>12} {'SongQueue':>12} {'speedup':>9}")
+    slow = []
+    for name in old:
+        speedup = old[name] / new[name] if new[name] else float('inf')
+        print(f"{name:<16} {old[name]:>12.1f} {new[name]:>12.1f} {speedup:>8.1f}x")
+        if speedup < MIN_SPEEDUP.get(name, 0):
+            slow.append(f"{name} {speedup:.2f}x < {MIN_SPEEDUP[name]}x")
+
+    if args.check and slow:
+        print(f"REGRESSION: {', '.join(slow)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
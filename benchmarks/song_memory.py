@@ -0,0 +1,137 @@
+"""
+Benchmark memori per lagu di queue.
+
+Membandingkan:
+  - legacy  : Song lama yang menyimpan seluruh dict yt-dlp (formats, headers, thumbnails...)
+  - trimmed : dict hasil trim_info() yang masih disimpan di Song
+  - compact : Song sekarang (__slots__, tanpa dict)
+
+Jalankan:  python benchmarks/song_memory.py [--songs 10000] [--legacy-sample 500]
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extraction import trim_info  # noqa: E402
+from song import Song  # noqa: E402
+
+
+class LegacySong:
+    """Bentuk Song sebelum compact: semua atribut biasa + dict yt-dlp penuh"""
+
+    def __init__(self, data: dict, requester):
+        self.data = data
+        self.requester = requester
+        self.title = data.get('title', 'Unknown Title')
+        self.url = data.get('webpage_url') or data.get('original_url') or data.get('url', '')
+        self.stream_url = data.get('url', '')
+        self.thumbnail = data.get('thumbnail', '')
+        self.duration = data.get('duration', 0)
+        self.uploader = data.get('uploader') or data.get('channel', 'Unknown')
+
+
+def fake_info(i: int) -> dict:
+    """Dict mirip hasil yt-dlp extract_info untuk satu video YouTube"""
+    video_id = f"{i:011d}"
+    stream = (
+        f"https://rr{i % 9}---sn-abc.googlevideo.com/videoplayback?expire=1700000000"
+        f"&ei={video_id}&ip=1.2.3.4&id=o-{video_id}&itag=251&source=youtube"
+        f"&requiressl=yes&mime=audio%2Fwebm&gir=yes&clen=3456789&dur=215.3"
+        f"&sig={'A' * 120}&lsig={'B' * 80}"
+    )
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        'Accept-Language': 'en-us,en;q=0.5',
+        'Sec-Fetch-Mode': 'navigate',
+    }
+    formats = [
+        {
+            'format_id': str(100 + f),
+            'url': f"{stream}&itag={100 + f}",
+            'ext': 'webm' if f % 2 else 'mp4',
+            'acodec': 'opus' if f % 3 == 0 else 'none',
+            'vcodec': 'vp9' if f % 3 else 'none',
+            'abr': 160.0,
+            'tbr': 1234.5 + f,
+            'filesize': 3456789 + f,
+            'http_headers': dict(headers),
+            'downloader_options': {'http_chunk_size': 10485760},
+            'format_note': f"{f * 144}p",
+            'protocol': 'https',
+        }
+        for f in range(30)
+    ]
+    return {
+        'id': video_id,
+        'title': f"Artist {i % 300} - Popular Song {i} (Official Video)",
+        'webpage_url': f"https://www.youtube.com/watch?v={video_id}",
+        'original_url': f"https://www.youtube.com/watch?v={video_id}",
+        'url': stream,
+        'ext': 'webm',
+        'acodec': 'opus',
+        'abr': 160.0,
+        'format_id': '251',
+        'duration': 215,
+        'uploader': f"Artist {i % 300}",
+        'channel': f"Artist {i % 300}",
+        'thumbnail': f"https://i.ytimg.com/vi/{video_id}/maxresdefault.jpg",
+        'thumbnails': [
+            {'url': f"https://i.ytimg.com/vi/{video_id}/{t}.jpg", 'height': t, 'width': t * 16 // 9, 'id': str(t)}
+            for t in range(40)
+        ],
+        'description': 'Lyrics, credits and links. ' * 80,
+        'tags': [f"tag{t}" for t in range(25)],
+        'categories': ['Music'],
+        'formats': formats,
+        'http_headers': dict(headers),
+    }
+
+
+def measure(label: str, count: int, build) -> float:
+    """Alokasi bersih per lagu (byte) untuk queue berisi `count` lagu"""
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+
+    queue = deque(build(i) for i in range(count))
+
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+
+    per_song = used / count
+    print(f"{label:<8} {count:>7} lagu  {per_song / 1024:>9.2f} KB/lagu  {used / 1024 / 1024:>9.1f} MB")
+    del queue
+    return per_song
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--songs', type=int, default=10_000)
+    parser.add_argument('--legacy-sample', type=int, default=500,
+                        help='jumlah lagu legacy yang benar-benar dibuat (hasil di-extrapolasi)')
+    args = parser.parse_args()
+
+    requester = object()
+
+    print(f"Queue {args.songs} lagu\n")
+    legacy = measure('legacy', args.legacy_sample, lambda i: LegacySong(fake_info(i), requester))
+
+    # Dict sumber dibuat per lagu lalu dibuang; yang diukur hanya yang disimpan di queue
+    trimmed = measure('trimmed', args.songs, lambda i: LegacySong(trim_info(fake_info(i)), requester))
+    compact = measure('compact', args.songs, lambda i: Song(trim_info(fake_info(i)), requester))
+
+    print()
+    for label, per_song in (('legacy', legacy), ('trimmed', trimmed), ('compact', compact)):
+        total = per_song * args.songs / 1024 / 1024
+        print(f"{label:<8} ~{total:>8.1f} MB untuk {args.songs} lagu  ({legacy / per_song:.0f}x vs legacy)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark waktu startup cog musik.
+
+Setiap mode dijalankan di process Python baru dan melaporkan:
+  - import      : waktu `import music_cog`
+  - load        : waktu `bot.load_extension('music_cog')` (cog siap menerima command)
+  - first-ready : load + backend extraction siap (worker process sudah warm)
+  - wall        : total sejak process dibuat sampai siap
+
+Jalankan:  python benchmarks/startup.py [--modes off,background,startup] [--backend thread|process] [--runs 3]
+Mode 'startup' menunggu cek/stage update yt-dlp, jadi butuh akses internet.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r'''
+import asyncio, json, time
+t0 = time.perf_counter()
+import music_cog
+t_import = time.perf_counter() - t0
+
+import discord
+from discord.ext import commands
+from extraction import EXTRACTOR, _warmup
+
+async def main():
+    bot = commands.Bot(command_prefix='!', intents=discord.Intents.none())
+    t1 = time.perf_counter()
+    await bot.load_extension('music_cog')
+    t_load = time.perf_counter() - t1
+
+    # Backend siap: untuk process backend, tunggu semua worker selesai initializer
+    EXTRACTOR.start()
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(*[
+        loop.run_in_executor(EXTRACTOR._executor, _warmup) for _ in range(EXTRACTOR.workers)
+    ])
+    t_ready = time.perf_counter() - t1
+
+    print(json.dumps({'import': t_import, 'load': t_load, 'first-ready': t_ready}), flush=True)
+    await bot.unload_extension('music_cog')
+
+if __name__ == '__main__':
+    asyncio.run(main())
+'''
+
+
+def run_once(mode: str, backend: str) -> dict:
+    env = dict(os.environ, YTDLP_UPDATE=mode, EXTRACT_BACKEND=backend, SEARCH_CACHE_PATH='')
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, '-c', CHILD],
+        cwd=ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    )
+    line = proc.stdout.readline()
+    wall = time.perf_counter() - started
+    proc.wait()
+    if not line:
+        raise RuntimeError(f"mode {mode} gagal (exit {proc.returncode})")
+    result = json.loads(line)
+    result['wall'] = wall
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', default='off,background')
+    parser.add_argument('--backend', default='thread', choices=('thread', 'process'))
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    keys = ('import', 'load', 'first-ready', 'wall')
+    print(f"backend={args.backend}  runs={args.runs}  (median, ms)\n")
+    print(f"{'mode':<12}" + ''.join(f"{k:>14}" for k in keys))
+    for mode in args.modes.split(','):
+        runs = [run_once(mode, args.backend) for _ in range(args.runs)]
+        row = ''.join(f"{statistics.median(r[k] for r in runs) * 1000:>14.1f}" for k in keys)
+        print(f"{mode:<12}{row}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,297 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import signal
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+from aiohttp import web
+
+logger = logging.getLogger('MusicBot.Cluster')
+
+# ═══════════════════════════════════════════════════════════════
+# KONFIGURASI CLUSTER
+# ═══════════════════════════════════════════════════════════════
+
+# Jumlah worker process (0 = satu process biasa, tanpa supervisor)
+CLUSTER_PROCESSES = int(os.environ.get('CLUSTER_PROCESSES', '0'))
+
+# Total shard (0 = pakai rekomendasi Discord dari /gateway/bot)
+SHARD_COUNT = int(os.environ.get('SHARD_COUNT', '0'))
+
+# Di-set supervisor untuk tiap worker
+CLUSTER_ID = os.environ.get('CLUSTER_ID')
+CLUSTER_SHARDS = os.environ.get('CLUSTER_SHARDS', '')
+
+# Restart worker yang mati: backoff naik sampai batas ini (detik)
+CLUSTER_RESTART_MAX_BACKOFF = 60
+
+# Worker yang hidup lebih lama dari ini dianggap stabil, backoff di-reset
+CLUSTER_STABLE_AFTER = 300
+
+# Discord: tiap bucket max_concurrency boleh 1 IDENTIFY per 5 detik
+IDENTIFY_INTERVAL = 5.0
+
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
+
+GATEWAY_URL = 'https://discord.com/api/v10/gateway/bot'
+
+
+def is_supervisor() -> bool:
+    return CLUSTER_PROCESSES > 0 and CLUSTER_ID is None
+
+
+def worker_shards() -> Optional[Tuple[List[int], int]]:
+    """(shard_ids, shard_count) untuk process ini, None kalau bukan worker cluster"""
+    if CLUSTER_ID is None:
+        return None
+    return [int(s) for s in CLUSTER_SHARDS.split(',') if s], SHARD_COUNT
+
+
+def assign_shards(shard_count: int, processes: int) -> List[List[int]]:
+    """
+    Bagi shard ke process dalam blok berurutan.
+
+    Bucket identify = shard_id % max_concurrency, jadi blok berurutan berisi
+    bucket yang berbeda-beda: satu process bisa login paralel sebanyak
+    max_concurrency, dan process berikutnya di-start setelah giliran selesai.
+    """
+    processes = max(min(processes, shard_count), 1)
+    size, extra = divmod(shard_count, processes)
+    blocks, start = [], 0
+    for i in range(processes):
+        end = start + size + (1 if i < extra else 0)
+        blocks.append(list(range(start, end)))
+        start = end
+    return blocks
+
+
+def identify_time(shard_ids: List[int], max_concurrency: int) -> float:
+    """Perkiraan waktu sampai semua shard worker selesai IDENTIFY"""
+    return math.ceil(len(shard_ids) / max(max_concurrency, 1)) * IDENTIFY_INTERVAL
+
+
+async def gateway_info(token: str) -> Tuple[int, int]:
+    """(shard yang direkomendasikan, max_concurrency) dari /gateway/bot"""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(GATEWAY_URL, headers={'Authorization': f'Bot {token}'}) as resp:
+            resp.raise_for_status()
+            data = await resp.json()
+            return data['shards'], data.get('session_start_limit', {}).get('max_concurrency', 1)
+
+
+def _add_label(line: str, name: str, value: str) -> str:
+    """Sisipkan label ke satu baris sample Prometheus"""
+    brace, space = line.find('{'), line.find(' ')
+    if brace != -1 and brace < space:
+        return f'{line[:brace + 1]}{name}="{value}",{line[brace + 1:]}'
+    return f'{line[:space]}{{{name}="{value}"}}{line[space:]}'
+
+
+def merge_metrics(texts: Dict[str, str], label: str = 'cluster') -> str:
+    """Gabung output /metrics semua worker; sample dikelompokkan per metric family"""
+    headers: Dict[str, List[str]] = {}
+    samples: Dict[str, List[str]] = {}
+    for cluster_id, text in texts.items():
+        family = None
+        for line in text.splitlines():
+            if not line:
+                continue
+            if line.startswith('#'):
+                family = line.split(' ', 3)[2]
+                headers.setdefault(family, [])
+                samples.setdefault(family, [])
+                if len(headers[family]) < 2 and line not in headers[family]:
+                    headers[family].append(line)
+                continue
+            samples.setdefault(family, []).append(_add_label(line, label, cluster_id))
+
+    lines = []
+    for family, family_samples in samples.items():
+        lines.extend(headers.get(family, []))
+        lines.extend(family_samples)
+    return '\n'.join(lines) + '\n'
+
+
+class Worker:
+    def __init__(self, cluster_id: int, shard_ids: List[int], port: int):
+        self.cluster_id = cluster_id
+        self.shard_ids = shard_ids
+        self.port = port
+        self.proc: Optional[asyncio.subprocess.Process] = None
+        self.started_at = 0.0
+        self.restarts = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.returncode is None
+
+
+class Supervisor:
+    """Jalankan worker AutoShardedBot per process, restart yang mati, agregasi stats"""
+
+    def __init__(self, token: str, processes: int = CLUSTER_PROCESSES, shard_count: int = SHARD_COUNT):
+        self.token = token
+        self.processes = processes
+        self.shard_count = shard_count
+        self.max_concurrency = 1
+        self.workers: List[Worker] = []
+        self._stopping = asyncio.Event()
+        # Satu worker login dalam satu waktu: IDENTIFY semua process berbagi rate limit
+        self._identify_lock = asyncio.Lock()
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def _spawn(self, worker: Worker):
+        async with self._identify_lock:
+            if self._stopping.is_set():
+                return
+            await self._start(worker)
+            # Tahan giliran selama worker ini IDENTIFY (atau sampai dia mati duluan)
+            try:
+                await asyncio.wait_for(
+                    worker.proc.wait(),
+                    timeout=identify_time(worker.shard_ids, self.max_concurrency)
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    async def _start(self, worker: Worker):
+        env = dict(
+            os.environ,
+            CLUSTER_ID=str(worker.cluster_id),
+            CLUSTER_SHARDS=','.join(map(str, worker.shard_ids)),
+            SHARD_COUNT=str(self.shard_count),
+            HEALTH_PORT=str(worker.port),
+        )
+        worker.proc = await asyncio.create_subprocess_exec(sys.executable, MAIN_SCRIPT, env=env)
+        worker.started_at = time.monotonic()
+        logger.info(f"🚀 Cluster {worker.cluster_id} (pid {worker.proc.pid}) shards {worker.shard_ids}")
+
+    async def _run_worker(self, worker: Worker):
+        # Start bergiliran lewat _identify_lock, urut sesuai cluster id
+        await self._spawn(worker)
+        if worker.proc is not None:
+            await self._watch(worker)
+
+    async def _watch(self, worker: Worker):
+        backoff = 1.0
+        while not self._stopping.is_set():
+            code = await worker.proc.wait()
+            if self._stopping.is_set():
+                return
+            if time.monotonic() - worker.started_at > CLUSTER_STABLE_AFTER:
+                backoff = 1.0
+            logger.error(f"💥 Cluster {worker.cluster_id} exit {code}, restart dalam {backoff:.0f}s")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=backoff)
+                return
+            except asyncio.TimeoutError:
+                pass
+            backoff = min(backoff * 2, CLUSTER_RESTART_MAX_BACKOFF)
+            worker.restarts += 1
+            await self._spawn(worker)
+
+    async def _fetch(self, worker: Worker, path: str) -> Tuple[int, str]:
+        try:
+            async with self._session.get(f"http://127.0.0.1:{worker.port}{path}") as resp:
+                return resp.status, await resp.text()
+        except Exception as e:
+            return 0, str(e)[:100]
+
+    async def _fetch_all(self, path: str) -> List[Tuple[int, str]]:
+        return await asyncio.gather(*[self._fetch(w, path) for w in self.workers])
+
+    async def stats(self) -> dict:
+        """Total semua worker + detail per cluster"""
+        clusters = []
+        totals = {'guilds': 0, 'voice_connections': 0, 'players': 0}
+        for worker, (status, body) in zip(self.workers, await self._fetch_all('/stats')):
+            entry = {
+                'cluster': worker.cluster_id,
+                'pid': worker.proc.pid if worker.proc else None,
+                'alive': worker.alive,
+                'restarts': worker.restarts,
+                'shards': worker.shard_ids,
+            }
+            if status == 200:
+                data = json.loads(body)
+                entry.update(data)
+                for key in totals:
+                    totals[key] += data.get(key, 0)
+            clusters.append(entry)
+        return {'shard_count': self.shard_count, **totals, 'clusters': clusters}
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+
+        async def healthz(request):
+            alive = {str(w.cluster_id): w.alive for w in self.workers}
+            return web.json_response({'live': all(alive.values()), 'workers': alive}, status=200 if all(alive.values()) else 503)
+
+        async def readyz(request):
+            ready = {str(w.cluster_id): status == 200 for w, (status, _) in zip(self.workers, await self._fetch_all('/readyz'))}
+            return web.json_response({'ready': all(ready.values()), 'workers': ready}, status=200 if all(ready.values()) else 503)
+
+        async def metrics(request):
+            texts = {
+                str(w.cluster_id): body
+                for w, (status, body) in zip(self.workers, await self._fetch_all('/metrics'))
+                if status == 200
+            }
+            return web.Response(
+                text=merge_metrics(texts),
+                headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+            )
+
+        async def stats(request):
+            return web.json_response(await self.stats())
+
+        app.router.add_get('/healthz', healthz)
+        app.router.add_get('/readyz', readyz)
+        app.router.add_get('/metrics', metrics)
+        app.router.add_get('/stats', stats)
+        return app
+
+    def stop(self):
+        self._stopping.set()
+        for worker in self.workers:
+            if worker.alive:
+                worker.proc.terminate()
+
+    async def run(self, port: int):
+        try:
+            recommended, self.max_concurrency = await gateway_info(self.token)
+        except Exception as e:
+            if not self.shard_count:
+                raise
+            logger.warning(f"/gateway/bot gagal ({str(e)[:80]}), max_concurrency=1")
+            recommended = self.shard_count
+        self.shard_count = self.shard_count or recommended
+        assignment = assign_shards(self.shard_count, self.processes)
+        self.workers = [Worker(i, shards, port + 1 + i) for i, shards in enumerate(assignment)]
+        logger.info(
+            f"🧩 Cluster: {self.shard_count} shards di {len(self.workers)} process "
+            f"(max_concurrency {self.max_concurrency})"
+        )
+
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, self.stop)
+
+        self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5))
+        runner = web.AppRunner(self.create_app(), access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, '0.0.0.0', port).start()
+        logger.info(f"🌐 Cluster health server on :{port}")
+
+        try:
+            await asyncio.gather(*[self._run_worker(w) for w in self.workers])
+        finally:
+            self.stop()
+            await asyncio.gather(*[w.proc.wait() for w in self.workers if w.proc])
+            await self._session.close()
+            await runner.cleanup()
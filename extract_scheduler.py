@@ -0,0 +1,251 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+from cluster import CLUSTER_PROCESSES
+from extraction import EXTRACTOR, INFLIGHT, ExtractionBackend
+from metrics import EXTRACTION_THROTTLED_TOTAL
+
+logger = logging.getLogger('MusicBot.Scheduler')
+
+# ═══════════════════════════════════════════════════════════════
+# KONFIGURASI SCHEDULER EXTRACTION
+# ═══════════════════════════════════════════════════════════════
+
+# Request yt-dlp per detik untuk seluruh node (token bucket), dan burst maksimal.
+# Mode cluster: jatah node dibagi rata ke semua worker process
+EXTRACT_RATE = float(os.environ.get('EXTRACT_RATE', '5')) / max(CLUSTER_PROCESSES, 1)
+EXTRACT_BURST = max(int(os.environ.get('EXTRACT_BURST', '20')) // max(CLUSTER_PROCESSES, 1), 1)
+
+# Backoff saat YouTube membalas 429 / "sign in to confirm you're not a bot" (detik)
+EXTRACT_BACKOFF_MIN = float(os.environ.get('EXTRACT_BACKOFF_MIN', '5'))
+EXTRACT_BACKOFF_MAX = float(os.environ.get('EXTRACT_BACKOFF_MAX', '300'))
+
+# Kelas prioritas (angka kecil dilayani duluan)
+PRIORITY_INTERACTIVE = 0   # !play, lagu yang akan segera diputar
+PRIORITY_REFRESH = 1       # prefetch / refresh stream URL
+PRIORITY_TEST = 2          # !test (menjalankan kelima method)
+PRIORITY_NAMES = ('interactive', 'refresh', 'test')
+
+
+def is_throttled(message: Optional[str]) -> bool:
+    """Error yang berarti IP kena rate limit YouTube (bukan masalah video/method)"""
+    if not message:
+        return False
+    error_str = message.lower()
+    if '429' in error_str or 'too many requests' in error_str or 'not a bot' in error_str:
+        return True
+    # "Sign in to confirm your age" = video age-restricted, bukan throttling
+    return 'sign in to confirm' in error_str and 'your age' not in error_str
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def take(self) -> float:
+        """Ambil satu token; return 0, atau berapa detik lagi token tersedia"""
+        if self.rate <= 0:
+            return 0.0
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def drain(self):
+        self._refill()
+        self.tokens = 0.0
+
+
+class ExtractionScheduler:
+    """
+    Gerbang semua request yt-dlp di node ini.
+
+    Tiap request menunggu giliran: kelas prioritas tertinggi dulu, di dalam
+    satu kelas server dilayani bergiliran (round-robin) supaya satu server
+    yang sibuk tidak menghabiskan jatah server lain. Giliran diberikan
+    sesuai token bucket; saat YouTube mulai throttling semua giliran ditahan
+    selama backoff (eksponensial, reset pelan-pelan setelah berhasil).
+    """
+
+    def __init__(
+        self,
+        backend: ExtractionBackend,
+        rate: float = EXTRACT_RATE,
+        burst: int = EXTRACT_BURST,
+        backoff_min: float = EXTRACT_BACKOFF_MIN,
+        backoff_max: float = EXTRACT_BACKOFF_MAX
+    ):
+        self.backend = backend
+        self.bucket = TokenBucket(rate, burst)
+        self.backoff_min = backoff_min
+        self.backoff_max = backoff_max
+        self.backoff = 0.0
+        self.paused_until = 0.0
+        # Per prioritas: guild_id → antrian future yang menunggu giliran
+        self._queues: List[OrderedDict] = [OrderedDict() for _ in PRIORITY_NAMES]
+        # Future yang menunggu → (prioritas, guild_id) tempat dia antri sekarang
+        self._waiting: Dict[asyncio.Future, Tuple[int, Optional[int]]] = {}
+        # Future → tag (key INFLIGHT) supaya bisa dinaikkan prioritasnya
+        self._tags: Dict[asyncio.Future, str] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        # Metrik
+        self.granted = [0] * len(PRIORITY_NAMES)
+        self.throttled = 0
+
+    @property
+    def paused(self) -> bool:
+        return time.monotonic() < self.paused_until
+
+    def waiting(self, priority: Optional[int] = None) -> int:
+        queues = self._queues if priority is None else [self._queues[priority]]
+        return sum(len(waiters) for queue in queues for waiters in queue.values())
+
+    async def extract(
+        self,
+        query: str,
+        method: int,
+        guild_id: Optional[int] = None,
+        priority: int = PRIORITY_INTERACTIVE,
+        tag: Optional[str] = None,
+        on_start: Optional[Callable[[], None]] = None
+    ) -> Tuple[Optional[dict], Optional[str], Optional[str]]:
+        """EXTRACTOR.extract setelah dapat giliran; `on_start` dipanggil saat yt-dlp mulai jalan"""
+        await self.acquire(guild_id, priority, tag)
+        data, warning, fatal = await self.backend.extract(query, method, on_start)
+        if data:
+            self._recovered()
+        elif is_throttled(warning):
+            self._throttled(warning)
+        return data, warning, fatal
+
+    async def acquire(self, guild_id: Optional[int], priority: int = PRIORITY_INTERACTIVE, tag: Optional[str] = None):
+        future = asyncio.get_running_loop().create_future()
+        self._enqueue(future, priority, guild_id)
+        if tag is not None:
+            self._tags[future] = tag
+        if self._task is None or self._task.done():
+            # Event terikat ke event loop pertama yang memakainya
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+        self._wakeup.set()
+        try:
+            await future
+        except asyncio.CancelledError:
+            # Dibatalkan sebelum dapat giliran (mis. hedge sudah dapat hasil)
+            if future in self._waiting:
+                self._dequeue(future)
+            raise
+        finally:
+            self._tags.pop(future, None)
+
+    def promote(self, tag: str, priority: int, guild_id: Optional[int] = None):
+        """Request milik `tag` yang masih antri pindah ke kelas `priority` (dan lane server `guild_id`)"""
+        moved = False
+        for future, owner in list(self._tags.items()):
+            if owner != tag or future not in self._waiting:
+                continue
+            current, current_guild = self._waiting[future]
+            if current <= priority:
+                continue
+            self._dequeue(future)
+            self._enqueue(future, priority, current_guild if guild_id is None else guild_id)
+            moved = True
+        if moved:
+            self._wakeup.set()
+
+    def _enqueue(self, future: asyncio.Future, priority: int, guild_id: Optional[int]):
+        self._queues[priority].setdefault(guild_id, deque()).append(future)
+        self._waiting[future] = (priority, guild_id)
+
+    def _dequeue(self, future: asyncio.Future):
+        priority, guild_id = self._waiting.pop(future)
+        queue = self._queues[priority]
+        waiters = queue[guild_id]
+        waiters.remove(future)
+        if not waiters:
+            del queue[guild_id]
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            if not self.waiting():
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            delay = self.paused_until - time.monotonic()
+            if delay <= 0:
+                delay = self.bucket.take()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            self._grant()
+
+    def _grant(self):
+        """Berikan satu token ke request berikutnya (prioritas, lalu round-robin server)"""
+        for priority, queue in enumerate(self._queues):
+            while queue:
+                guild_id, waiters = next(iter(queue.items()))
+                future = waiters.popleft()
+                if waiters:
+                    queue.move_to_end(guild_id)
+                else:
+                    del queue[guild_id]
+                self._waiting.pop(future, None)
+                # Future yang baru saja di-cancel belum sempat dibuang caller-nya
+                if not future.done():
+                    future.set_result(None)
+                    self.granted[priority] += 1
+                    return
+
+    def _throttled(self, warning: str):
+        EXTRACTION_THROTTLED_TOTAL.inc()
+        self.throttled += 1
+        now = time.monotonic()
+        if now < self.paused_until:
+            # Request yang sudah jalan sebelum pause ikut gagal, jangan naikkan backoff lagi
+            return
+        self.backoff = min(max(self.backoff * 2, self.backoff_min), self.backoff_max)
+        self.paused_until = now + self.backoff
+        # Setelah pause, mulai lagi pelan (tanpa burst)
+        self.bucket.drain()
+        logger.warning(f"🐢 YouTube throttling, extraction ditahan {self.backoff:.1f}s: {warning[:60]}")
+
+    def _recovered(self):
+        if self.backoff:
+            self.backoff = self.backoff / 2 if self.backoff / 2 >= self.backoff_min else 0.0
+
+    def stats(self) -> dict:
+        return {
+            'rate': self.bucket.rate,
+            'waiting': {name: self.waiting(p) for p, name in enumerate(PRIORITY_NAMES)},
+            'granted': dict(zip(PRIORITY_NAMES, self.granted)),
+            'throttled': self.throttled,
+            'backoff': round(self.backoff, 1),
+            'paused_for': round(max(self.paused_until - time.monotonic(), 0.0), 1),
+        }
+
+
+# Dipakai bersama oleh semua server
+SCHEDULER = ExtractionScheduler(EXTRACTOR)
+
+# Caller interaktif yang ikut menunggu extraction prefetch: request-nya ikut naik kelas
+INFLIGHT.on_promote = SCHEDULER.promote
@@ -0,0 +1,615 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque, OrderedDict
+from itertools import islice
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, BrokenExecutor
+from typing import Optional, Dict, List, Tuple, Callable, Awaitable, Iterator
+
+logger = logging.getLogger('MusicBot.Extraction')
+
+# ═══════════════════════════════════════════════════════════════
+# KONFIGURASI - SANGAT PENTING UNTUK BYPASS YOUTUBE BLOCKS
+# ═══════════════════════════════════════════════════════════════
+
+class YTDLSource:
+    """YouTube Downloader dengan multiple fallback"""
+    
+    # User agents yang berbeda
+    USER_AGENTS = [
+        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
+        'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
+        'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
+    ]
+    
+    # Base options
+    BASE_OPTS = {
+        # Opus dulu supaya bisa passthrough tanpa encode ulang
+        'format': 'bestaudio[acodec=opus]/bestaudio/best',
+        'noplaylist': True,
+        'nocheckcertificate': True,
+        # Error harus sampai ke run_extraction sebagai DownloadError: dengan
+        # ignoreerrors yt-dlp hanya me-log-nya lalu return None, sehingga
+        # throttling (429 / "not a bot") dan video private tidak bisa dibedakan
+        'ignoreerrors': False,
+        'no_warnings': True,
+        'quiet': True,
+        'extract_flat': False,
+        'force_ipv4': True,
+        'geo_bypass': True,
+        'geo_bypass_country': 'US',
+        'socket_timeout': 30,
+        'retries': 10,
+        'fragment_retries': 10,
+        'skip_unavailable_fragments': True,
+        'source_address': '0.0.0.0',
+    }
+    
+    @classmethod
+    def get_options(cls, method: int = 0) -> dict:
+        """Get YT-DLP options dengan berbagai method"""
+        opts = cls.BASE_OPTS.copy()
+        
+        # Rotate user agent
+        opts['http_headers'] = {
+            'User-Agent': cls.USER_AGENTS[method % len(cls.USER_AGENTS)],
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.5',
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive',
+        }
+        
+        # Different extractor configurations
+        if method == 0:
+            # Method 1: Android client (most reliable)
+            opts['extractor_args'] = {
+                'youtube': {
+                    'player_client': ['android_music', 'android', 'web'],
+                    'player_skip': ['webpage', 'configs'],
+                }
+            }
+        elif method == 1:
+            # Method 2: iOS client
+            opts['extractor_args'] = {
+                'youtube': {
+                    'player_client': ['ios', 'android'],
+                    'player_skip': ['webpage'],
+                }
+            }
+        elif method == 2:
+            # Method 3: TV embedded
+            opts['extractor_args'] = {
+                'youtube': {
+                    'player_client': ['tv_embedded', 'android'],
+                }
+            }
+        elif method == 3:
+            # Method 4: Web client dengan oauth
+            opts['extractor_args'] = {
+                'youtube': {
+                    'player_client': ['web', 'android_music'],
+                }
+            }
+        else:
+            # Method 5: Mweb client
+            opts['extractor_args'] = {
+                'youtube': {
+                    'player_client': ['mweb', 'android'],
+                }
+            }
+        
+        return opts
+
+
+# ═══════════════════════════════════════════════════════════════
+# KONFIGURASI EXTRACTION
+# ═══════════════════════════════════════════════════════════════
+
+METHOD_COUNT = 5
+
+# Hedged mode: method berikutnya dijalankan paralel setelah latency budget
+EXTRACT_HEDGED = os.environ.get('EXTRACT_HEDGED', '1') == '1'
+
+# Latency budget default (detik) sebelum ada data latency
+HEDGE_DELAY = float(os.environ.get('EXTRACT_HEDGE_DELAY', '4'))
+HEDGE_DELAY_MIN = 1.5
+HEDGE_DELAY_MAX = 10.0
+
+# Jumlah hasil terakhir per method yang dipakai untuk scoring
+STATS_WINDOW = 20
+
+# Backend: 'thread' (default) atau 'process' (yt-dlp di worker process
+# terpisah supaya decipher/parse JSON tidak berebut GIL dengan thread voice)
+EXTRACT_BACKEND = os.environ.get('EXTRACT_BACKEND', 'thread')
+EXTRACT_WORKERS = int(os.environ.get('EXTRACT_WORKERS', str(min(4, os.cpu_count() or 1))))
+
+# Maksimal extraction yang jalan bersamaan, sisanya antri
+EXTRACT_MAX_CONCURRENCY = int(os.environ.get('EXTRACT_MAX_CONCURRENCY', str(EXTRACT_WORKERS)))
+
+# Berapa lama video private/removed/copyright diingat (detik)
+NEGATIVE_CACHE_TTL = float(os.environ.get('NEGATIVE_CACHE_TTL', '900'))
+NEGATIVE_CACHE_SIZE = 1000
+
+# Playlist / mix: jumlah entry per halaman dan batas total
+PLAYLIST_PAGE_SIZE = int(os.environ.get('PLAYLIST_PAGE_SIZE', '50'))
+PLAYLIST_MAX_ENTRIES = int(os.environ.get('PLAYLIST_MAX_ENTRIES', '500'))
+
+# Backend dianggap tidak sehat kalau antrian melebihi ini, atau pool
+# rusak (worker mati) dalam BACKEND_BROKEN_GRACE detik terakhir
+EXTRACT_HEALTH_MAX_QUEUED = int(os.environ.get('EXTRACT_HEALTH_MAX_QUEUED', str(EXTRACT_MAX_CONCURRENCY * 10)))
+BACKEND_BROKEN_GRACE = 60
+
+# Field hasil yt-dlp yang dipakai bot, sisanya dibuang sebelum dikirim balik
+TRIM_FIELDS = (
+    'id', 'title', 'webpage_url', 'original_url', 'url', 'thumbnail',
+    'duration', 'uploader', 'channel', 'is_live',
+    'format_id', 'ext', 'acodec', 'abr', 'asr',
+)
+
+
+class VideoUnavailable(Exception):
+    """Video private / dihapus / kena copyright - tidak perlu coba method lain"""
+
+
+class MethodStats:
+    """Rolling success-rate dan latency per method YTDLSource"""
+
+    def __init__(self, methods: int = METHOD_COUNT, window: int = STATS_WINDOW):
+        self.methods = methods
+        self._results: Dict[int, deque] = {m: deque(maxlen=window) for m in range(methods)}
+        self._lock = threading.Lock()
+
+    def record(self, method: int, success: bool, latency: float):
+        with self._lock:
+            self._results[method].append((success, latency))
+
+    def success_rate(self, method: int) -> float:
+        with self._lock:
+            results = list(self._results[method])
+        # Prior 1/2 supaya method yang belum pernah dicoba tidak dianggap 0 atau 100%
+        wins = sum(1 for ok, _ in results if ok)
+        return (wins + 1) / (len(results) + 2)
+
+    def latency(self, method: int) -> float:
+        """Rata-rata latency extraction yang berhasil"""
+        with self._lock:
+            latencies = [lat for ok, lat in self._results[method] if ok]
+        if not latencies:
+            return HEDGE_DELAY
+        return sum(latencies) / len(latencies)
+
+    def score(self, method: int) -> float:
+        """Perkiraan waktu sampai dapat hasil valid (lebih kecil = lebih baik)"""
+        return self.latency(method) / self.success_rate(method)
+
+    def order(self) -> List[int]:
+        return sorted(range(self.methods), key=lambda m: (self.score(m), m))
+
+    def budget(self, method: int) -> float:
+        """Berapa lama menunggu method ini sebelum method berikutnya di-hedge"""
+        with self._lock:
+            has_samples = any(ok for ok, _ in self._results[method])
+        if not has_samples:
+            return HEDGE_DELAY
+        return min(max(self.latency(method) * 2, HEDGE_DELAY_MIN), HEDGE_DELAY_MAX)
+
+    def summary(self) -> Dict[int, dict]:
+        return {
+            m: {
+                'success_rate': round(self.success_rate(m), 3),
+                'latency': round(self.latency(m), 3),
+                'samples': len(self._results[m]),
+            }
+            for m in range(self.methods)
+        }
+
+
+# Dipakai bersama oleh semua server
+METHOD_STATS = MethodStats()
+
+
+# ═══════════════════════════════════════════════════════════════
+# EXTRACTION (jalan di thread pool atau worker process)
+# ═══════════════════════════════════════════════════════════════
+
+# Pesan error YouTube (lewat yt-dlp) untuk video yang tidak akan bisa diputar
+# dengan method / client apa pun → alasan yang ditampilkan ke user
+UNAVAILABLE_REASONS = (
+    ('private', "Video is private"),
+    ('removed', "Video was removed"),
+    ('deleted', "Video was removed"),
+    ('account associated with this video has been terminated', "Video was removed"),
+    ('copyright', "Video blocked due to copyright"),
+    ('members-only', "Video is members-only"),
+    ("available to this channel's members", "Video is members-only"),
+    ('not made this video available in your country', "Video is not available in this region"),
+)
+
+
+def classify_error(message: str) -> Optional[str]:
+    """Alasan video tidak bisa diputar sama sekali, atau None kalau bisa dicoba lagi"""
+    error_str = message.lower()
+    for needle, reason in UNAVAILABLE_REASONS:
+        if needle in error_str:
+            return reason
+    # "Video unavailable" tanpa keterangan: ID tidak ada / sudah tidak bisa diakses
+    if error_str.rstrip(' .').endswith(': video unavailable') or 'this video is unavailable' in error_str:
+        return "Video is unavailable"
+    return None
+
+
+def select_stream(data: Optional[dict]) -> Tuple[Optional[dict], Optional[str]]:
+    """Ambil entry pertama dan pastikan ada URL stream audio"""
+    if not data:
+        return None, "No data returned"
+    
+    # Handle search results / playlist
+    if 'entries' in data:
+        entries = [e for e in data['entries'] if e is not None]
+        if not entries:
+            return None, "Empty entries"
+        data = entries[0]
+    
+    # Validasi: harus ada URL stream
+    if not data.get('url'):
+        # Coba ambil dari formats
+        for f in data.get('formats', []):
+            if f.get('acodec') != 'none' and f.get('url'):
+                data['url'] = f['url']
+                data['acodec'] = f.get('acodec')
+                data['ext'] = f.get('ext')
+                data['abr'] = f.get('abr')
+                break
+    
+    if not data.get('url'):
+        return None, "No stream URL"
+    return data, None
+
+
+def trim_info(data: dict) -> dict:
+    """Buang formats, headers, thumbnails dll - hanya field yang dipakai bot"""
+    return {key: data[key] for key in TRIM_FIELDS if data.get(key) is not None}
+
+
+def flat_entry(entry: dict) -> Optional[dict]:
+    """
+    Entry playlist (flat) → data placeholder untuk Song.
+    Sengaja tanpa 'url' supaya stream URL di-resolve nanti oleh prefetcher.
+    """
+    video_id = entry.get('id')
+    if not video_id:
+        return None
+    return {
+        'id': video_id,
+        'title': entry.get('title') or video_id,
+        'webpage_url': f"https://www.youtube.com/watch?v={video_id}",
+        'duration': entry.get('duration') or 0,
+        'uploader': entry.get('uploader') or entry.get('channel') or 'Unknown',
+        'thumbnail': f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg",
+    }
+
+
+def iter_playlist(
+    url: str,
+    page_size: int = PLAYLIST_PAGE_SIZE,
+    limit: int = PLAYLIST_MAX_ENTRIES,
+    stop: Optional[threading.Event] = None,
+    gate: Optional[Callable[[], bool]] = None
+) -> Iterator[Tuple[Optional[str], List[dict]]]:
+    """
+    Enumerasi playlist/mix dengan flat extraction, yield (judul, halaman entry)
+    selagi halaman berikutnya masih di-fetch oleh yt-dlp.
+
+    `gate()` dipanggil (di thread ini) sebelum setiap request ke YouTube -
+    halaman pertama, redirect, lalu kira-kira satu continuation per halaman -
+    dan boleh memblok sampai dapat giliran; False = berhenti.
+    """
+    import yt_dlp
+    
+    opts = YTDLSource.get_options(0)
+    opts.pop('extractor_args', None)
+    opts.update({
+        'noplaylist': False,
+        # Entry yang rusak dilewati, bukan menggagalkan seluruh playlist
+        'ignoreerrors': True,
+        'extract_flat': 'in_playlist',
+        'lazy_playlist': True,
+        'playlistend': limit,
+    })
+    ytdl = yt_dlp.YoutubeDL(opts)
+    
+    def allowed() -> bool:
+        return gate is None or gate()
+    
+    if not allowed():
+        return
+    # process=False: entries tetap generator, halaman di-fetch saat di-iterate
+    info = ytdl.extract_info(url, download=False, process=False)
+    for _ in range(3):
+        # URL watch?v=...&list=... diarahkan dulu ke halaman playlist
+        if not info or info.get('_type') not in ('url', 'url_transparent'):
+            break
+        if not allowed():
+            return
+        info = ytdl.extract_info(info['url'], download=False, process=False)
+    
+    if not info:
+        return
+    title = info.get('title')
+    
+    entries = islice(info.get('entries') or [], limit)
+    first = True
+    while True:
+        # Halaman pertama ikut terambil bersama info playlist di atas
+        if not first and not allowed():
+            return
+        first = False
+        page = []
+        consumed = 0
+        for entry in islice(entries, page_size):
+            consumed += 1
+            if stop is not None and stop.is_set():
+                return
+            data = flat_entry(entry) if entry else None
+            if data:
+                page.append(data)
+        if page:
+            yield title, page
+        if consumed < page_size:
+            return
+
+
+def _build_ytdl(method: int):
+    # Import di sini supaya yt-dlp hasil update yang dipakai
+    import yt_dlp
+    return yt_dlp.YoutubeDL(YTDLSource.get_options(method))
+
+
+# YoutubeDL yang sudah dibuat per method (hanya di worker process)
+_worker_ytdl: Dict[int, object] = {}
+
+
+def _init_worker():
+    """Initializer worker process: siapkan YoutubeDL untuk semua method"""
+    for method in range(METHOD_COUNT):
+        _worker_ytdl[method] = _build_ytdl(method)
+
+
+def run_extraction(query: str, method: int) -> Tuple[Optional[dict], Optional[str], Optional[str]]:
+    """
+    Extract satu query dengan satu method.
+    Return (data, warning, fatal) - data sudah di-trim dan picklable.
+    """
+    import yt_dlp
+    
+    ytdl = _worker_ytdl.get(method)
+    if ytdl is None:
+        # Thread backend: YoutubeDL tidak thread-safe, buat baru per request
+        ytdl = _build_ytdl(method)
+    
+    try:
+        data = ytdl.extract_info(query, download=False)
+    except yt_dlp.utils.DownloadError as e:
+        return None, str(e), classify_error(str(e))
+    except Exception as e:
+        return None, str(e), None
+    
+    data, warning = select_stream(data)
+    if not data:
+        return None, warning, None
+    return trim_info(data), None, None
+
+
+def _warmup() -> int:
+    return os.getpid()
+
+
+class ExtractionBackend:
+    """Executor yt-dlp dengan batas concurrency dan metrik antrian"""
+    
+    def __init__(
+        self,
+        kind: str = EXTRACT_BACKEND,
+        workers: int = EXTRACT_WORKERS,
+        max_concurrency: int = EXTRACT_MAX_CONCURRENCY
+    ):
+        self.kind = kind
+        self.workers = workers
+        self.max_concurrency = max_concurrency
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._executor: Optional[Executor] = None
+        # Ditutup sementara saat modul yt-dlp di-swap
+        self._gate = asyncio.Event()
+        self._gate.set()
+        
+        # Metrik
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.max_queued = 0
+        self.total_wait = 0.0
+        self.broken_at: Optional[float] = None
+    
+    def start(self):
+        if self._executor is not None:
+            return
+        if self.kind == 'process':
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker
+            )
+            # Spawn semua worker sekarang, bukan saat request pertama
+            for _ in range(self.workers):
+                self._executor.submit(_warmup)
+            logger.info(f"⚙️ Extraction backend: {self.workers} worker process")
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency,
+                thread_name_prefix='ytdl'
+            )
+    
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+    
+    async def swap(self, fn: Callable[[], None]):
+        """Jalankan `fn` (ganti modul yt-dlp) di antara extraction"""
+        self._gate.clear()
+        try:
+            # Tunggu extraction yang sedang jalan selesai
+            while self.running:
+                await asyncio.sleep(0.1)
+            fn()
+            if self.kind == 'process' and self._executor is not None:
+                # Worker baru meng-import yt-dlp dari sys.path yang baru
+                self.shutdown()
+                self.start()
+        finally:
+            self._gate.set()
+    
+    async def extract(
+        self,
+        query: str,
+        method: int,
+        on_start: Optional[Callable[[], None]] = None
+    ) -> Tuple[Optional[dict], Optional[str], Optional[str]]:
+        """Jalankan run_extraction di backend (menunggu slot kalau penuh); `on_start` dipanggil saat dapat slot"""
+        loop = asyncio.get_running_loop()
+        
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        waited = time.monotonic()
+        try:
+            await self._gate.wait()
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+        self.total_wait += time.monotonic() - waited
+        
+        self.start()
+        self.running += 1
+        if on_start is not None:
+            on_start()
+        try:
+            future = self._executor.submit(run_extraction, query, method)
+        except Exception:
+            self._release()
+            raise
+        
+        # Slot baru dilepas saat extraction benar-benar selesai, walaupun
+        # caller (mis. hedged extraction) sudah cancel duluan
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release))
+        try:
+            return await asyncio.wrap_future(future)
+        except BrokenExecutor:
+            # Worker mati (OOM / crash): buat pool baru untuk request berikutnya
+            logger.error("❌ Extraction pool rusak, membuat ulang worker")
+            self.broken_at = time.monotonic()
+            self.shutdown()
+            raise
+    
+    def _release(self):
+        self.running -= 1
+        self.completed += 1
+        self._slots.release()
+    
+    def healthy(self) -> bool:
+        if self.broken_at is not None and time.monotonic() - self.broken_at < BACKEND_BROKEN_GRACE:
+            return False
+        return self.queued <= EXTRACT_HEALTH_MAX_QUEUED
+    
+    def stats(self) -> dict:
+        return {
+            'backend': self.kind,
+            'queued': self.queued,
+            'running': self.running,
+            'completed': self.completed,
+            'max_queued': self.max_queued,
+            'avg_wait': round(self.total_wait / self.completed, 3) if self.completed else 0.0,
+        }
+
+
+# Dipakai bersama oleh semua server
+EXTRACTOR = ExtractionBackend()
+
+
+# ═══════════════════════════════════════════════════════════════
+# COALESCING (request identik dari banyak server)
+# ═══════════════════════════════════════════════════════════════
+
+class SingleFlight:
+    """Caller dengan key yang sama menunggu satu extraction yang sedang jalan"""
+    
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # key → (prioritas, guild_id) yang dipakai extraction itu (angka kecil = lebih mendesak)
+        self._owners: Dict[str, Tuple[int, Optional[int]]] = {}
+        self.coalesced = 0
+        self.promoted = 0
+        # Dipanggil (key, prioritas, guild_id) saat caller yang lebih mendesak ikut menunggu
+        self.on_promote: Optional[Callable[[str, int, Optional[int]], None]] = None
+    
+    async def run(self, key: str, factory: Callable[[], Awaitable], priority: int = 0, guild_id: Optional[int] = None):
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(factory())
+            self._inflight[key] = task
+            self._owners[key] = (priority, guild_id)
+            task.add_done_callback(lambda _: self._done(key))
+        else:
+            self.coalesced += 1
+            logger.info(f"🔗 Menunggu extraction yang sama: {key[:50]}")
+            if priority < self._owners[key][0]:
+                # Mis. play_next menunggu refresh milik prefetcher: jangan ikut antri di kelas refresh
+                self._owners[key] = (priority, guild_id)
+                self.promoted += 1
+                if self.on_promote is not None:
+                    self.on_promote(key, priority, guild_id)
+        
+        # Shield: caller yang di-cancel tidak membatalkan extraction milik caller lain
+        return await asyncio.shield(task)
+    
+    def owner(self, key: str, priority: int, guild_id: Optional[int]) -> Tuple[int, Optional[int]]:
+        """(prioritas, guild_id) terkini untuk request berikutnya milik extraction `key`"""
+        return self._owners.get(key, (priority, guild_id))
+    
+    def _done(self, key: str):
+        self._inflight.pop(key, None)
+        self._owners.pop(key, None)
+    
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+
+class NegativeCache:
+    """Ingat sebentar video yang pasti tidak bisa diputar"""
+    
+    def __init__(self, ttl: float = NEGATIVE_CACHE_TTL, size: int = NEGATIVE_CACHE_SIZE):
+        self.ttl = ttl
+        self.size = size
+        self._entries: OrderedDict = OrderedDict()
+    
+    def add(self, key: str, reason: str):
+        self._entries[key] = (reason, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+    
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        reason, expires = entry
+        if expires < time.monotonic():
+            del self._entries[key]
+            return None
+        return reason
+
+
+INFLIGHT = SingleFlight()
+UNAVAILABLE = NegativeCache()
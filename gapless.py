@@ -0,0 +1,218 @@
+import logging
+import os
+import sys
+import threading
+from array import array
+from collections import deque
+from typing import Optional, Callable
+
+import discord
+from discord.opus import Encoder as OpusEncoder
+
+logger = logging.getLogger('MusicBot.Gapless')
+
+# ═══════════════════════════════════════════════════════════════
+# KONFIGURASI GAPLESS
+# ═══════════════════════════════════════════════════════════════
+
+# Opt-in: FFmpeg lagu berikutnya jalan bersamaan dengan lagu sekarang
+GAPLESS_ENABLED = os.environ.get('GAPLESS_PLAYBACK', '0') == '1'
+
+# Berapa detik sebelum lagu habis FFmpeg lagu berikutnya mulai jalan
+GAPLESS_LEAD_SECONDS = float(os.environ.get('GAPLESS_LEAD_SECONDS', '10'))
+
+# Crossfade butuh PCM (source di-decode, bukan Opus passthrough). 0 = mati
+CROSSFADE_SECONDS = float(os.environ.get('CROSSFADE_SECONDS', '0'))
+
+# Frame yang dibaca duluan dari lagu berikutnya (50 frame = 1 detik)
+PREBUFFER_FRAMES = 50
+
+FRAME_SECONDS = OpusEncoder.FRAME_LENGTH / 1000
+
+# Frame hening, dikirim kalau lagu berikutnya belum menghasilkan frame
+OPUS_SILENCE = b'\xf8\xff\xfe'
+PCM_SILENCE = bytes(OpusEncoder.FRAME_SIZE)
+
+
+def mix(a: bytes, b: bytes, gain_a: float, gain_b: float) -> bytes:
+    """Campur dua frame PCM s16le; gain_a + gain_b <= 1 jadi tidak pernah clipping"""
+    left, right = array('h', a), array('h', b)
+    if sys.byteorder == 'big':
+        left.byteswap()
+        right.byteswap()
+    mixed = array('h', [int(x * gain_a + y * gain_b) for x, y in zip(left, right)])
+    if sys.byteorder == 'big':
+        mixed.byteswap()
+    return mixed.tobytes()
+
+
+class _Track:
+    """Satu lagu + source FFmpeg-nya, dengan buffer frame di depan"""
+
+    def __init__(self, song, source: discord.AudioSource):
+        self.song = song
+        self.source = source
+        self.frames_read = 0
+        self._buffer: deque = deque()
+        self._thread: Optional[threading.Thread] = None
+
+    def prebuffer(self):
+        """Decode beberapa frame pertama di thread terpisah"""
+        self._thread = threading.Thread(target=self._fill, daemon=True)
+        self._thread.start()
+
+    def _fill(self):
+        try:
+            for _ in range(PREBUFFER_FRAMES):
+                data = self.source.read()
+                if not data:
+                    break
+                self._buffer.append(data)
+        except Exception as e:
+            logger.warning(f"Prebuffer error: {str(e)[:50]}")
+
+    def read(self) -> bytes:
+        if self._thread is not None:
+            if self._thread.is_alive():
+                # Source masih dibaca thread prebuffer: jangan join di thread voice,
+                # kirim hening sampai frame pertama siap
+                if not self._buffer:
+                    return OPUS_SILENCE if self.source.is_opus() else PCM_SILENCE
+                self.frames_read += 1
+                return self._buffer.popleft()
+            self._thread = None
+        data = self._buffer.popleft() if self._buffer else self.source.read()
+        if data:
+            self.frames_read += 1
+        return data
+
+    def remaining_seconds(self) -> Optional[float]:
+        if not self.song.duration:
+            return None
+        return self.song.duration - self.frames_read * FRAME_SECONDS
+
+    def cleanup(self):
+        self.source.cleanup()
+
+
+class GaplessSource(discord.AudioSource):
+    """
+    AudioSource yang menyambung lagu sekarang dan lagu berikutnya tanpa jeda.
+    FFmpeg lagu berikutnya dijalankan sebelum lagu sekarang habis, lalu
+    pergantian lagu terjadi di level frame (opsional dengan crossfade).
+    """
+
+    def __init__(
+        self,
+        song,
+        source: discord.AudioSource,
+        on_need_next: Callable[[], None],
+        on_transition: Callable[[object], None],
+        lead_seconds: float = GAPLESS_LEAD_SECONDS,
+        crossfade_seconds: float = CROSSFADE_SECONDS
+    ):
+        self._opus = source.is_opus()
+        self._current = _Track(song, source)
+        self._next: Optional[_Track] = None
+        self._lock = threading.Lock()
+        self._next_requested = False
+        self.on_need_next = on_need_next
+        self.on_transition = on_transition
+        self.lead_seconds = lead_seconds
+        # Mixing hanya bisa di PCM
+        self.crossfade_frames = 0 if self._opus else int(crossfade_seconds / FRAME_SECONDS)
+
+    @property
+    def song(self):
+        return self._current.song
+
+    @property
+    def wants_next(self) -> bool:
+        return self._next is None
+
+    @property
+    def needs_next(self) -> bool:
+        """Lagu sekarang hampir habis tapi belum ada lagu yang disiapkan"""
+        return self._next_requested and self._next is None
+
+    def set_next(self, song, source: discord.AudioSource):
+        """Siapkan lagu berikutnya (dipanggil dari event loop)"""
+        if source.is_opus() != self._opus:
+            source.cleanup()
+            raise ValueError("Source berikutnya harus sama-sama Opus/PCM")
+
+        track = _Track(song, source)
+        track.prebuffer()
+        with self._lock:
+            old, self._next = self._next, track
+        if old:
+            old.cleanup()
+
+    def clear_next(self):
+        """Batalkan lagu berikutnya yang sudah disiapkan (queue diedit)"""
+        with self._lock:
+            old, self._next = self._next, None
+        if old:
+            old.cleanup()
+
+    def is_opus(self) -> bool:
+        return self._opus
+
+    def read(self) -> bytes:
+        with self._lock:
+            current, upcoming = self._current, self._next
+
+        remaining = current.remaining_seconds()
+        if not self._next_requested and remaining is not None and remaining <= self.lead_seconds:
+            self._next_requested = True
+            self.on_need_next()
+
+        if (
+            upcoming is not None
+            and self.crossfade_frames
+            and remaining is not None
+            and remaining <= self.crossfade_frames * FRAME_SECONDS
+        ):
+            return self._read_crossfade(current, upcoming, remaining)
+
+        data = current.read()
+        if data:
+            return data
+
+        if upcoming is None:
+            return b''
+        self._switch(current, upcoming)
+        return upcoming.read()
+
+    def _read_crossfade(self, current: _Track, upcoming: _Track, remaining: float) -> bytes:
+        a = current.read()
+        b = upcoming.read()
+        if not a:
+            self._switch(current, upcoming)
+            return b
+        if not b:
+            return a
+
+        # Fade out lagu sekarang, fade in lagu berikutnya
+        progress = 1 - max(remaining, 0) / (self.crossfade_frames * FRAME_SECONDS)
+        size = max(len(a), len(b))
+        return mix(a.ljust(size, b'\0'), b.ljust(size, b'\0'), 1 - progress, progress)
+
+    def _switch(self, current: _Track, upcoming: _Track):
+        with self._lock:
+            self._current = upcoming
+            self._next = None
+            self._next_requested = False
+
+        # Kill FFmpeg lama di luar thread voice supaya tidak menunda frame
+        threading.Thread(target=current.cleanup, daemon=True).start()
+        logger.info(f"⏭️ Gapless → {upcoming.song.title[:40]}")
+        self.on_transition(upcoming.song)
+
+    def cleanup(self):
+        with self._lock:
+            tracks = [self._current, self._next]
+            self._next = None
+        for track in tracks:
+            if track:
+                track.cleanup()
@@ -0,0 +1,93 @@
+import logging
+import os
+
+import discord
+
+logger = logging.getLogger('MusicBot.Gateway')
+
+# ═══════════════════════════════════════════════════════════════
+# KONFIGURASI GATEWAY
+# ═══════════════════════════════════════════════════════════════
+
+# Mode hemat memory untuk node dengan ribuan server: intents minimal,
+# tanpa message cache, member di-cache hanya yang ada di voice
+LOW_MEMORY_MODE = os.environ.get('LOW_MEMORY_MODE', '0') == '1'
+
+# Field GUILD_CREATE / GUILD_UPDATE yang tidak pernah dibaca music cog
+UNUSED_GUILD_FIELDS = ('emojis', 'stickers', 'guild_scheduled_events', 'presences')
+TRIMMED_EVENTS = ('GUILD_CREATE', 'GUILD_UPDATE')
+
+# Versi discord.py (major.minor) yang parser internalnya sudah dicek untuk
+# trim_guild_payloads - sama dengan pin di requirements.txt
+TRIM_TESTED_VERSIONS = ('2.3',)
+
+
+def build_intents(low_memory: bool = LOW_MEMORY_MODE) -> discord.Intents:
+    if not low_memory:
+        intents = discord.Intents.default()
+        intents.message_content = True
+        intents.voice_states = True
+        return intents
+
+    # Cukup untuk: cache server & channel, voice state, dan command prefix
+    intents = discord.Intents.none()
+    intents.guilds = True
+    intents.voice_states = True
+    intents.guild_messages = True
+    intents.message_content = True
+    return intents
+
+
+def client_options(low_memory: bool = LOW_MEMORY_MODE) -> dict:
+    """Keyword argument cache/intents untuk commands.Bot / AutoShardedBot"""
+    options = {'intents': build_intents(low_memory)}
+    if low_memory:
+        member_cache_flags = discord.MemberCacheFlags.none()
+        # Idle reaper & resume membaca VoiceChannel.members
+        member_cache_flags.voice = True
+        options.update(
+            member_cache_flags=member_cache_flags,
+            chunk_guilds_at_startup=False,
+            max_messages=None,
+        )
+    return options
+
+
+def trim_guild_payloads(client: discord.Client) -> bool:
+    """
+    Buang emoji, sticker dll dari payload server sebelum di-parse discord.py.
+
+    Memakai ConnectionState.parsers (internal discord.py), jadi hanya aktif di
+    versi yang sudah dicek; versi lain cukup tanpa trim (MemberCacheFlags dan
+    chunk_guilds_at_startup tetap berlaku).
+    """
+    version = '.'.join(discord.__version__.split('.')[:2])
+    parsers = getattr(getattr(client, '_connection', None), 'parsers', None)
+    if (
+        version not in TRIM_TESTED_VERSIONS
+        or not isinstance(parsers, dict)
+        or not all(callable(parsers.get(event)) for event in TRIMMED_EVENTS)
+    ):
+        logger.warning(f"discord.py {discord.__version__}: trim payload server dilewati (parser internal berbeda)")
+        return False
+
+    def wrap(event: str):
+        parse = parsers[event]
+
+        def parse_trimmed(data):
+            for field in UNUSED_GUILD_FIELDS:
+                data.pop(field, None)
+            return parse(data)
+
+        parsers[event] = parse_trimmed
+
+    for event in TRIMMED_EVENTS:
+        wrap(event)
+    return True
+
+
+def setup_client(client: discord.Client, low_memory: bool = LOW_MEMORY_MODE):
+    """Dipanggil setelah bot dibuat dengan client_options()"""
+    if low_memory:
+        trim_guild_payloads(client)
+        logger.info("🪶 Low-memory gateway mode aktif")
@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import os
+import signal
+import time
+from typing import Awaitable, Callable, Dict, Iterable, Set
+
+from metrics import ffmpeg_pids
+
+logger = logging.getLogger('MusicBot.IdleReaper')
+
+# ═══════════════════════════════════════════════════════════════
+# KONFIGURASI IDLE REAPER
+# ═══════════════════════════════════════════════════════════════
+
+# Keluar dari voice kalau tidak ada yang diputar selama ini (detik)
+IDLE_TIMEOUT = float(os.environ.get('IDLE_TIMEOUT', '300'))
+
+# Keluar dari voice kalau tidak ada pendengar (selain bot) selama ini (detik)
+ALONE_TIMEOUT = float(os.environ.get('ALONE_TIMEOUT', '60'))
+
+# Player tanpa koneksi voice dibuang dari memory setelah ini (detik)
+PLAYER_EVICT_AFTER = float(os.environ.get('PLAYER_EVICT_AFTER', '600'))
+
+# Interval pengecekan (detik)
+IDLE_SWEEP_INTERVAL = float(os.environ.get('IDLE_SWEEP_INTERVAL', '15'))
+
+
+def source_pids(source) -> Set[int]:
+    """PID FFmpeg di balik AudioSource, termasuk yang dibungkus (FirstFrame, Gapless, volume)"""
+    pids = set()
+    stack = [source]
+    seen = set()
+    while stack:
+        current = stack.pop()
+        if current is None or id(current) in seen:
+            continue
+        seen.add(id(current))
+        proc = getattr(current, '_process', None)
+        if getattr(proc, 'pid', None):
+            pids.add(proc.pid)
+        for attr in ('source', 'original', '_current', '_next'):
+            stack.append(getattr(current, attr, None))
+    return pids
+
+
+def kill_processes(pids: Iterable[int]) -> int:
+    killed = 0
+    for pid in pids:
+        try:
+            os.kill(pid, signal.SIGKILL)
+            killed += 1
+        except OSError:
+            continue
+        try:
+            # Reap supaya tidak jadi zombie (Popen pemiliknya mungkin sudah hilang)
+            os.waitpid(pid, os.WNOHANG)
+        except OSError:
+            pass
+    return killed
+
+
+class IdleReaper:
+    """
+    Sapu berkala: putuskan voice yang idle / tanpa pendengar, buang player
+    yang tidak terhubung, dan bunuh FFmpeg yang tidak dimiliki source manapun.
+    """
+
+    def __init__(
+        self,
+        bot,
+        players: Dict[int, object],
+        release: Callable[[int, str], Awaitable[None]],
+        owned_pids: Callable[[], Set[int]],
+        idle_timeout: float = IDLE_TIMEOUT,
+        alone_timeout: float = ALONE_TIMEOUT,
+        evict_after: float = PLAYER_EVICT_AFTER,
+        interval: float = IDLE_SWEEP_INTERVAL
+    ):
+        self.bot = bot
+        self.players = players
+        self.release = release
+        self.owned_pids = owned_pids
+        self.idle_timeout = idle_timeout
+        self.alone_timeout = alone_timeout
+        self.evict_after = evict_after
+        self.interval = interval
+        self.killed = 0
+        self._active: Dict[int, float] = {}
+        self._alone: Dict[int, float] = {}
+        self._suspects: Set[int] = set()
+        self._task = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def touch(self, guild_id: int):
+        """Ada aktivitas (command / lagu mulai): reset timer idle"""
+        self._active[guild_id] = time.monotonic()
+
+    def forget(self, guild_id: int):
+        self._active.pop(guild_id, None)
+        self._alone.pop(guild_id, None)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error(f"Idle sweep error: {str(e)[:100]}")
+
+    async def sweep(self):
+        now = time.monotonic()
+        connected = set()
+
+        for voice_client in list(self.bot.voice_clients):
+            guild_id = voice_client.guild.id
+            connected.add(guild_id)
+            if voice_client.is_playing():
+                self._active[guild_id] = now
+
+            channel = voice_client.channel
+            if channel is not None and any(not member.bot for member in channel.members):
+                self._alone.pop(guild_id, None)
+            else:
+                self._alone.setdefault(guild_id, now)
+
+            if now - self._alone.get(guild_id, now) >= self.alone_timeout:
+                await self.release(guild_id, 'alone')
+                self.forget(guild_id)
+            elif not voice_client.is_playing() and now - self._active.setdefault(guild_id, now) >= self.idle_timeout:
+                await self.release(guild_id, 'idle')
+                self.forget(guild_id)
+
+        # Player tanpa voice (gagal connect, di-kick, sudah keluar)
+        for guild_id in list(self.players):
+            if guild_id in connected:
+                continue
+            if now - self._active.setdefault(guild_id, now) >= self.evict_after:
+                await self.release(guild_id, 'evict')
+                self.forget(guild_id)
+
+        self.reap_stray_ffmpeg()
+
+    def reap_stray_ffmpeg(self):
+        """Bunuh FFmpeg yang dua sweep berturut-turut tidak dimiliki source manapun"""
+        owned = self.owned_pids()
+        for voice_client in list(self.bot.voice_clients):
+            owned |= source_pids(voice_client.source)
+
+        stray = set(ffmpeg_pids()) - owned
+        # Yang baru muncul bisa saja source yang belum sempat di-play
+        confirmed = stray & self._suspects
+        self._suspects = stray - confirmed
+        if confirmed:
+            killed = kill_processes(confirmed)
+            self.killed += killed
+            logger.warning(f"🔪 Killed {killed} stray FFmpeg process")
@@ -1,24 +1,116 @@
-from flask import Flask
-from threading import Thread
+import json
+import logging
+import math
+import os
 
-app = Flask('')
+from aiohttp import web
 
-@app.route('/')
-def home():
-    return '''
+from metrics import METRICS
+from loop_monitor import LOOP_MONITOR
+from extraction import EXTRACTOR
+from extract_scheduler import SCHEDULER
+from title_index import TITLE_INDEX
+
+logger = logging.getLogger('MusicBot.Health')
+
+# Port web server (Replit / health check)
+HEALTH_PORT = int(os.environ.get('HEALTH_PORT', os.environ.get('PORT', '8080')))
+
+# Ready hanya kalau lag event loop di bawah ini (detik)
+READY_MAX_LOOP_LAG = float(os.environ.get('READY_MAX_LOOP_LAG', '0.5'))
+
+# Live selama lag event loop di bawah ini (detik)
+LIVE_MAX_LOOP_LAG = float(os.environ.get('LIVE_MAX_LOOP_LAG', '5'))
+
+PAGE = '''
     <html>
     <head><title>Music Bot</title></head>
     <body style="background:#1a1a2e;color:white;text-align:center;padding:50px;font-family:Arial;">
-        <h1>🎵 Music Bot Online!</h1>
-        <p>Status: ✅ Running</p>
+        <h1>🎵 Music Bot {title}</h1>
+        <p>Status: {status}</p>
     </body>
     </html>
     '''
 
-def run():
-    app.run(host='0.0.0.0', port=8080)
 
-def keep_alive():
-    t = Thread(target=run)
-    t.daemon = True
-    t.start()
+def readiness(bot) -> dict:
+    """Hasil semua cek readiness"""
+    latency = bot.latency
+    return {
+        'gateway': bot.is_ready() and not bot.is_closed() and math.isfinite(latency),
+        'event_loop': LOOP_MONITOR.max_lag < READY_MAX_LOOP_LAG,
+        'extraction': EXTRACTOR.healthy(),
+    }
+
+
+def stats(bot) -> dict:
+    """Ringkasan beban process ini (diagregasi supervisor cluster)"""
+    music = bot.get_cog('Music')
+    return {
+        'shards': sorted(bot.shards) if getattr(bot, 'shard_ids', None) else None,
+        'guilds': len(bot.guilds),
+        'voice_connections': len(bot.voice_clients),
+        'players': len(music.players) if music else 0,
+        'gateway_latency': bot.latency if math.isfinite(bot.latency) else None,
+        'loop_lag': round(LOOP_MONITOR.max_lag, 4),
+        'extraction': EXTRACTOR.stats(),
+        'scheduler': SCHEDULER.stats(),
+        'title_index': TITLE_INDEX.stats(),
+    }
+
+
+def create_app(bot) -> web.Application:
+    app = web.Application()
+
+    async def home(request):
+        ok = all(readiness(bot).values())
+        html = PAGE.format(
+            title='Online!' if ok else 'Degraded',
+            status='✅ Running' if ok else '⚠️ Not Ready'
+        )
+        return web.Response(text=html, content_type='text/html')
+
+    async def healthz(request):
+        # Handler ini jalan = event loop masih hidup
+        live = LOOP_MONITOR.max_lag < LIVE_MAX_LOOP_LAG
+        body = {'live': live, 'loop_lag': round(LOOP_MONITOR.max_lag, 4)}
+        return web.Response(text=json.dumps(body), status=200 if live else 503, content_type='application/json')
+
+    async def readyz(request):
+        checks = readiness(bot)
+        body = {
+            'ready': all(checks.values()),
+            'checks': checks,
+            'loop_lag': round(LOOP_MONITOR.max_lag, 4),
+            'gateway_latency': bot.latency if math.isfinite(bot.latency) else None,
+            'extraction': EXTRACTOR.stats(),
+        }
+        return web.Response(text=json.dumps(body), status=200 if body['ready'] else 503, content_type='application/json')
+
+    async def metrics(request):
+        return web.Response(
+            text=METRICS.render(),
+            headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+        )
+
+    async def stats_handler(request):
+        return web.Response(text=json.dumps(stats(bot)), content_type='application/json')
+
+    app.router.add_get('/', home)
+    app.router.add_get('/healthz', healthz)
+    app.router.add_get('/readyz', readyz)
+    app.router.add_get('/metrics', metrics)
+    app.router.add_get('/stats', stats_handler)
+    return app
+
+
+async def keep_alive(bot, port: int = HEALTH_PORT) -> web.AppRunner:
+    """Jalankan health server di event loop bot (tanpa thread tambahan)"""
+    LOOP_MONITOR.start()
+    METRICS.gauge('musicbot_event_loop_lag_seconds', 'Lag event loop terbesar di window terakhir', lambda: LOOP_MONITOR.max_lag)
+
+    runner = web.AppRunner(create_app(bot), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, '0.0.0.0', port).start()
+    logger.info(f"🌐 Health server on :{port}")
+    return runner
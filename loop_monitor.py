@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from profiling import capture_stack, log_event
+
+logger = logging.getLogger('MusicBot.LoopMonitor')
+
+# ═══════════════════════════════════════════════════════════════
+# KONFIGURASI LOOP MONITOR
+# ═══════════════════════════════════════════════════════════════
+
+# Interval pengukuran lag event loop (detik)
+LOOP_LAG_INTERVAL = float(os.environ.get('LOOP_LAG_INTERVAL', '0.25'))
+
+# Jumlah sampel terakhir untuk max lag (40 × 0.25 detik = 10 detik)
+LOOP_LAG_WINDOW = 40
+
+# Watchdog: log stack event loop kalau loop macet lebih lama dari ini (detik).
+# Di bawah ~1 detik, GC / startup / tick biasa ikut terlapor sebagai stall
+LOOP_STALL_THRESHOLD = float(os.environ.get('LOOP_STALL_THRESHOLD', '1.0'))
+LOOP_WATCHDOG = os.environ.get('LOOP_WATCHDOG', '1') == '1'
+
+
+class LoopLagMonitor:
+    """Ukur seberapa telat event loop menjalankan callback yang dijadwalkan"""
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, window: int = LOOP_LAG_WINDOW):
+        self.interval = interval
+        self.lag = 0.0
+        self._samples: deque = deque(maxlen=window)
+        self._task: Optional[asyncio.Task] = None
+        # Diupdate setiap tick, dibaca watchdog dari thread lain
+        self.heartbeat = time.monotonic()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread_id: Optional[int] = None
+        self.stalls = 0
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    @property
+    def max_lag(self) -> float:
+        """Lag terbesar di window terakhir"""
+        return max(self._samples, default=0.0)
+
+    def start(self, watchdog: bool = LOOP_WATCHDOG):
+        self.loop = asyncio.get_running_loop()
+        self.thread_id = threading.get_ident()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        if watchdog and self._watchdog is None:
+            self._stopped.clear()
+            self._watchdog = threading.Thread(target=self._watch, name='loop-watchdog', daemon=True)
+            self._watchdog.start()
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        self._stopped.set()
+        self._watchdog = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            scheduled = loop.time()
+            self.heartbeat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self.lag = max(loop.time() - scheduled - self.interval, 0.0)
+            self._samples.append(self.lag)
+
+    def _current_task_name(self) -> Optional[str]:
+        """Task yang frame coroutine-nya ada di stack thread loop sekarang (cukup untuk diagnosa)"""
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None or self.loop is None:
+            return None
+        on_stack = set()
+        while frame is not None:
+            on_stack.add(frame)
+            frame = frame.f_back
+        try:
+            tasks = asyncio.all_tasks(self.loop)
+        except RuntimeError:
+            # Set task berubah terus selagi dibaca dari thread ini
+            return None
+        for task in tasks:
+            coro = task.get_coro()
+            if getattr(coro, 'cr_frame', None) in on_stack:
+                return f"{task.get_name()} {getattr(coro, '__qualname__', coro)}"
+        return None
+
+    def _watch(self, threshold: float = LOOP_STALL_THRESHOLD):
+        """Thread watchdog: loop yang macet tidak bisa melaporkan dirinya sendiri"""
+        reported = None
+        while not self._stopped.wait(threshold / 2):
+            stalled_for = time.monotonic() - self.heartbeat - self.interval
+            if stalled_for < threshold:
+                reported = None
+                continue
+            if reported == self.heartbeat:
+                # Stall yang sama sudah dilaporkan
+                continue
+            reported = self.heartbeat
+            self.stalls += 1
+            log_event(
+                'loop_stall',
+                stalled_for=round(stalled_for, 3),
+                task=self._current_task_name(),
+                stack=capture_stack(self.thread_id)
+            )
+
+
+LOOP_MONITOR = LoopLagMonitor()
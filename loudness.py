@@ -0,0 +1,247 @@
+import asyncio
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+
+from audio_cache import AUDIO_CACHE, VIDEO_ID_RE
+from metrics import LOUDNESS_ANALYSES_TOTAL
+
+logger = logging.getLogger('MusicBot.Loudness')
+
+# ═══════════════════════════════════════════════════════════════
+# KONFIGURASI LOUDNESS
+# ═══════════════════════════════════════════════════════════════
+
+# Opt-in: analisis butuh membaca audio sekali lagi (dari audio cache kalau aktif)
+LOUDNESS_NORMALIZE = os.environ.get('LOUDNESS_NORMALIZE', '0') == '1'
+
+DATA_DIR = os.environ.get('DATA_DIR', 'data')
+
+# Kosongkan untuk menyimpan hasil analisis hanya di memory
+LOUDNESS_PATH = os.environ.get('LOUDNESS_PATH', os.path.join(DATA_DIR, 'loudness.db'))
+
+# Target integrated loudness (LUFS) dan batas gain (dB)
+LOUDNESS_TARGET = float(os.environ.get('LOUDNESS_TARGET', '-14'))
+LOUDNESS_MAX_BOOST = float(os.environ.get('LOUDNESS_MAX_BOOST', '8'))
+LOUDNESS_MAX_CUT = float(os.environ.get('LOUDNESS_MAX_CUT', '15'))
+
+# Boost tidak boleh membuat true peak melewati ini (dBTP)
+LOUDNESS_PEAK_CEILING = -1.0
+
+# Selisih di bawah ini tidak terdengar, tidak perlu filter
+LOUDNESS_MIN_GAIN = 0.5
+
+# Source Opus (passthrough, tanpa encode) hanya di-encode ulang demi gain sebesar ini
+LOUDNESS_REENCODE_MIN_GAIN = float(os.environ.get('LOUDNESS_REENCODE_MIN_GAIN', '3'))
+
+# Analisis jalan di background: sedikit process, prioritas CPU rendah
+LOUDNESS_ANALYZERS = int(os.environ.get('LOUDNESS_ANALYZERS', '1'))
+LOUDNESS_QUEUE_MAX = 200
+LOUDNESS_MAX_DURATION = int(os.environ.get('LOUDNESS_MAX_DURATION', '1200'))
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS loudness (
+    video_id TEXT PRIMARY KEY,
+    integrated REAL NOT NULL,
+    true_peak REAL,
+    measured REAL NOT NULL
+);
+'''
+
+INTEGRATED_RE = re.compile(r'I:\s+(-?[\d.]+|-inf) LUFS')
+PEAK_RE = re.compile(r'Peak:\s+(-?[\d.]+|-inf) dBFS')
+
+
+def parse_ebur128(stderr: str) -> Optional[Tuple[float, Optional[float]]]:
+    """(integrated LUFS, true peak dBFS) dari summary filter ebur128"""
+    # Summary ada di akhir output; nilai per-frame sebelumnya juga memakai "I:"
+    summary = stderr[stderr.rfind('Summary:'):] if 'Summary:' in stderr else stderr
+    integrated = INTEGRATED_RE.search(summary)
+    if not integrated or integrated.group(1) == '-inf':
+        return None
+    peak = PEAK_RE.search(summary)
+    true_peak = float(peak.group(1)) if peak and peak.group(1) != '-inf' else None
+    return float(integrated.group(1)), true_peak
+
+
+def _nice_prefix() -> List[str]:
+    # Prioritas diturunkan lewat `nice`, bukan preexec_fn (tidak aman di process multi-thread)
+    return ['nice', '-n', '19'] if shutil.which('nice') else []
+
+
+class LoudnessAnalyzer:
+    """
+    Ukur integrated loudness tiap lagu sekali (per video ID), simpan ke
+    SQLite, lalu Song.create_source cukup memakai gain tetap (filter volume)
+    alih-alih loudnorm realtime. Analisis jalan di background dengan
+    jumlah process dibatasi dan nice 19 supaya tidak mengganggu stream.
+    """
+
+    def __init__(self, path: str = LOUDNESS_PATH, analyzers: int = LOUDNESS_ANALYZERS, enabled: bool = LOUDNESS_NORMALIZE):
+        self.path = path
+        self.enabled = enabled
+        self._slots = asyncio.Semaphore(analyzers)
+        # Diisi load(); sebelum itu semua gain 0 dan belum ada analisis
+        self._values: Optional[Dict[str, Tuple[float, Optional[float]]]] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+        # Satu thread = satu koneksi SQLite, query tidak pernah di event loop
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='loudness-db')
+        self._db: Optional[sqlite3.Connection] = None
+        # PID ffmpeg analisis yang sedang jalan (bukan stray)
+        self.pids: Set[int] = set()
+        self.analyzed = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._db = sqlite3.connect(self.path, isolation_level=None)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+            self._db.executescript(SCHEMA)
+        return self._db
+
+    async def load(self):
+        """Baca hasil analisis tersimpan (dipanggil sekali saat cog load)"""
+        if not self.enabled or self._values is not None:
+            return
+        values = {}
+        if self.path:
+            try:
+                values = await asyncio.get_running_loop().run_in_executor(self._executor, self._read)
+            except sqlite3.Error as e:
+                logger.warning(f"Loudness cache error: {str(e)[:80]}")
+        self._values = values
+
+    def _read(self) -> Dict[str, Tuple[float, Optional[float]]]:
+        return {
+            video_id: (integrated, true_peak)
+            for video_id, integrated, true_peak in self._conn().execute(
+                'SELECT video_id, integrated, true_peak FROM loudness'
+            )
+        }
+
+    def gain(self, video_id: Optional[str]) -> float:
+        """Gain (dB) supaya lagu ini mendekati LOUDNESS_TARGET; 0 kalau belum dianalisis"""
+        if not self.enabled or not video_id:
+            return 0.0
+        measured = (self._values or {}).get(video_id)
+        if measured is None:
+            return 0.0
+        integrated, true_peak = measured
+        gain = LOUDNESS_TARGET - integrated
+        if gain > 0 and true_peak is not None:
+            # Boost tidak boleh membuat lagu clipping
+            gain = max(min(gain, LOUDNESS_PEAK_CEILING - true_peak), 0.0)
+        gain = max(min(gain, LOUDNESS_MAX_BOOST), -LOUDNESS_MAX_CUT)
+        return gain if abs(gain) >= LOUDNESS_MIN_GAIN else 0.0
+
+    def schedule(self, song):
+        """Analisis lagu ini di background kalau belum pernah"""
+        video_id = song.video_id
+        if (
+            not self.enabled
+            or self._values is None
+            or not video_id
+            or not VIDEO_ID_RE.match(video_id)
+            or not song.duration
+            or song.duration > LOUDNESS_MAX_DURATION
+            or video_id in self._tasks
+            or video_id in self._values
+        ):
+            return
+        if len(self._tasks) >= LOUDNESS_QUEUE_MAX:
+            # Akan dicoba lagi saat lagu ini diputar berikutnya
+            LOUDNESS_ANALYSES_TOTAL.inc(outcome='dropped')
+            return
+        if shutil.which('ffmpeg') is None:
+            logger.warning("⚠️ FFmpeg tidak ditemukan, normalisasi loudness dimatikan")
+            self.enabled = False
+            return
+
+        task = asyncio.create_task(self._analyze(video_id, song.stream_url))
+        self._tasks[video_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(video_id, None))
+
+    async def _analyze(self, video_id: str, stream_url: str):
+        async with self._slots:
+            # File audio cache (lokal) lebih murah daripada stream ulang dari YouTube
+            source = AUDIO_CACHE.path(video_id)
+            if source:
+                before = []
+            elif AUDIO_CACHE.enabled:
+                # Sedang / akan di-download cache: dianalisis dari file saat diputar lagi
+                return
+            elif stream_url:
+                source = stream_url
+                before = ['-reconnect', '1', '-reconnect_streamed', '1', '-reconnect_delay_max', '5']
+            else:
+                return
+
+            started = time.monotonic()
+            # `nice` exec ke ffmpeg: PID yang dicatat tetap PID ffmpeg
+            proc = await asyncio.create_subprocess_exec(
+                *_nice_prefix(), 'ffmpeg', '-nostdin', '-hide_banner', '-nostats', '-threads', '1',
+                *before, '-i', source,
+                '-vn', '-map', '0:a:0', '-af', 'ebur128=peak=true:framelog=quiet', '-f', 'null', '-',
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE
+            )
+            self.pids.add(proc.pid)
+            try:
+                _, stderr = await proc.communicate()
+            except asyncio.CancelledError:
+                proc.kill()
+                await proc.wait()
+                raise
+            finally:
+                self.pids.discard(proc.pid)
+
+            output = stderr.decode(errors='ignore')
+            result = parse_ebur128(output) if proc.returncode == 0 else None
+            if result is None:
+                LOUDNESS_ANALYSES_TOTAL.inc(outcome='failure')
+                logger.warning(f"Analisis loudness gagal ({video_id}): {output.strip()[-80:]}")
+                return
+
+            await self._store(video_id, *result)
+            self.analyzed += 1
+            LOUDNESS_ANALYSES_TOTAL.inc(outcome='success')
+            logger.info(
+                f"🔊 Loudness {video_id}: {result[0]:.1f} LUFS, gain {self.gain(video_id):+.1f} dB "
+                f"({time.monotonic() - started:.1f}s)"
+            )
+
+    async def _store(self, video_id: str, integrated: float, true_peak: Optional[float]):
+        self._values[video_id] = (integrated, true_peak)
+        if not self.path:
+            return
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self._write, video_id, integrated, true_peak)
+        except sqlite3.Error as e:
+            logger.warning(f"Loudness cache error: {str(e)[:80]}")
+
+    def _write(self, video_id: str, integrated: float, true_peak: Optional[float]):
+        self._conn().execute(
+            'INSERT OR REPLACE INTO loudness (video_id, integrated, true_peak, measured) VALUES (?, ?, ?, ?)',
+            (video_id, integrated, true_peak, time.time())
+        )
+
+    def _close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def stop(self):
+        for task in list(self._tasks.values()):
+            task.cancel()
+        self._executor.submit(self._close)
+
+
+# Dipakai bersama oleh semua server
+LOUDNESS = LoudnessAnalyzer()
@@ -1,57 +1,111 @@
 import discord
 from discord.ext import commands
 import os
+import io
 import asyncio
 import logging
+import threading
 
-# Setup logging untuk debug
+from cluster import CLUSTER_ID, Supervisor, is_supervisor, worker_shards
+from gateway import client_options, setup_client
+
+# Setup logging untuk debug (worker cluster diberi prefix id)
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s | %(levelname)s | %(message)s',
+    format='%(asctime)s | ' + (f'C{CLUSTER_ID} | ' if CLUSTER_ID is not None else '') + '%(levelname)s | %(message)s',
     datefmt='%H:%M:%S'
 )
 logger = logging.getLogger('MusicBot')
 
-# Keep alive untuk Replit
-from keep_alive import keep_alive
-
-# Intents
-intents = discord.Intents.default()
-intents.message_content = True
-intents.voice_states = True
-
-# Bot
-bot = commands.Bot(
-    command_prefix=['!', '?', '.'],
-    intents=intents,
-    help_command=None
-)
+# Keep alive untuk Replit + health check
+from keep_alive import keep_alive, HEALTH_PORT
+from loop_monitor import LOOP_MONITOR
+from profiling import SamplingProfiler
 
-@bot.event
-async def on_ready():
-    logger.info(f'✅ {bot.user.name} Online!')
-    logger.info(f'📡 Servers: {len(bot.guilds)}')
+def create_bot() -> commands.Bot:
+    """
+    Bot dibuat di main(), bukan saat import: supervisor cluster dan worker
+    extraction (multiprocessing spawn mengimpor ulang modul ini sebagai
+    __mp_main__) tidak perlu membangun bot lengkap.
+    """
+    # Intents & cache (LOW_MEMORY_MODE=1: intents minimal, tanpa message cache)
+    options = client_options()
     
-    await bot.change_presence(
-        activity=discord.Activity(
-            type=discord.ActivityType.listening,
-            name="!help | 🎵"
+    # Bot (worker cluster: AutoShardedBot dengan shard bagian process ini)
+    shards = worker_shards()
+    if shards:
+        bot = commands.AutoShardedBot(
+            command_prefix=['!', '?', '.'],
+            help_command=None,
+            shard_ids=shards[0],
+            shard_count=shards[1],
+            **options
         )
-    )
-
-@bot.event
-async def on_command_error(ctx, error):
-    if isinstance(error, commands.CommandNotFound):
-        return
-    logger.error(f'Command error: {error}')
-    await ctx.send(f"❌ Error: {str(error)[:100]}")
-
-@bot.command(name='ping')
-async def ping(ctx):
-    """Test bot response"""
-    await ctx.send(f'🏓 Pong! `{round(bot.latency * 1000)}ms`')
+    else:
+        bot = commands.Bot(
+            command_prefix=['!', '?', '.'],
+            help_command=None,
+            **options
+        )
+    setup_client(bot)
+    
+    @bot.event
+    async def on_ready():
+        logger.info(f'✅ {bot.user.name} Online!')
+        logger.info(f'📡 Servers: {len(bot.guilds)}')
+        if shards:
+            logger.info(f'🧩 Shards: {shards[0]} / {shards[1]}')
+        
+        await bot.change_presence(
+            activity=discord.Activity(
+                type=discord.ActivityType.listening,
+                name="!help | 🎵"
+            )
+        )
+    
+    @bot.event
+    async def on_command_error(ctx, error):
+        if isinstance(error, commands.CommandNotFound):
+            return
+        logger.error(f'Command error: {error}')
+        await ctx.send(f"❌ Error: {str(error)[:100]}")
+    
+    @bot.command(name='ping')
+    async def ping(ctx):
+        """Test bot response"""
+        await ctx.send(f'🏓 Pong! `{round(bot.latency * 1000)}ms`')
+    
+    @bot.command(name='profile')
+    @commands.is_owner()
+    async def profile(ctx, seconds: float = 10.0):
+        """Sampling profiler event loop (owner only)"""
+        seconds = min(max(seconds, 1.0), 60.0)
+        msg = await ctx.send(f'🔬 Profiling event loop `{seconds:.0f}s`...')
+        
+        profiler = SamplingProfiler(threading.get_ident())
+        await asyncio.get_running_loop().run_in_executor(None, profiler.run, seconds)
+        
+        top = '\n'.join(f'`{share:6.1%}` {name[:80]}' for name, share in profiler.top(10))
+        await msg.edit(content=(
+            f'🔬 **Profile** `{profiler.samples}` samples, '
+            f'loop lag max `{LOOP_MONITOR.max_lag * 1000:.0f}ms`, stalls `{LOOP_MONITOR.stalls}`\n{top}'
+        ))
+        await ctx.send(file=discord.File(
+            io.BytesIO(profiler.collapsed().encode()),
+            filename='profile.collapsed.txt'
+        ))
+    
+    @bot.command(name='sync')
+    @commands.is_owner()
+    async def sync(ctx):
+        """Daftarkan slash command (/play) ke Discord (owner only)"""
+        # Global sync di-rate limit Discord: jalankan manual setelah slash command berubah
+        synced = await bot.tree.sync()
+        await ctx.send(f'🔄 `{len(synced)}` slash command tersinkron: ' + ', '.join(f'`/{c.name}`' for c in synced))
+    
+    return bot
 
-async def load_extensions():
+async def load_extensions(bot: commands.Bot):
     try:
         await bot.load_extension('music_cog')
         logger.info('✅ Music Cog loaded!')
@@ -59,16 +113,26 @@ async def load_extensions():
         logger.error(f'❌ Failed to load Music Cog: {e}')
 
 async def main():
+    token = os.environ.get('DISCORD_TOKEN')
+    if not token:
+        logger.error('❌ DISCORD_TOKEN not found!')
+        return
+    
+    # CLUSTER_PROCESSES > 0: process ini hanya supervisor, bot jalan di worker
+    if is_supervisor():
+        await Supervisor(token).run(HEALTH_PORT)
+        return
+    
+    bot = create_bot()
     async with bot:
-        await load_extensions()
-        keep_alive()
-        
-        token = os.environ.get('DISCORD_TOKEN')
-        if not token:
-            logger.error('❌ DISCORD_TOKEN not found!')
-            return
+        await load_extensions(bot)
         
-        await bot.start(token)
+        # Health server jalan di event loop yang sama dengan bot
+        runner = await keep_alive(bot)
+        try:
+            await bot.start(token)
+        finally:
+            await runner.cleanup()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,203 @@
+import logging
+import math
+import os
+import threading
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple, Union
+
+logger = logging.getLogger('MusicBot.Metrics')
+
+# ═══════════════════════════════════════════════════════════════
+# METRICS (format teks Prometheus, tanpa dependency tambahan)
+# ═══════════════════════════════════════════════════════════════
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 13, 20, 30, 60)
+
+GaugeValue = Union[float, Iterable[Tuple[Dict[str, str], float]]]
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+def _format_value(value: float) -> str:
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels[name]) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # key → [count per bucket..., sum, count]
+        self._values: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[name]) for name in self.labels)
+        with self._lock:
+            state = self._values.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(key, list(state)) for key, state in self._values.items()]
+        for key, state in items:
+            for bound, count in zip(self.buckets, state):
+                labels = _format_labels(self.labels + ('le',), key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.labels + ('le',), key + ('+Inf',))
+            lines.append(f"{self.name}_bucket{labels} {state[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {state[-1]}")
+        return lines
+
+
+class Gauge:
+    """Nilai dihitung saat scrape lewat callback"""
+
+    def __init__(self, name: str, help_text: str, fn: Callable[[], GaugeValue]):
+        self.name = name
+        self.help = help_text
+        self.fn = fn
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        try:
+            value = self.fn()
+        except Exception as e:
+            logger.warning(f"Gauge {self.name} error: {str(e)[:50]}")
+            return lines
+        if isinstance(value, (int, float)):
+            lines.append(f"{self.name} {_format_value(value)}")
+        else:
+            for labels, sample in value:
+                lines.append(f"{self.name}{_format_labels(tuple(labels), tuple(labels.values()))} {_format_value(sample)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        return self._metrics.setdefault(name, Counter(name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._metrics.setdefault(name, Histogram(name, help_text, labels, buckets))
+
+    def gauge(self, name: str, help_text: str, fn: Callable[[], GaugeValue]) -> Gauge:
+        """Daftarkan (atau ganti) gauge callback"""
+        self._metrics[name] = Gauge(name, help_text, fn)
+        return self._metrics[name]
+
+    def unregister(self, name: str):
+        self._metrics.pop(name, None)
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+def ffmpeg_pids() -> List[int]:
+    """PID child process ffmpeg milik bot (Linux /proc)"""
+    me = os.getpid()
+    found = []
+    try:
+        pids = [p for p in os.listdir('/proc') if p.isdigit()]
+    except OSError:
+        return found
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/stat') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # Format: pid (comm) state ppid ...
+        comm = stat[stat.find('(') + 1:stat.rfind(')')]
+        ppid = int(stat[stat.rfind(')') + 2:].split()[1])
+        if ppid == me and comm.startswith('ffmpeg'):
+            found.append(int(pid))
+    return found
+
+
+def count_ffmpeg_processes() -> int:
+    """Jumlah child process ffmpeg milik bot"""
+    return len(ffmpeg_pids())
+
+
+METRICS = Registry()
+
+EXTRACTION_SECONDS = METRICS.histogram(
+    'musicbot_extraction_seconds',
+    'Durasi extraction yt-dlp per method YTDLSource',
+    ('method', 'outcome')
+)
+EXTRACTIONS_TOTAL = METRICS.counter(
+    'musicbot_extractions_total',
+    'Jumlah extraction per method dan hasil',
+    ('method', 'outcome')
+)
+FIRST_AUDIO_SECONDS = METRICS.histogram(
+    'musicbot_time_to_first_audio_seconds',
+    'Waktu dari play_next dipanggil sampai audio mulai diputar'
+)
+IDLE_RELEASES_TOTAL = METRICS.counter(
+    'musicbot_idle_releases_total',
+    'Player yang dilepas idle reaper (disconnect / evict)',
+    ('reason',)
+)
+STATUS_UPDATES_TOTAL = METRICS.counter(
+    'musicbot_status_updates_total',
+    'Update pesan now playing (sent / edited / coalesced / rate_limited / failed)',
+    ('result',)
+)
+EXTRACTION_THROTTLED_TOTAL = METRICS.counter(
+    'musicbot_extraction_throttled_total',
+    'Extraction yang ditolak YouTube karena rate limit (429 / sign in to confirm)'
+)
+LOUDNESS_ANALYSES_TOTAL = METRICS.counter(
+    'musicbot_loudness_analyses_total',
+    'Analisis loudness di background (success / failure / dropped)',
+    ('outcome',)
+)
@@ -1,169 +1,57 @@
 import discord
+from discord import app_commands
 from discord.ext import commands
 import asyncio
 import re
 import os
 import logging
-import subprocess
-import sys
-from collections import deque
-from typing import Optional, Dict, Any
+import sqlite3
+import time
+import threading
+import concurrent.futures
+from typing import Optional, Dict, List
 import urllib.parse
 
-logger = logging.getLogger('MusicBot.Music')
-
-# ═══════════════════════════════════════════════════════════════
-# AUTO UPDATE YT-DLP SAAT STARTUP
-# ═══════════════════════════════════════════════════════════════
-
-def update_ytdlp():
-    """Update yt-dlp ke versi terbaru"""
-    try:
-        logger.info("🔄 Updating yt-dlp...")
-        subprocess.check_call([
-            sys.executable, "-m", "pip", "install",
-            "--upgrade", "--force-reinstall", "yt-dlp", "-q"
-        ])
-        logger.info("✅ yt-dlp updated successfully!")
-        return True
-    except Exception as e:
-        logger.error(f"❌ Failed to update yt-dlp: {e}")
-        return False
-
-# Update saat import
-update_ytdlp()
-
-# Import setelah update
-import yt_dlp
-
-# ═══════════════════════════════════════════════════════════════
-# KONFIGURASI - SANGAT PENTING UNTUK BYPASS YOUTUBE BLOCKS
-# ═══════════════════════════════════════════════════════════════
-
-class YTDLSource:
-    """YouTube Downloader dengan multiple fallback"""
-    
-    # User agents yang berbeda
-    USER_AGENTS = [
-        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
-        'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
-        'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
-    ]
-    
-    # Base options
-    BASE_OPTS = {
-        'format': 'bestaudio/best',
-        'noplaylist': True,
-        'nocheckcertificate': True,
-        'ignoreerrors': True,
-        'no_warnings': True,
-        'quiet': True,
-        'extract_flat': False,
-        'force_ipv4': True,
-        'geo_bypass': True,
-        'geo_bypass_country': 'US',
-        'socket_timeout': 30,
-        'retries': 10,
-        'fragment_retries': 10,
-        'skip_unavailable_fragments': True,
-        'source_address': '0.0.0.0',
-    }
-    
-    @classmethod
-    def get_options(cls, method: int = 0) -> dict:
-        """Get YT-DLP options dengan berbagai method"""
-        opts = cls.BASE_OPTS.copy()
-        
-        # Rotate user agent
-        opts['http_headers'] = {
-            'User-Agent': cls.USER_AGENTS[method % len(cls.USER_AGENTS)],
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-        }
-        
-        # Different extractor configurations
-        if method == 0:
-            # Method 1: Android client (most reliable)
-            opts['extractor_args'] = {
-                'youtube': {
-                    'player_client': ['android_music', 'android', 'web'],
-                    'player_skip': ['webpage', 'configs'],
-                }
-            }
-        elif method == 1:
-            # Method 2: iOS client
-            opts['extractor_args'] = {
-                'youtube': {
-                    'player_client': ['ios', 'android'],
-                    'player_skip': ['webpage'],
-                }
-            }
-        elif method == 2:
-            # Method 3: TV embedded
-            opts['extractor_args'] = {
-                'youtube': {
-                    'player_client': ['tv_embedded', 'android'],
-                }
-            }
-        elif method == 3:
-            # Method 4: Web client dengan oauth
-            opts['extractor_args'] = {
-                'youtube': {
-                    'player_client': ['web', 'android_music'],
-                }
-            }
-        else:
-            # Method 5: Mweb client
-            opts['extractor_args'] = {
-                'youtube': {
-                    'player_client': ['mweb', 'android'],
-                }
-            }
-        
-        return opts
+from ytdlp_updater import UPDATER
+from profiling import PhaseTimer, FirstFrameSource
+from metrics import (
+    METRICS, EXTRACTION_SECONDS, EXTRACTIONS_TOTAL, FIRST_AUDIO_SECONDS,
+    IDLE_RELEASES_TOTAL, count_ffmpeg_processes
+)
+from prefetch import StreamPrefetcher
+from song import Song, DEFAULT_BITRATE, MAX_BITRATE
+from song_queue import SongQueue, QUEUE_DEDUP, QUEUE_PAGE_SIZE, RESET
+from audio_cache import AUDIO_CACHE
+from loudness import LOUDNESS
+from search_cache import SEARCH_CACHE, normalize_query, watch_url
+from title_index import TITLE_INDEX
+from gapless import GaplessSource, GAPLESS_ENABLED, CROSSFADE_SECONDS
+from queue_store import QUEUE_STORE, PlayerState, StoredRequester
+from idle_reaper import IdleReaper
+from status_message import NowPlayingMessage
+from extraction import (
+    EXTRACTOR, METHOD_STATS, EXTRACT_HEDGED, VideoUnavailable,
+    INFLIGHT, UNAVAILABLE, iter_playlist
+)
+from extract_scheduler import (
+    SCHEDULER, PRIORITY_INTERACTIVE, PRIORITY_REFRESH, PRIORITY_TEST, PRIORITY_NAMES, is_throttled
+)
 
-
-# FFMPEG Options
-FFMPEG_OPTS = {
-    'before_options': '-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5 -nostdin',
-    'options': '-vn -b:a 192k'
-}
-
-
-class Song:
-    """Representasi sebuah lagu"""
-    def __init__(self, data: dict, requester):
-        self.data = data
-        self.requester = requester
-        self.title = data.get('title', 'Unknown Title')
-        self.url = data.get('webpage_url') or data.get('original_url') or data.get('url', '')
-        self.stream_url = data.get('url', '')
-        self.thumbnail = data.get('thumbnail', '')
-        self.duration = data.get('duration', 0)
-        self.uploader = data.get('uploader') or data.get('channel', 'Unknown')
-    
-    @property
-    def duration_str(self) -> str:
-        if not self.duration:
-            return "🔴 LIVE"
-        m, s = divmod(int(self.duration), 60)
-        h, m = divmod(m, 60)
-        return f"{h}:{m:02d}:{s:02d}" if h else f"{m}:{s:02d}"
-    
-    def create_source(self) -> discord.FFmpegOpusAudio:
-        return discord.FFmpegOpusAudio(self.stream_url, **FFMPEG_OPTS)
+logger = logging.getLogger('MusicBot.Music')
 
 
 class GuildMusicPlayer:
     """Player untuk setiap server"""
-    def __init__(self):
-        self.queue: deque = deque()
+    def __init__(self, guild_id: int):
+        self.guild_id = guild_id
+        self.queue: SongQueue = SongQueue()
         self.current: Optional[Song] = None
         self.loop: bool = False
         self.loop_queue: bool = False
         self.text_channel = None
+        self.prefetcher: Optional[StreamPrefetcher] = None
+        self.engine: Optional[GaplessSource] = None
+        self.status = NowPlayingMessage()
 
 
 class Music(commands.Cog):
@@ -172,22 +60,244 @@ class Music(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.players: Dict[int, GuildMusicPlayer] = {}
+        # State tersimpan dari process sebelumnya, di-restore saat dibutuhkan
+        self.saved_states: Dict[int, PlayerState] = {}
+        self.reaper = IdleReaper(bot, self.players, self._release, lambda: AUDIO_CACHE.pids | LOUDNESS.pids)
         logger.info("🎵 Music Cog initialized")
     
     def get_player(self, guild_id: int) -> GuildMusicPlayer:
-        if guild_id not in self.players:
-            self.players[guild_id] = GuildMusicPlayer()
+        if guild_id in self.players:
+            # Player yang sudah jalan lebih baru dari state tersimpan manapun
+            self.saved_states.pop(guild_id, None)
+        else:
+            player = GuildMusicPlayer(guild_id)
+            player.prefetcher = StreamPrefetcher(
+                player, lambda query, priority: self.extract_info(query, guild_id, priority)
+            )
+            self.players[guild_id] = player
+            state = self.saved_states.pop(guild_id, None)
+            if state:
+                self._restore_player(player, state)
+            if QUEUE_STORE.enabled:
+                # Perubahan queue dicatat, QueueStore hanya menulis baris yang berubah
+                player.queue.journal = []
         return self.players[guild_id]
     
+    async def cog_load(self):
+        self._register_metrics()
+        self.saved_states = await QUEUE_STORE.load()
+        QUEUE_STORE.start(self._snapshot)
+        self.reaper.start()
+        await TITLE_INDEX.load()
+        await LOUDNESS.load()
+        if self.saved_states:
+            logger.info(f"💾 {len(self.saved_states)} queue tersimpan menunggu resume")
+            asyncio.create_task(self._resume_saved())
+        # yt-dlp di-update di background, cog langsung siap pakai
+        await UPDATER.start(EXTRACTOR.swap)
+    
+    async def cog_unload(self):
+        UPDATER.stop()
+        self.reaper.stop()
+        SCHEDULER.stop()
+        await QUEUE_STORE.close()
+        for name in self.GAUGES:
+            METRICS.unregister(name)
+        for player in self.players.values():
+            player.prefetcher.stop()
+            player.status.close()
+        EXTRACTOR.shutdown()
+        AUDIO_CACHE.stop()
+        LOUDNESS.stop()
+        SEARCH_CACHE.close()
+    
+    GAUGES = (
+        'musicbot_players',
+        'musicbot_queue_depth',
+        'musicbot_ffmpeg_processes',
+        'musicbot_extraction_queue_length',
+        'musicbot_extractions_running',
+        'musicbot_extraction_scheduler_waiting',
+        'musicbot_gateway_latency_seconds',
+    )
+    
+    def _register_metrics(self):
+        """Gauge yang nilainya diambil saat /metrics di-scrape"""
+        METRICS.gauge('musicbot_players', 'GuildMusicPlayer di memory', lambda: len(self.players))
+        METRICS.gauge(
+            'musicbot_queue_depth', 'Jumlah lagu di queue per server',
+            lambda: [({'guild': str(gid)}, len(p.queue)) for gid, p in list(self.players.items())]
+        )
+        METRICS.gauge('musicbot_ffmpeg_processes', 'Process FFmpeg yang sedang hidup', count_ffmpeg_processes)
+        METRICS.gauge('musicbot_extraction_queue_length', 'Extraction yang menunggu slot', lambda: EXTRACTOR.queued)
+        METRICS.gauge('musicbot_extractions_running', 'Extraction yang sedang jalan', lambda: EXTRACTOR.running)
+        METRICS.gauge(
+            'musicbot_extraction_scheduler_waiting', 'Extraction yang menunggu giliran scheduler',
+            lambda: [({'priority': name}, SCHEDULER.waiting(p)) for p, name in enumerate(PRIORITY_NAMES)]
+        )
+        METRICS.gauge('musicbot_gateway_latency_seconds', 'Latency gateway Discord', lambda: self.bot.latency)
+    
+    # ═══════════════════════════════════════════════════════════
+    # PERSISTENSI QUEUE
+    # ═══════════════════════════════════════════════════════════
+    
+    def _snapshot(self, guild_id: int, full: bool = False) -> Optional[PlayerState]:
+        """State ringkas player untuk disimpan QUEUE_STORE (full=False: perubahan queue saja)"""
+        player = self.players.get(guild_id)
+        if player is None:
+            # Player sudah di-evict tapi queue-nya menunggu resume
+            return self.saved_states.get(guild_id)
+        
+        current = player.current
+        changes = player.queue.journal
+        if changes is not None:
+            player.queue.journal = []
+        if full or changes is None or RESET in changes:
+            changes = None
+            queue = [
+                (song.queue_key, song.video_id, getattr(song.requester, 'id', None))
+                for song in player.queue if song.video_id
+            ]
+        else:
+            queue = []
+        
+        guild = self.bot.get_guild(guild_id)
+        voice_client = guild.voice_client if guild else None
+        return PlayerState(
+            guild_id,
+            voice_channel_id=voice_client.channel.id if voice_client and voice_client.channel else None,
+            text_channel_id=player.text_channel.id if player.text_channel else None,
+            loop=player.loop,
+            loop_queue=player.loop_queue,
+            current=(current.video_id, getattr(current.requester, 'id', None)) if current and current.video_id else None,
+            queue=queue,
+            changes=changes,
+            size=len(player.queue)
+        )
+    
+    def _restore_player(self, player: GuildMusicPlayer, state: PlayerState):
+        """Isi player dari state tersimpan; stream URL di-resolve nanti oleh prefetcher"""
+        guild = self.bot.get_guild(player.guild_id)
+        entries = ([state.current] if state.current else []) + [row[1:] for row in state.queue]
+        songs = []
+        for video_id, requester_id in entries:
+            requester = guild.get_member(requester_id) if guild and requester_id else None
+            songs.append(Song(
+                {'id': video_id, 'title': video_id, 'webpage_url': watch_url(video_id)},
+                requester or StoredRequester(requester_id or 0)
+            ))
+        player.queue.extend(songs)
+        # Judul dll. dari search cache menyusul (SQLite tidak dibaca di event loop)
+        asyncio.create_task(self._fill_metadata(songs))
+        player.loop = state.loop
+        player.loop_queue = state.loop_queue
+        if state.text_channel_id:
+            player.text_channel = self.bot.get_channel(state.text_channel_id)
+        # Lagu sekarang kembali masuk queue dengan key baru: baris lama ditulis ulang
+        QUEUE_STORE.mark(player.guild_id, full=True)
+        logger.info(f"💾 Queue restored: {len(entries)} lagu (guild {player.guild_id})")
+    
+    async def _fill_metadata(self, songs: List[Song]):
+        """Metadata tersimpan untuk lagu hasil restore yang belum di-resolve"""
+        try:
+            found = await SEARCH_CACHE.metadata({song.video_id for song in songs})
+        except sqlite3.Error as e:
+            logger.warning(f"Search cache error: {str(e)[:50]}")
+            return
+        for song in songs:
+            data = found.get(song.video_id)
+            # Lagu yang sudah di-resolve prefetcher sudah punya metadata lengkap
+            if data and not song.stream_url:
+                song.update(data)
+    
+    async def _resume_saved(self):
+        """Setelah login: resume server yang voice channel-nya masih ada pendengar"""
+        await self.bot.wait_until_ready()
+        for guild_id in list(self.saved_states):
+            guild = self.bot.get_guild(guild_id)
+            if guild:
+                await self._try_resume(guild)
+    
+    async def _try_resume(self, guild):
+        if guild.id in self.players:
+            # Sudah dipakai lagi sejak state disimpan: jangan timpa queue / pindah channel
+            self.saved_states.pop(guild.id, None)
+            return
+        state = self.saved_states.get(guild.id)
+        if state is None or not state.voice_channel_id:
+            return
+        channel = guild.get_channel(state.voice_channel_id)
+        if channel is None or not any(not member.bot for member in channel.members):
+            # Belum ada pendengar: tunggu on_voice_state_update
+            return
+        
+        player = self.get_player(guild.id)
+        try:
+            if not guild.voice_client:
+                await channel.connect(self_deaf=True)
+            logger.info(f"▶️ Resume queue di {channel.name}")
+            if not guild.voice_client.is_playing() and not player.current:
+                await self.play_next(guild)
+        except Exception as e:
+            logger.error(f"Resume gagal: {str(e)[:100]}")
+    
+    async def _release(self, guild_id: int, reason: str):
+        """Dipanggil idle reaper: keluar dari voice dan buang player dari memory"""
+        guild = self.bot.get_guild(guild_id)
+        player = self.players.get(guild_id)
+        
+        # Tanpa pendengar tapi queue masih ada: simpan untuk di-resume saat ada yang join
+        state = self._snapshot(guild_id, full=True) if reason != 'idle' else None
+        if state is not None and not state.empty and state.voice_channel_id:
+            self.saved_states[guild_id] = state
+        
+        self.players.pop(guild_id, None)
+        if player:
+            player.prefetcher.stop()
+            player.status.close()
+            player.engine = None
+        
+        if guild and guild.voice_client:
+            logger.info(f"💤 Keluar dari voice ({reason}): {guild.name}")
+            try:
+                await guild.voice_client.disconnect(force=True)
+            except Exception as e:
+                logger.warning(f"Disconnect gagal: {str(e)[:50]}")
+            if player and player.text_channel and reason != 'evict':
+                try:
+                    await player.text_channel.send(
+                        "💤 **Tidak ada pendengar, keluar dari voice.**" if reason == 'alone'
+                        else "💤 **Tidak ada aktivitas, keluar dari voice.**"
+                    )
+                except:
+                    pass
+        
+        IDLE_RELEASES_TOTAL.inc(reason=reason)
+        QUEUE_STORE.mark(guild_id)
+    
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member, before, after):
+        # Pendengar masuk ke channel yang queue-nya tersimpan
+        if member.bot or after.channel is None or not self.saved_states:
+            return
+        state = self.saved_states.get(member.guild.id)
+        if state and after.channel.id == state.voice_channel_id:
+            await self._try_resume(member.guild)
+    
     # ═══════════════════════════════════════════════════════════
     # CORE: YouTube Search dengan Multiple Methods
     # ═══════════════════════════════════════════════════════════
     
-    async def extract_info(self, query: str) -> Optional[dict]:
+    async def extract_info(
+        self,
+        query: str,
+        guild_id: Optional[int] = None,
+        priority: int = PRIORITY_INTERACTIVE
+    ) -> Optional[dict]:
         """
         Extract info dari YouTube dengan multiple fallback methods
         """
-        loop = asyncio.get_event_loop()
+        timer = PhaseTimer('extract_info')
         
         # Normalize query
         query = query.strip()
@@ -196,88 +306,219 @@ class Music(commands.Cog):
         is_url = bool(re.match(r'https?://', query))
         
         # Jika bukan URL, tambahkan ytsearch
+        cached = None
+        video_id = None
         if not is_url:
-            search_query = f"ytsearch:{query}"
+            # Query yang sama pernah dicari: langsung ke watch URL, skip ytsearch
+            try:
+                cached = await SEARCH_CACHE.lookup(query)
+            except sqlite3.Error as e:
+                # Cache rusak/terkunci: anggap miss, search biasa
+                logger.warning(f"Search cache error: {str(e)[:50]}")
+            if cached:
+                logger.info(f"📦 Search cache hit: {cached['id']}")
+                video_id = cached['id']
+                search_query = watch_url(video_id)
+            else:
+                search_query = f"ytsearch:{query}"
         else:
             search_query = query
             # Extract video ID jika YouTube URL
             video_id = self._extract_video_id(query)
             if video_id:
                 # Gunakan format URL yang paling reliable
-                search_query = f"https://www.youtube.com/watch?v={video_id}"
+                search_query = watch_url(video_id)
         
+        # Key yang sama untuk semua server yang minta video/query yang sama
+        key = f"v:{video_id}" if video_id else f"q:{normalize_query(search_query)}"
+        
+        timer.context['key'] = key
+        timer.mark('lookup')
+        
+        reason = UNAVAILABLE.get(key)
+        if reason:
+            logger.info(f"⛔ Skip (diketahui tidak tersedia): {reason}")
+            timer.done(ok=False, unavailable=True)
+            return None
+        
+        data = await INFLIGHT.run(
+            key,
+            lambda: self._resolve(search_query, None if is_url else query, key, cached is not None, guild_id, priority),
+            priority,
+            guild_id
+        )
+        timer.mark('extract')
+        timer.done(ok=bool(data), cache_hit=cached is not None)
+        
+        # Tiap caller dapat copy sendiri
+        return dict(data) if data else None
+    
+    async def _resolve(
+        self,
+        search_query: str,
+        text_query: Optional[str],
+        key: str,
+        from_cache: bool,
+        guild_id: Optional[int],
+        priority: int
+    ) -> Optional[dict]:
+        """Satu extraction untuk satu key (dibagi ke semua caller yang menunggu)"""
         logger.info(f"🔍 Searching: {search_query[:50]}...")
         
-        # Coba berbagai method
-        last_error = None
-        for method in range(5):
-            try:
-                logger.info(f"  → Trying method {method + 1}/5...")
-                
-                opts = YTDLSource.get_options(method)
-                ytdl = yt_dlp.YoutubeDL(opts)
+        # Urutan method mengikuti performa terakhir (adaptive)
+        order = METHOD_STATS.order()
+        
+        try:
+            if EXTRACT_HEDGED:
+                data = await self._extract_hedged(search_query, order, guild_id, priority, key)
+            else:
+                data = await self._extract_sequential(search_query, order, guild_id, priority, key)
+        except VideoUnavailable as e:
+            logger.error(f"  ❌ {e}")
+            UNAVAILABLE.add(key, str(e))
+            if from_cache:
+                try:
+                    await SEARCH_CACHE.forget(text_query)
+                except sqlite3.Error as e:
+                    logger.warning(f"Search cache error: {str(e)[:50]}")
+            return None
+        
+        if not data:
+            logger.error("❌ All methods failed")
+            return None
+        
+        # Tulis cache di belakang: hasilnya tidak dibutuhkan untuk memutar lagu
+        asyncio.create_task(self._store_search(text_query, dict(data)))
+        TITLE_INDEX.add(data.get('id'), data.get('title'), data.get('uploader') or data.get('channel'))
+        return data
+    
+    async def _store_search(self, query: Optional[str], data: dict):
+        try:
+            await SEARCH_CACHE.store(query, data)
+        except Exception as e:
+            logger.warning(f"Search cache error: {str(e)[:50]}")
+    
+    async def _extract_sequential(self, search_query: str, order: list, guild_id: Optional[int], priority: int, key: Optional[str] = None) -> Optional[dict]:
+        """Coba method satu per satu"""
+        for method in order:
+            data = await self._extract_with_method(search_query, method, guild_id, priority, key)
+            if data:
+                return data
+            
+            # Wait sebelum retry
+            await asyncio.sleep(0.5)
+        return None
+    
+    async def _extract_hedged(self, search_query: str, order: list, guild_id: Optional[int], priority: int, key: Optional[str] = None) -> Optional[dict]:
+        """
+        Jalankan method berikutnya secara paralel kalau method sebelumnya
+        melewati latency budget atau gagal. Hasil valid pertama dipakai.
+        """
+        remaining = list(order)
+        pending: Dict[asyncio.Task, int] = {}
+        launch_next = True
+        
+        try:
+            while remaining or pending:
+                if launch_next and remaining:
+                    method = remaining.pop(0)
+                    running = asyncio.Event()
+                    task = asyncio.create_task(
+                        self._extract_with_method(search_query, method, guild_id, priority, key, running)
+                    )
+                    pending[task] = method
+                    launch_next = False
                 
-                # Extract info
-                data = await loop.run_in_executor(
-                    None,
-                    lambda: ytdl.extract_info(search_query, download=False)
+                waiting = set(pending)
+                started = None
+                if remaining and not running.is_set():
+                    # Masih antri di scheduler / slot backend: budget belum berjalan
+                    started = asyncio.ensure_future(running.wait())
+                    waiting.add(started)
+                # Budget dihitung dari saat method terakhir benar-benar jalan
+                timeout = METHOD_STATS.budget(method) if remaining and started is None else None
+                done, _ = await asyncio.wait(
+                    waiting,
+                    timeout=timeout,
+                    return_when=asyncio.FIRST_COMPLETED
                 )
-                
-                if not data:
-                    logger.warning(f"  → Method {method + 1}: No data returned")
-                    continue
-                
-                # Handle search results / playlist
-                if 'entries' in data:
-                    entries = [e for e in data['entries'] if e is not None]
-                    if not entries:
-                        logger.warning(f"  → Method {method + 1}: Empty entries")
+                if started is not None:
+                    started.cancel()
+                    done.discard(started)
+                    if not done:
                         continue
-                    data = entries[0]
                 
-                # Validasi: harus ada URL stream
-                stream_url = data.get('url')
-                if not stream_url:
-                    # Coba ambil dari formats
-                    formats = data.get('formats', [])
-                    for f in formats:
-                        if f.get('acodec') != 'none' and f.get('url'):
-                            data['url'] = f['url']
-                            stream_url = f['url']
-                            break
-                
-                if not stream_url:
-                    logger.warning(f"  → Method {method + 1}: No stream URL")
+                if not done:
+                    if SCHEDULER.paused:
+                        # Sedang throttling: jangan tambah request, tunggu yang sudah jalan
+                        continue
+                    logger.info(f"  → Method {method + 1} lambat, hedge ke method berikutnya")
+                    launch_next = True
                     continue
                 
-                logger.info(f"  ✅ Method {method + 1} SUCCESS: {data.get('title', 'Unknown')[:40]}")
-                return data
-                
-            except yt_dlp.utils.DownloadError as e:
-                error_str = str(e).lower()
-                last_error = str(e)
-                
-                if 'private' in error_str:
-                    logger.error("  ❌ Video is private")
-                    return None
-                elif 'removed' in error_str or 'deleted' in error_str:
-                    logger.error("  ❌ Video was removed")
-                    return None
-                elif 'copyright' in error_str:
-                    logger.error("  ❌ Video blocked due to copyright")
-                    return None
-                else:
-                    logger.warning(f"  → Method {method + 1} failed: {str(e)[:50]}")
-                
-            except Exception as e:
-                last_error = str(e)
-                logger.warning(f"  → Method {method + 1} error: {str(e)[:50]}")
-            
-            # Wait sebelum retry
-            await asyncio.sleep(0.5)
+                for task in done:
+                    del pending[task]
+                    data = task.result()
+                    if data:
+                        return data
+                launch_next = True
+            return None
+        finally:
+            # Hasil method lain tidak dipakai lagi
+            for task in pending:
+                task.cancel()
+    
+    async def _extract_with_method(
+        self,
+        search_query: str,
+        method: int,
+        guild_id: Optional[int] = None,
+        priority: int = PRIORITY_INTERACTIVE,
+        key: Optional[str] = None,
+        running: Optional[asyncio.Event] = None
+    ) -> Optional[dict]:
+        """Extract dengan satu method, return data yang punya stream URL (`running` di-set saat yt-dlp mulai jalan)"""
+        started = None
         
-        logger.error(f"❌ All methods failed. Last error: {last_error[:100] if last_error else 'Unknown'}")
-        return None
+        def on_start():
+            # Latency hanya waktu yt-dlp jalan, tanpa antrian token bucket / throttle / slot backend
+            nonlocal started
+            started = time.monotonic()
+            if running is not None:
+                running.set()
+        
+        logger.info(f"  → Trying method {method + 1}/5...")
+        
+        if key is not None:
+            # Bisa sudah dinaikkan oleh caller lebih mendesak yang ikut menunggu (INFLIGHT)
+            priority, guild_id = INFLIGHT.owner(key, priority, guild_id)
+        try:
+            data, warning, fatal = await SCHEDULER.extract(search_query, method, guild_id, priority, key, on_start)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            data, warning, fatal = None, str(e), None
+        
+        if fatal:
+            EXTRACTIONS_TOTAL.inc(method=method + 1, outcome='unavailable')
+            raise VideoUnavailable(fatal)
+        
+        elapsed = time.monotonic() - started if started is not None else 0.0
+        if not data and is_throttled(warning):
+            # Throttling berlaku untuk semua method, bukan kesalahan method ini
+            EXTRACTIONS_TOTAL.inc(method=method + 1, outcome='throttled')
+            logger.warning(f"  → Method {method + 1} throttled: {warning[:50]}")
+            return None
+        outcome = 'success' if data else 'failure'
+        METHOD_STATS.record(method, bool(data), elapsed)
+        EXTRACTION_SECONDS.observe(elapsed, method=method + 1, outcome=outcome)
+        EXTRACTIONS_TOTAL.inc(method=method + 1, outcome=outcome)
+        if not data:
+            logger.warning(f"  → Method {method + 1} failed: {(warning or 'Unknown')[:50]}")
+            return None
+        
+        logger.info(f"  ✅ Method {method + 1} SUCCESS: {data.get('title', 'Unknown')[:40]}")
+        return data
     
     def _extract_video_id(self, url: str) -> Optional[str]:
         """Extract YouTube video ID dari URL"""
@@ -302,6 +543,230 @@ class Music(commands.Cog):
         
         return None
     
+    def _extract_playlist_id(self, url: str) -> Optional[str]:
+        """Extract ID playlist/mix (parameter list=) dari URL YouTube"""
+        if not re.match(r'https?://(www\.|m\.|music\.)?(youtube\.com|youtu\.be)/', url.strip()):
+            return None
+        try:
+            params = urllib.parse.parse_qs(urllib.parse.urlparse(url.strip()).query)
+            if 'list' in params:
+                return params['list'][0]
+        except:
+            pass
+        return None
+    
+    async def _stream_playlist(self, url: str, guild_id: Optional[int]):
+        """Async generator halaman playlist, enumerasi jalan di thread"""
+        loop = asyncio.get_running_loop()
+        pages: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        done = object()
+        requests = 0
+        
+        def gate() -> bool:
+            """Tiap request YouTube untuk playlist ikut antri di SCHEDULER"""
+            nonlocal requests
+            # Halaman pertama ditunggu pendengar, sisanya antri di belakang
+            priority = PRIORITY_INTERACTIVE if not requests else PRIORITY_REFRESH
+            requests += 1
+            turn = asyncio.run_coroutine_threadsafe(SCHEDULER.acquire(guild_id, priority), loop)
+            while not stop.is_set():
+                try:
+                    turn.result(timeout=1)
+                    return True
+                except concurrent.futures.TimeoutError:
+                    continue
+            turn.cancel()
+            return False
+        
+        def worker():
+            try:
+                for page in iter_playlist(url, stop=stop, gate=gate):
+                    loop.call_soon_threadsafe(pages.put_nowait, page)
+            except Exception as e:
+                loop.call_soon_threadsafe(pages.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(pages.put_nowait, done)
+        
+        loop.run_in_executor(None, worker)
+        try:
+            while True:
+                page = await pages.get()
+                if page is done:
+                    return
+                if isinstance(page, Exception):
+                    raise page
+                yield page
+        finally:
+            stop.set()
+    
+    async def _enqueue_playlist(self, ctx: commands.Context, player: GuildMusicPlayer, url: str, msg) -> bool:
+        """
+        Masukkan playlist ke queue halaman per halaman. False = list gagal/kosong
+        tapi URL juga menunjuk satu video (watch?v=X&list=...): putar X saja.
+        """
+        added = 0
+        title = None
+        last_edit = 0.0
+        started = False
+        # List private, LL/WL, mix yang tidak bisa dibuka, dll.
+        fallback = self._extract_video_id(url) is not None
+        
+        try:
+            async for title, entries in self._stream_playlist(url, ctx.guild.id):
+                player.queue.extend(Song(entry, ctx.author) for entry in entries)
+                added += len(entries)
+                QUEUE_STORE.mark(player.guild_id)
+                player.prefetcher.kick()
+                
+                # Mulai putar begitu halaman pertama masuk
+                if not started and ctx.voice_client and not ctx.voice_client.is_playing() and not player.current:
+                    started = True
+                    asyncio.create_task(self.play_next(ctx))
+                
+                if time.monotonic() - last_edit > 2:
+                    last_edit = time.monotonic()
+                    await msg.edit(embed=discord.Embed(
+                        title="📃 Memuat playlist...",
+                        description=f"**{title or 'Playlist'}**\n`{added}` lagu ditambahkan",
+                        color=discord.Color.blue()
+                    ))
+        except Exception as e:
+            logger.error(f"Playlist error: {e}")
+            if not added:
+                if fallback:
+                    return False
+                await msg.edit(embed=discord.Embed(
+                    title="❌ Playlist Gagal",
+                    description=str(e)[:200],
+                    color=discord.Color.red()
+                ))
+                return True
+        
+        if not added:
+            if fallback:
+                logger.info(f"📃 Playlist kosong, putar videonya saja: {url[:50]}")
+                return False
+            await msg.edit(embed=discord.Embed(
+                title="❌ Playlist Kosong",
+                description=f"Tidak ada lagu di: `{url[:50]}`",
+                color=discord.Color.red()
+            ))
+            return True
+        
+        logger.info(f"📃 Playlist: {added} lagu dari {title or url[:50]}")
+        await msg.edit(embed=discord.Embed(
+            title="📃 Playlist Ditambahkan",
+            description=f"**{title or 'Playlist'}**\n`{added}` lagu masuk ke queue",
+            color=discord.Color.blue()
+        ))
+        return True
+    
+    # !play banyak lagu sekaligus (satu per baris / dipisah ';'): batas jumlah
+    # query dan berapa yang di-resolve bersamaan per batch
+    BATCH_MAX_QUERIES = int(os.environ.get('BATCH_MAX_QUERIES', '50'))
+    BATCH_CONCURRENCY = int(os.environ.get('BATCH_CONCURRENCY', '4'))
+    
+    def _split_batch(self, query: str) -> List[str]:
+        """Pecah query !play jadi beberapa lagu (satu per baris, atau dipisah ';')"""
+        return [q.strip() for q in re.split(r'[\n;]', query) if q.strip()]
+    
+    async def _enqueue_batch(self, ctx: commands.Context, player: GuildMusicPlayer, queries: List[str], msg):
+        """
+        Resolve banyak query bersamaan (maks BATCH_CONCURRENCY), lagu masuk
+        queue sesuai urutan ketik begitu semua lagu sebelumnya selesai.
+        """
+        truncated = max(len(queries) - self.BATCH_MAX_QUERIES, 0)
+        queries = queries[:self.BATCH_MAX_QUERIES]
+        total = len(queries)
+        results: Dict[int, Optional[dict]] = {}
+        next_index = 0
+        added = 0
+        duplicates = 0
+        failed: List[str] = []
+        started = False
+        last_edit = time.monotonic()
+        slots = asyncio.Semaphore(self.BATCH_CONCURRENCY)
+        
+        async def resolve(index: int, query: str):
+            async with slots:
+                if self._extract_playlist_id(query) and not self._extract_video_id(query):
+                    # Playlist di dalam batch tidak di-expand
+                    return index, None
+                # Hanya lagu pertama yang ditunggu pendengar, sisanya boleh antri di belakang
+                priority = PRIORITY_INTERACTIVE if index == 0 else PRIORITY_REFRESH
+                try:
+                    return index, await self.extract_info(query, ctx.guild.id, priority)
+                except Exception as e:
+                    logger.warning(f"Batch resolve error: {str(e)[:50]}")
+                    return index, None
+        
+        tasks = [asyncio.create_task(resolve(i, q)) for i, q in enumerate(queries)]
+        try:
+            for completed in asyncio.as_completed(tasks):
+                index, data = await completed
+                results[index] = data
+                
+                # Player dilepas (keluar voice) selagi batch jalan
+                if self.players.get(ctx.guild.id) is not player:
+                    return
+                
+                # Masukkan semua hasil yang urutannya sudah tidak bolong
+                inserted = False
+                while next_index in results:
+                    data = results.pop(next_index)
+                    if not data:
+                        failed.append(queries[next_index])
+                    elif QUEUE_DEDUP and (
+                        player.queue.contains_video(data.get('id'))
+                        or (player.current and player.current.video_id == data.get('id'))
+                    ):
+                        duplicates += 1
+                    else:
+                        player.queue.append(Song(data, ctx.author))
+                        added += 1
+                        inserted = True
+                    next_index += 1
+                
+                if inserted:
+                    QUEUE_STORE.mark(player.guild_id)
+                    player.prefetcher.kick()
+                    if player.engine and player.engine.needs_next:
+                        asyncio.create_task(self._arm_next(ctx.guild))
+                    # Mulai putar begitu lagu pertama siap
+                    if not started and ctx.voice_client and not ctx.voice_client.is_playing() and not player.current:
+                        started = True
+                        asyncio.create_task(self.play_next(ctx))
+                
+                if next_index < total and time.monotonic() - last_edit > 2:
+                    last_edit = time.monotonic()
+                    await msg.edit(embed=discord.Embed(
+                        title="📥 Memproses lagu...",
+                        description=f"`{next_index}/{total}` selesai • `{added}` ditambahkan",
+                        color=discord.Color.blue()
+                    ))
+        finally:
+            for task in tasks:
+                task.cancel()
+        
+        logger.info(f"📥 Batch: {added}/{total} lagu ditambahkan")
+        embed = discord.Embed(
+            title="📥 Lagu Ditambahkan" if added else "❌ Tidak Ada Lagu Ditambahkan",
+            description=f"`{added}` dari `{total}` lagu masuk ke queue",
+            color=discord.Color.blue() if added else discord.Color.red()
+        )
+        if failed:
+            embed.add_field(
+                name=f"❌ Gagal ({len(failed)})",
+                value="\n".join(f"`{q[:50]}`" for q in failed[:5]) + ("\n..." if len(failed) > 5 else ""),
+                inline=False
+            )
+        if duplicates:
+            embed.add_field(name="♻️ Sudah di queue", value=f"`{duplicates}` lagu", inline=True)
+        if truncated:
+            embed.add_field(name="✂️ Dilewati", value=f"`{truncated}` lagu (maks {self.BATCH_MAX_QUERIES})", inline=True)
+        await msg.edit(embed=embed)
+    
     # ═══════════════════════════════════════════════════════════
     # PLAYBACK FUNCTIONS
     # ═══════════════════════════════════════════════════════════
@@ -314,12 +779,15 @@ class Music(commands.Cog):
         else:
             guild = ctx_or_guild
         
-        player = self.get_player(guild.id)
         voice_client = guild.voice_client
         
+        # Sudah keluar dari voice (mis. dilepas idle reaper): jangan buat player baru
         if not voice_client or not voice_client.is_connected():
             return
         
+        player = self.get_player(guild.id)
+        self.reaper.touch(guild.id)
+        
         # Get next song
         if player.loop and player.current:
             next_song = player.current
@@ -329,32 +797,46 @@ class Music(commands.Cog):
             next_song = player.queue.popleft()
         else:
             player.current = None
-            if player.text_channel:
-                try:
-                    await player.text_channel.send("📭 **Queue kosong.** Gunakan `!play` untuk menambah lagu.")
-                except:
-                    pass
+            QUEUE_STORE.mark(guild.id)
+            player.status.update(player.text_channel, discord.Embed(
+                description="📭 **Queue kosong.** Gunakan `!play` untuk menambah lagu.",
+                color=discord.Color.greyple()
+            ))
             return
         
-        # Re-fetch stream URL (karena bisa expire)
         logger.info(f"🎵 Playing: {next_song.title}")
+        timer = PhaseTimer('play_next', guild=guild.id, video_id=next_song.video_id)
         
         try:
-            # Fetch fresh data
-            fresh_data = await self.extract_info(next_song.url or next_song.title)
-            
-            if not fresh_data:
-                if player.text_channel:
-                    await player.text_channel.send(f"⚠️ **Skip:** Gagal memutar `{next_song.title}`")
+            # Stream URL biasanya sudah di-resolve prefetcher,
+            # re-fetch hanya kalau belum ada atau hampir expire
+            if not await player.prefetcher.ensure_fresh(next_song, PRIORITY_INTERACTIVE):
+                timer.mark('resolve')
+                timer.done(ok=False)
+                player.status.notice(player.text_channel, f"⚠️ **Skip:** Gagal memutar `{next_song.title}`")
                 await self.play_next(guild)
                 return
+            timer.mark('resolve')
             
-            # Update song dengan fresh data
-            next_song = Song(fresh_data, next_song.requester)
             player.current = next_song
+            QUEUE_STORE.mark(guild.id)
             
             # Create source dan play
-            source = next_song.create_source()
+            await next_song.probe()
+            timer.mark('probe')
+            source = next_song.create_source(
+                pcm=GAPLESS_ENABLED and CROSSFADE_SECONDS > 0,
+                bitrate=self._channel_bitrate(voice_client)
+            )
+            timer.mark('spawn')
+            
+            def first_frame():
+                # Dipanggil dari thread voice saat frame pertama keluar
+                timer.mark('first_frame')
+                FIRST_AUDIO_SECONDS.observe(timer.elapsed)
+                timer.done(ok=True)
+            
+            source = FirstFrameSource(source, first_frame)
             
             def after_playing(error):
                 if error:
@@ -365,48 +847,149 @@ class Music(commands.Cog):
                     self.bot.loop
                 )
             
+            if GAPLESS_ENABLED:
+                # Lagu berikutnya disambung langsung oleh engine, after_playing
+                # hanya terpanggil kalau tidak ada lagu yang siap disambung
+                engine = GaplessSource(
+                    next_song,
+                    source,
+                    on_need_next=lambda: asyncio.run_coroutine_threadsafe(
+                        self._arm_next(guild), self.bot.loop
+                    ),
+                    on_transition=lambda song: asyncio.run_coroutine_threadsafe(
+                        self._on_track_transition(guild, song), self.bot.loop
+                    )
+                )
+                player.engine = engine
+                source = engine
+            
             voice_client.play(source, after=after_playing)
             
-            # Send now playing embed
-            if player.text_channel:
-                embed = discord.Embed(
-                    title="🎵 Now Playing",
-                    description=f"**[{next_song.title}]({next_song.url})**",
-                    color=discord.Color.green()
-                )
-                embed.add_field(name="⏱️ Duration", value=next_song.duration_str, inline=True)
-                embed.add_field(name="🎤 Channel", value=next_song.uploader[:20], inline=True)
-                embed.add_field(name="👤 Requested by", value=next_song.requester.mention, inline=True)
-                
-                if next_song.thumbnail:
-                    embed.set_thumbnail(url=next_song.thumbnail)
-                
-                if player.loop:
-                    embed.set_footer(text="🔂 Loop: ON")
-                elif player.loop_queue:
-                    embed.set_footer(text="🔁 Loop Queue: ON")
-                
-                try:
-                    await player.text_channel.send(embed=embed)
-                except:
-                    pass
+            # Mulai resolve lagu-lagu berikutnya selagi lagu ini diputar
+            player.prefetcher.kick()
+            AUDIO_CACHE.schedule(next_song)
+            LOUDNESS.schedule(next_song)
+            
+            self._show_now_playing(player, next_song)
                     
         except Exception as e:
             logger.error(f"Error playing song: {e}")
-            if player.text_channel:
+            player.status.notice(player.text_channel, f"❌ **Error:** {str(e)[:100]}")
+            await self.play_next(guild)
+    
+    def _channel_bitrate(self, voice_client) -> int:
+        """Bitrate encode (kbps) mengikuti bitrate voice channel"""
+        channel = getattr(voice_client, 'channel', None)
+        if not channel or not getattr(channel, 'bitrate', None):
+            return DEFAULT_BITRATE
+        return min(channel.bitrate // 1000, MAX_BITRATE)
+    
+    def _peek_next(self, player: GuildMusicPlayer) -> Optional[Song]:
+        """Lagu yang akan diputar setelah lagu sekarang (tanpa mengubah queue)"""
+        if player.loop and player.current:
+            return player.current
+        if player.queue:
+            return player.queue[0]
+        return None
+    
+    def _queue_changed(self, guild, player: GuildMusicPlayer, head: bool = False):
+        """Queue diedit manual: simpan, prefetch ulang, batalkan sambungan gapless yang basi"""
+        QUEUE_STORE.mark(guild.id)
+        player.prefetcher.kick()
+        if head and player.engine:
+            player.engine.clear_next()
+            if player.engine.needs_next:
+                asyncio.create_task(self._arm_next(guild))
+    
+    async def _arm_next(self, guild):
+        """Siapkan FFmpeg lagu berikutnya di engine gapless"""
+        player = self.get_player(guild.id)
+        engine = player.engine
+        if engine is None or not engine.wants_next:
+            return
+        
+        song = self._peek_next(player)
+        if song is None:
+            return
+        
+        try:
+            if not await player.prefetcher.ensure_fresh(song):
+                # Biarkan play_next yang menangani lagu gagal
+                return
+            
+            # State bisa berubah selama menunggu resolve
+            if engine is not player.engine or not engine.wants_next or self._peek_next(player) is not song:
+                return
+            
+            await song.probe()
+            if engine is not player.engine or not engine.wants_next:
+                return
+            engine.set_next(song, song.create_source(
+                pcm=not engine.is_opus(),
+                bitrate=self._channel_bitrate(guild.voice_client)
+            ))
+        except Exception as e:
+            logger.warning(f"Gagal menyiapkan lagu berikutnya: {str(e)[:50]}")
+    
+    async def _on_track_transition(self, guild, song: Song):
+        """Dipanggil setelah engine gapless pindah ke lagu berikutnya"""
+        player = self.get_player(guild.id)
+        
+        if not (player.loop and player.current is song):
+            if player.loop_queue and player.current:
+                player.queue.append(player.current)
+            if player.queue and player.queue[0] is song:
+                player.queue.popleft()
+            else:
                 try:
-                    await player.text_channel.send(f"❌ **Error:** {str(e)[:100]}")
-                except:
+                    player.queue.remove(song)
+                except ValueError:
                     pass
-            await self.play_next(guild)
+        
+        player.current = song
+        QUEUE_STORE.mark(guild.id)
+        logger.info(f"🎵 Playing: {song.title}")
+        player.prefetcher.kick()
+        AUDIO_CACHE.schedule(song)
+        LOUDNESS.schedule(song)
+        self._show_now_playing(player, song)
+    
+    def _show_now_playing(self, player: GuildMusicPlayer, song: Song):
+        """Edit pesan now playing server ini (tidak menunggu HTTP)"""
+        embed = discord.Embed(
+            title="🎵 Now Playing",
+            description=f"**[{song.title}]({song.url})**",
+            color=discord.Color.green()
+        )
+        embed.add_field(name="⏱️ Duration", value=song.duration_str, inline=True)
+        embed.add_field(name="🎤 Channel", value=song.uploader[:20], inline=True)
+        embed.add_field(name="👤 Requested by", value=song.requester.mention, inline=True)
+        
+        if song.thumbnail:
+            embed.set_thumbnail(url=song.thumbnail)
+        
+        if player.loop:
+            embed.set_footer(text="🔂 Loop: ON")
+        elif player.loop_queue:
+            embed.set_footer(text="🔁 Loop Queue: ON")
+        
+        player.status.update(player.text_channel, embed)
     
     # ═══════════════════════════════════════════════════════════
     # COMMANDS
     # ═══════════════════════════════════════════════════════════
     
-    @commands.command(name='play', aliases=['p', 'putar'])
+    @commands.hybrid_command(name='play', aliases=['p', 'putar'])
+    @app_commands.describe(query="Judul, URL, atau pilih dari lagu yang pernah diputar")
     async def play(self, ctx: commands.Context, *, query: str):
-        """▶️ Putar lagu dari YouTube"""
+        """▶️ Putar lagu dari YouTube (bisa banyak: satu per baris atau pisahkan dengan ;)"""
+        
+        # /play: interaction harus dijawab dalam 3 detik, connect voice bisa lebih lama
+        await ctx.defer()
+        
+        # Pilihan autocomplete berisi video ID: langsung extract video itu, tanpa search
+        if query.strip() in TITLE_INDEX:
+            query = watch_url(query.strip())
         
         # Cek voice channel
         if not ctx.author.voice:
@@ -427,6 +1010,7 @@ class Music(commands.Cog):
         # Get player
         player = self.get_player(ctx.guild.id)
         player.text_channel = ctx.channel
+        self.reaper.touch(ctx.guild.id)
         
         # Send searching message
         search_embed = discord.Embed(
@@ -436,9 +1020,18 @@ class Music(commands.Cog):
         )
         msg = await ctx.send(embed=search_embed)
         
+        # Banyak lagu sekaligus: resolve paralel, masuk queue sesuai urutan
+        queries = self._split_batch(query)
+        if len(queries) > 1:
+            return await self._enqueue_batch(ctx, player, queries, msg)
+        
+        # Playlist / mix: enqueue bertahap, resolve stream belakangan
+        if self._extract_playlist_id(query) and await self._enqueue_playlist(ctx, player, query.strip(), msg):
+            return
+        
         # Search
         try:
-            data = await self.extract_info(query)
+            data = await self.extract_info(query, ctx.guild.id)
             
             if not data:
                 error_embed = discord.Embed(
@@ -458,11 +1051,27 @@ class Music(commands.Cog):
                 await msg.edit(embed=error_embed)
                 return
             
+            if QUEUE_DEDUP and (
+                player.queue.contains_video(data.get('id'))
+                or (player.current and player.current.video_id == data.get('id'))
+            ):
+                await msg.edit(embed=discord.Embed(
+                    title="♻️ Sudah Ada di Queue",
+                    description=f"**{data.get('title', 'Unknown Title')}**",
+                    color=discord.Color.orange()
+                ))
+                return
+            
             # Create song
             song = Song(data, ctx.author)
             
             # Add to queue
             player.queue.append(song)
+            QUEUE_STORE.mark(player.guild_id)
+            player.prefetcher.kick()
+            if player.engine and player.engine.needs_next:
+                # Lagu sekarang hampir habis dan belum ada sambungan
+                asyncio.create_task(self._arm_next(ctx.guild))
             
             # Update message
             if ctx.voice_client.is_playing() or player.current:
@@ -488,6 +1097,119 @@ class Music(commands.Cog):
                 color=discord.Color.red()
             ))
     
+    @play.autocomplete('query')
+    async def play_autocomplete(self, interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+        """Saran judul dari title index lokal (tanpa request ke YouTube)"""
+        choices = []
+        for entry in TITLE_INDEX.search(current):
+            name = f"{entry.title} — {entry.uploader}" if entry.uploader else entry.title
+            if len(name) > 100:
+                name = name[:99] + '…'
+            choices.append(app_commands.Choice(name=name, value=entry.video_id))
+        return choices
+    
+    @commands.command(name='queue', aliases=['q', 'antrian'])
+    async def queue(self, ctx: commands.Context, page: Optional[int] = None, member: Optional[discord.Member] = None):
+        """📜 Lihat queue per halaman: !queue [halaman] [@member]"""
+        # Halaman duluan: "!queue 2" tidak dicoba sebagai member (ID/nama "2")
+        player = self.get_player(ctx.guild.id)
+        page = page or 1
+        
+        total = player.queue.count_requester(member.id) if member else len(player.queue)
+        pages = max((total + QUEUE_PAGE_SIZE - 1) // QUEUE_PAGE_SIZE, 1)
+        page = min(max(page, 1), pages)
+        start = (page - 1) * QUEUE_PAGE_SIZE
+        
+        # Hanya halaman yang terlihat yang diambil dari queue
+        if member:
+            rows = player.queue.by_requester(member.id, start, QUEUE_PAGE_SIZE)
+        else:
+            rows = player.queue.page(start, QUEUE_PAGE_SIZE)
+        
+        lines = []
+        if player.current and page == 1 and not member:
+            lines.append(f"▶️ **[{player.current.title[:60]}]({player.current.url})** `{player.current.duration_str}`\n")
+        for position, song in rows:
+            lines.append(f"`{position + 1}.` [{song.title[:60]}]({song.url}) `{song.duration_str}`")
+        
+        embed = discord.Embed(
+            title="📜 Queue" + (f" - {member.display_name}" if member else ""),
+            description="\n".join(lines) if lines else "📭 Queue kosong.",
+            color=discord.Color.blue()
+        )
+        embed.set_footer(text=f"Halaman {page}/{pages} • {total} lagu")
+        await ctx.send(embed=embed)
+    
+    @commands.command(name='remove', aliases=['rm', 'hapus'])
+    async def remove(self, ctx: commands.Context, position: int):
+        """🗑️ Hapus lagu di posisi tertentu"""
+        player = self.get_player(ctx.guild.id)
+        if not 1 <= position <= len(player.queue):
+            return await ctx.send(f"❌ **Posisi tidak valid.** Queue berisi `{len(player.queue)}` lagu.")
+        
+        song = player.queue.pop(position - 1)
+        self._queue_changed(ctx.guild, player, head=position == 1)
+        await ctx.send(f"🗑️ **Dihapus:** `{song.title}`")
+    
+    @commands.command(name='move', aliases=['mv', 'pindah'])
+    async def move(self, ctx: commands.Context, source: int, target: int):
+        """↕️ Pindahkan lagu ke posisi lain"""
+        player = self.get_player(ctx.guild.id)
+        if not 1 <= source <= len(player.queue):
+            return await ctx.send(f"❌ **Posisi tidak valid.** Queue berisi `{len(player.queue)}` lagu.")
+        
+        target = min(max(target, 1), len(player.queue))
+        song = player.queue.move(source - 1, target - 1)
+        self._queue_changed(ctx.guild, player, head=1 in (source, target))
+        await ctx.send(f"↕️ **Dipindah:** `{song.title}` → `#{target}`")
+    
+    @commands.command(name='jump', aliases=['skipto', 'lompat'])
+    async def jump(self, ctx: commands.Context, position: int):
+        """⏭️ Lompat langsung ke lagu di posisi tertentu"""
+        player = self.get_player(ctx.guild.id)
+        if not 1 <= position <= len(player.queue):
+            return await ctx.send(f"❌ **Posisi tidak valid.** Queue berisi `{len(player.queue)}` lagu.")
+        
+        skipped = player.queue.jump(position - 1)
+        if player.loop_queue:
+            # Urutan loop tetap: lagu sekarang lalu lagu yang dilompati ke belakang
+            if player.current:
+                player.queue.append(player.current)
+            player.queue.extend(skipped)
+        
+        song = player.queue[0]
+        # play_next berikutnya langsung ambil lagu tujuan
+        player.current = None
+        self._queue_changed(ctx.guild, player, head=True)
+        await ctx.send(f"⏭️ **Lompat ke #{position}:** `{song.title}`")
+        
+        voice_client = ctx.voice_client
+        if voice_client and voice_client.is_playing():
+            voice_client.stop()
+        else:
+            await self.play_next(ctx)
+    
+    @commands.command(name='shuffle', aliases=['acak'])
+    async def shuffle(self, ctx: commands.Context):
+        """🔀 Acak urutan queue"""
+        player = self.get_player(ctx.guild.id)
+        if len(player.queue) < 2:
+            return await ctx.send("❌ **Queue terlalu pendek untuk diacak.**")
+        
+        player.queue.shuffle()
+        self._queue_changed(ctx.guild, player, head=True)
+        await ctx.send(f"🔀 **Queue diacak** (`{len(player.queue)}` lagu)")
+    
+    @commands.command(name='dedup', aliases=['unique'])
+    async def dedup(self, ctx: commands.Context):
+        """♻️ Hapus lagu duplikat dari queue"""
+        player = self.get_player(ctx.guild.id)
+        removed = player.queue.dedup()
+        if removed:
+            # Lagu paling depan selalu dipertahankan
+            self._queue_changed(ctx.guild, player)
+        await ctx.send(f"♻️ **{removed}** lagu duplikat dihapus.")
+    
     @commands.command(name='test', aliases=['debug', 'check'])
     async def test_url(self, ctx: commands.Context, *, query: str):
         """🔧 Test apakah URL/query bisa diputar"""
@@ -512,35 +1234,24 @@ class Music(commands.Cog):
         results.append("\n**Testing extraction methods...**\n")
         
         # Test each method
-        loop = asyncio.get_event_loop()
         success = False
+        search_q = query if video_id else f"ytsearch:{query}"
         
         for method in range(5):
             try:
-                opts = YTDLSource.get_options(method)
-                ytdl = yt_dlp.YoutubeDL(opts)
-                
-                search_q = query if video_id else f"ytsearch:{query}"
-                
-                data = await loop.run_in_executor(
-                    None,
-                    lambda q=search_q: ytdl.extract_info(q, download=False)
-                )
+                data, warning, fatal = await SCHEDULER.extract(search_q, method, ctx.guild.id, PRIORITY_TEST)
                 
                 if data:
-                    if 'entries' in data:
-                        data = data['entries'][0] if data['entries'] else None
-                    
-                    if data and data.get('url'):
-                        results.append(f"✅ **Method {method + 1}:** SUCCESS")
-                        results.append(f"   📺 `{data.get('title', 'N/A')[:40]}`")
-                        results.append(f"   ⏱️ Duration: {data.get('duration', 'N/A')}s")
-                        success = True
-                        break
-                    else:
-                        results.append(f"⚠️ **Method {method + 1}:** No stream URL")
+                    results.append(f"✅ **Method {method + 1}:** SUCCESS")
+                    results.append(f"   📺 `{data.get('title', 'N/A')[:40]}`")
+                    results.append(f"   ⏱️ Duration: {data.get('duration', 'N/A')}s")
+                    success = True
+                    break
+                elif fatal:
+                    results.append(f"❌ **Method {method + 1}:** {fatal}")
+                    break
                 else:
-                    results.append(f"⚠️ **Method {method + 1}:** No data")
+                    results.append(f"⚠️ **Method {method + 1}:** {(warning or 'No data')[:50]}")
                     
             except Exception as e:
                 err = str(e)[:50]
@@ -548,4 +1259,19 @@ class Music(commands.Cog):
         
         # Final result
         if success:
-            results.appe
+            results.append("\n✅ **Video bisa diputar!**")
+            color = discord.Color.green()
+        else:
+            results.append("\n❌ **Semua method gagal.** Coba video lain atau update yt-dlp.")
+            color = discord.Color.red()
+        
+        result_embed = discord.Embed(
+            title="🔧 Test Result",
+            description="\n".join(results)[:4000],
+            color=color
+        )
+        await msg.edit(embed=result_embed)
+
+
+async def setup(bot):
+    await bot.add_cog(Music(bot))
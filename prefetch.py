@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import os
+import re
+import time
+import urllib.parse
+from itertools import islice
+from typing import Optional, Dict, List, Callable, Awaitable
+
+from extract_scheduler import PRIORITY_REFRESH
+
+logger = logging.getLogger('MusicBot.Prefetch')
+
+# ═══════════════════════════════════════════════════════════════
+# KONFIGURASI PREFETCH
+# ═══════════════════════════════════════════════════════════════
+
+# Berapa lagu di depan queue yang di-resolve duluan
+PREFETCH_DEPTH = int(os.environ.get('PREFETCH_DEPTH', '2'))
+
+# Refresh stream URL kalau akan expire dalam waktu ini (detik)
+REFRESH_MARGIN = int(os.environ.get('PREFETCH_REFRESH_MARGIN', '600'))
+
+# Umur default kalau URL tidak punya parameter expire
+DEFAULT_STREAM_TTL = int(os.environ.get('STREAM_DEFAULT_TTL', '1800'))
+
+# Jeda sebelum mencoba lagi lagu yang gagal di-prefetch
+RETRY_FAILED_AFTER = 60
+
+
+def stream_expiry(stream_url: str) -> float:
+    """Ambil waktu expire (unix time) dari URL stream googlevideo"""
+    if not stream_url:
+        return 0.0
+    try:
+        parsed = urllib.parse.urlparse(stream_url)
+        params = urllib.parse.parse_qs(parsed.query)
+        if 'expire' in params:
+            return float(params['expire'][0])
+        # Format lama: parameter ditaruh di path (/expire/1700000000/)
+        match = re.search(r'/expire/(\d+)', parsed.path)
+        if match:
+            return float(match.group(1))
+    except (ValueError, IndexError):
+        pass
+    return time.time() + DEFAULT_STREAM_TTL
+
+
+class StreamPrefetcher:
+    """Resolve stream URL lagu-lagu berikutnya di background (per server)"""
+
+    def __init__(
+        self,
+        player,
+        resolve: Callable[[str, int], Awaitable[Optional[dict]]],
+        depth: int = PREFETCH_DEPTH,
+        margin: int = REFRESH_MARGIN
+    ):
+        self.player = player
+        self.resolve = resolve
+        self.depth = depth
+        self.margin = margin
+        # id(song) → task resolve; dibuang begitu task selesai, jadi id tidak sempat dipakai ulang
+        self._inflight: Dict[int, asyncio.Task] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def kick(self):
+        """Bangunkan prefetcher (queue berubah / lagu berganti)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        self._wakeup.set()
+
+    def stop(self):
+        """Hentikan task prefetch dan semua resolve yang sedang jalan"""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        for task in list(self._inflight.values()):
+            task.cancel()
+        self._inflight.clear()
+
+    def upcoming(self) -> List:
+        """Lagu yang akan diputar setelah lagu sekarang, urut"""
+        player = self.player
+        if player.loop and player.current:
+            return [player.current]
+        songs = list(islice(player.queue, self.depth))
+        if len(songs) < self.depth and player.loop_queue and player.current:
+            songs.append(player.current)
+        return songs
+
+    async def ensure_fresh(self, song, priority: int = PRIORITY_REFRESH) -> bool:
+        """Pastikan stream URL lagu masih valid, resolve ulang kalau perlu"""
+        if song.is_fresh(self.margin):
+            return True
+
+        key = id(song)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._refresh(song, priority))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _, k=key: self._inflight.pop(k, None))
+
+        # Shield supaya caller yang di-cancel tidak membatalkan resolve milik caller lain
+        return await asyncio.shield(task)
+
+    async def _refresh(self, song, priority: int) -> bool:
+        logger.info(f"⏩ Prefetch: {song.title[:40]}")
+        data = await self.resolve(song.url or song.title, priority)
+        if not data:
+            song.failed_at = time.time()
+            return False
+        song.update(data)
+        song.failed_at = 0.0
+        return True
+
+    def _next_deadline(self) -> Optional[float]:
+        """Detik sampai ada lagu upcoming yang perlu di-refresh lagi"""
+        now = time.time()
+        deadlines = []
+        for song in self.upcoming():
+            if song.failed_at:
+                deadlines.append(song.failed_at + RETRY_FAILED_AFTER - now)
+            elif song.stream_url:
+                deadlines.append(song.expires_at - self.margin - now)
+        if not deadlines:
+            return None
+        return max(min(deadlines), 1.0)
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+
+            for song in self.upcoming():
+                if song.is_fresh(self.margin):
+                    continue
+                if song.failed_at and time.time() - song.failed_at < RETRY_FAILED_AFTER:
+                    continue
+                try:
+                    await self.ensure_fresh(song)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning(f"Prefetch error: {str(e)[:50]}")
+
+            # Tidur sampai ada yang mendekati expire, atau sampai di-kick
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self._next_deadline())
+            except asyncio.TimeoutError:
+                pass
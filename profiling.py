@@ -0,0 +1,131 @@
+import json
+import logging
+import sys
+import time
+from collections import Counter
+from typing import Optional, Callable, Dict, List, Tuple
+
+import discord
+
+logger = logging.getLogger('MusicBot.Profiling')
+
+
+def log_event(event: str, **fields):
+    """Log satu record terstruktur (JSON) - gampang di-grep / di-parse"""
+    record = {'event': event, **fields}
+    logger.info(json.dumps(record, default=str), extra={'event': event, 'fields': fields})
+
+
+class PhaseTimer:
+    """Catat durasi tiap fase di hot path (extract_info, play_next)"""
+
+    def __init__(self, name: str, **context):
+        self.name = name
+        self.context = context
+        self.started = time.monotonic()
+        self._last = self.started
+        self.phases: Dict[str, float] = {}
+        self._done = False
+
+    def mark(self, phase: str):
+        now = time.monotonic()
+        self.phases[phase] = round(now - self._last, 4)
+        self._last = now
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def done(self, **fields):
+        """Log hasil (sekali saja, aman dipanggil dari thread lain)"""
+        if self._done:
+            return
+        self._done = True
+        log_event(
+            self.name,
+            total=round(self.elapsed, 4),
+            phases=self.phases,
+            **self.context,
+            **fields
+        )
+
+
+class FirstFrameSource(discord.AudioSource):
+    """Bungkus AudioSource, panggil callback saat frame pertama dibaca"""
+
+    def __init__(self, source: discord.AudioSource, on_first_frame: Callable[[], None]):
+        self.source = source
+        self.on_first_frame = on_first_frame
+        self._fired = False
+
+    def read(self) -> bytes:
+        data = self.source.read()
+        if not self._fired and data:
+            self._fired = True
+            try:
+                self.on_first_frame()
+            except Exception as e:
+                logger.warning(f"First frame hook error: {str(e)[:50]}")
+        return data
+
+    def is_opus(self) -> bool:
+        return self.source.is_opus()
+
+    def cleanup(self):
+        self.source.cleanup()
+
+
+class SamplingProfiler:
+    """
+    Profiler sampling sederhana: thread terpisah mengambil stack thread target
+    setiap `interval` detik. Hasilnya collapsed stacks (format flamegraph).
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+
+    def _sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            return
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+            frame = frame.f_back
+        self.stacks[';'.join(reversed(stack))] += 1
+        self.samples += 1
+
+    def run(self, duration: float):
+        """Blocking - jalankan di thread/executor"""
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline:
+            self._sample()
+            time.sleep(self.interval)
+
+    def collapsed(self) -> str:
+        return '\n'.join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+    def top(self, n: int = 10) -> List[Tuple[str, float]]:
+        """Fungsi paling sering terlihat di puncak stack (self time)"""
+        leaf: Counter = Counter()
+        for stack, count in self.stacks.items():
+            leaf[stack.rsplit(';', 1)[-1]] += count
+        total = self.samples or 1
+        return [(name, count / total) for name, count in leaf.most_common(n)]
+
+
+def capture_stack(thread_id: int, limit: int = 15) -> Optional[List[str]]:
+    """Stack thread saat ini (dipanggil dari thread lain)"""
+    frame = sys._current_frames().get(thread_id)
+    if frame is None:
+        return None
+    stack = []
+    while frame is not None and len(stack) < limit:
+        code = frame.f_code
+        stack.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno} {code.co_name}")
+        frame = frame.f_back
+    return stack
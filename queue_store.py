@@ -0,0 +1,300 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger('MusicBot.QueueStore')
+
+# ═══════════════════════════════════════════════════════════════
+# KONFIGURASI QUEUE PERSISTEN
+# ═══════════════════════════════════════════════════════════════
+
+DATA_DIR = os.environ.get('DATA_DIR', 'data')
+
+# Kosongkan untuk mematikan (queue hanya di memory)
+QUEUE_STORE_PATH = os.environ.get('QUEUE_STORE_PATH', os.path.join(DATA_DIR, 'queues.db'))
+
+# Perubahan queue dikumpulkan lalu ditulis sekaligus setiap sekian detik
+QUEUE_FLUSH_INTERVAL = float(os.environ.get('QUEUE_FLUSH_INTERVAL', '2'))
+
+# Queue tersimpan yang lebih tua dari ini tidak di-resume lagi (jam)
+QUEUE_RESUME_MAX_AGE = float(os.environ.get('QUEUE_RESUME_MAX_AGE_HOURS', '12')) * 3600
+
+# Naikkan kalau SCHEMA berubah: tabel lama dibuang (isinya hanya queue sementara)
+SCHEMA_VERSION = 2
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS players (
+    guild_id INTEGER PRIMARY KEY,
+    voice_channel_id INTEGER,
+    text_channel_id INTEGER,
+    loop INTEGER NOT NULL DEFAULT 0,
+    loop_queue INTEGER NOT NULL DEFAULT 0,
+    current_video_id TEXT,
+    current_requester_id INTEGER,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    guild_id INTEGER NOT NULL,
+    position REAL NOT NULL,
+    video_id TEXT NOT NULL,
+    requester_id INTEGER,
+    PRIMARY KEY (guild_id, position)
+) WITHOUT ROWID;
+'''
+
+# (video_id, requester_id)
+Entry = Tuple[str, Optional[int]]
+
+# (position, video_id, requester_id) - position = Song.queue_key;
+# sebagai perubahan, video_id None berarti baris dihapus
+Row = Tuple[float, Optional[str], Optional[int]]
+
+
+class StoredRequester:
+    """Pengganti Member untuk lagu hasil restore (cukup untuk embed)"""
+    __slots__ = ('id',)
+
+    def __init__(self, user_id: int):
+        self.id = user_id
+
+    @property
+    def mention(self) -> str:
+        return f"<@{self.id}>"
+
+
+class PlayerState:
+    """
+    Snapshot ringkas GuildMusicPlayer: hanya ID, bukan dict yt-dlp.
+
+    `changes` None berarti `queue` lengkap dan menggantikan semua baris;
+    selain itu `changes` berisi baris yang berubah sejak flush terakhir dan
+    `queue` kosong (`size` tetap jumlah lagu sebenarnya).
+    """
+    __slots__ = (
+        'guild_id', 'voice_channel_id', 'text_channel_id', 'loop', 'loop_queue',
+        'current', 'queue', 'changes', 'size', 'updated',
+    )
+
+    def __init__(
+        self,
+        guild_id: int,
+        voice_channel_id: Optional[int] = None,
+        text_channel_id: Optional[int] = None,
+        loop: bool = False,
+        loop_queue: bool = False,
+        current: Optional[Entry] = None,
+        queue: Optional[List[Row]] = None,
+        changes: Optional[List[Row]] = None,
+        size: Optional[int] = None,
+        updated: float = 0.0
+    ):
+        self.guild_id = guild_id
+        self.voice_channel_id = voice_channel_id
+        self.text_channel_id = text_channel_id
+        self.loop = loop
+        self.loop_queue = loop_queue
+        self.current = current
+        self.queue = queue or []
+        self.changes = changes
+        self.size = len(self.queue) if size is None else size
+        self.updated = updated
+
+    @property
+    def empty(self) -> bool:
+        return self.current is None and not self.size
+
+
+class QueueStore:
+    """
+    Simpan state player ke SQLite dengan write-behind: `mark()` hanya
+    menandai server yang berubah, task flush menulis semua perubahan dalam
+    satu transaksi (satu fsync) per interval, di thread tersendiri.
+
+    Ganti lagu cukup update baris players (cursor lagu sekarang) plus baris
+    entries yang ditambah/dihapus; seluruh queue hanya ditulis ulang setelah
+    shuffle/dedup/clear, restore, atau flush yang gagal.
+    """
+
+    def __init__(self, path: str = QUEUE_STORE_PATH, interval: float = QUEUE_FLUSH_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.flushes = 0
+        self._dirty: Set[int] = set()
+        # Server yang perlu ditulis ulang seluruhnya
+        self._full: Set[int] = set()
+        self._snapshot: Optional[Callable[[int, bool], Optional[PlayerState]]] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        # Satu thread = satu koneksi SQLite, tulis tidak pernah di event loop
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='queue-store')
+        self._db: Optional[sqlite3.Connection] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._db = sqlite3.connect(self.path, isolation_level=None)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+            if self._db.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+                self._db.executescript('DROP TABLE IF EXISTS entries; DROP TABLE IF EXISTS players;')
+                self._db.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+            self._db.executescript(SCHEMA)
+        return self._db
+
+    # ───────────────────────────────────────────────────────────
+    # Dipanggil dari event loop
+    # ───────────────────────────────────────────────────────────
+
+    def start(self, snapshot: Callable[[int, bool], Optional[PlayerState]]):
+        """
+        `snapshot(guild_id, full)` → PlayerState sekarang (None = player sudah
+        tidak ada). full=False boleh mengembalikan perubahan saja.
+        """
+        if not self.enabled:
+            return
+        self._snapshot = snapshot
+        self._wakeup = asyncio.Event()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def mark(self, guild_id: int, full: bool = False):
+        """Tandai state server berubah (murah, boleh sering)"""
+        if self._wakeup is None:
+            return
+        self._dirty.add(guild_id)
+        if full:
+            self._full.add(guild_id)
+        self._wakeup.set()
+
+    async def load(self) -> Dict[int, PlayerState]:
+        """Semua state tersimpan yang belum terlalu tua"""
+        if not self.enabled:
+            return {}
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._load)
+
+    async def flush(self):
+        if not self._dirty or self._snapshot is None:
+            return
+        dirty, self._dirty = self._dirty, set()
+        full, self._full = self._full, set()
+        # Snapshot diambil di event loop (konsisten), ditulis di thread
+        states = {guild_id: self._snapshot(guild_id, guild_id in full) for guild_id in dirty}
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self._write, states)
+            self.flushes += 1
+        except Exception as e:
+            logger.error(f"❌ Gagal menyimpan queue: {str(e)[:100]}")
+            # Perubahan yang gagal ditulis sudah hilang dari journal: tulis ulang penuh
+            self._dirty |= dirty
+            self._full |= dirty
+
+    async def close(self):
+        """Flush terakhir lalu tutup koneksi"""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+        self._wakeup = None
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._close)
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            # Kumpulkan burst perubahan (mis. playlist) jadi satu transaksi
+            await asyncio.sleep(self.interval)
+            self._wakeup.clear()
+            await self.flush()
+
+    # ───────────────────────────────────────────────────────────
+    # Dijalankan di thread queue-store
+    # ───────────────────────────────────────────────────────────
+
+    def _write(self, states: Dict[int, Optional[PlayerState]]):
+        db = self._conn()
+        now = time.time()
+        db.execute('BEGIN')
+        try:
+            for guild_id, state in states.items():
+                if state is None or state.empty:
+                    db.execute('DELETE FROM entries WHERE guild_id = ?', (guild_id,))
+                    db.execute('DELETE FROM players WHERE guild_id = ?', (guild_id,))
+                    continue
+                current_video_id, current_requester_id = state.current or (None, None)
+                db.execute(
+                    'INSERT OR REPLACE INTO players '
+                    '(guild_id, voice_channel_id, text_channel_id, loop, loop_queue, '
+                    'current_video_id, current_requester_id, updated) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (
+                        guild_id, state.voice_channel_id, state.text_channel_id, state.loop, state.loop_queue,
+                        current_video_id, current_requester_id, now,
+                    )
+                )
+                if state.changes is None:
+                    db.execute('DELETE FROM entries WHERE guild_id = ?', (guild_id,))
+                    db.executemany(
+                        'INSERT INTO entries (guild_id, position, video_id, requester_id) VALUES (?, ?, ?, ?)',
+                        [(guild_id, *row) for row in state.queue]
+                    )
+                    continue
+                # Urutan perubahan penting: key lagu yang dihapus bisa dipakai lagi
+                for position, video_id, requester_id in state.changes:
+                    if video_id is None:
+                        db.execute('DELETE FROM entries WHERE guild_id = ? AND position = ?', (guild_id, position))
+                    else:
+                        db.execute(
+                            'INSERT OR REPLACE INTO entries (guild_id, position, video_id, requester_id) '
+                            'VALUES (?, ?, ?, ?)',
+                            (guild_id, position, video_id, requester_id)
+                        )
+            db.execute('COMMIT')
+        except Exception:
+            db.execute('ROLLBACK')
+            raise
+
+    def _load(self) -> Dict[int, PlayerState]:
+        db = self._conn()
+        cutoff = time.time() - QUEUE_RESUME_MAX_AGE
+        db.execute('BEGIN')
+        db.execute('DELETE FROM entries WHERE guild_id IN (SELECT guild_id FROM players WHERE updated < ?)', (cutoff,))
+        db.execute('DELETE FROM players WHERE updated < ?', (cutoff,))
+        db.execute('COMMIT')
+
+        states = {
+            row[0]: PlayerState(
+                row[0], row[1], row[2], bool(row[3]), bool(row[4]),
+                current=(row[5], row[6]) if row[5] else None,
+                updated=row[7]
+            )
+            for row in db.execute(
+                'SELECT guild_id, voice_channel_id, text_channel_id, loop, loop_queue, '
+                'current_video_id, current_requester_id, updated FROM players'
+            )
+        }
+        for guild_id, position, video_id, requester_id in db.execute(
+            'SELECT guild_id, position, video_id, requester_id FROM entries ORDER BY guild_id, position'
+        ):
+            state = states.get(guild_id)
+            if state is None:
+                continue
+            state.queue.append((position, video_id, requester_id))
+            state.size += 1
+        return states
+
+    def _close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+# Dipakai bersama oleh semua server
+QUEUE_STORE = QueueStore()
@@ -0,0 +1,256 @@
+import asyncio
+import logging
+import os
+import re
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger('MusicBot.SearchCache')
+
+# ═══════════════════════════════════════════════════════════════
+# KONFIGURASI SEARCH CACHE
+# ═══════════════════════════════════════════════════════════════
+
+DATA_DIR = os.environ.get('DATA_DIR', 'data')
+
+# Kosongkan untuk mematikan cache
+SEARCH_CACHE_PATH = os.environ.get('SEARCH_CACHE_PATH', os.path.join(DATA_DIR, 'search_cache.db'))
+
+# Hasil search dianggap basi setelah sekian hari
+SEARCH_CACHE_TTL = float(os.environ.get('SEARCH_CACHE_TTL_DAYS', '7')) * 86400
+
+# Maksimal jumlah query / video yang disimpan (LRU)
+SEARCH_CACHE_MAX_ENTRIES = int(os.environ.get('SEARCH_CACHE_MAX_ENTRIES', '5000'))
+
+# Eviction dijalankan setiap sekian kali tulis
+EVICT_EVERY = 100
+
+# Batas parameter per query IN (...) di SQLite lama
+MAX_VARIABLES = 500
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS queries (
+    query TEXT PRIMARY KEY,
+    video_id TEXT NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS videos (
+    video_id TEXT PRIMARY KEY,
+    title TEXT,
+    duration INTEGER,
+    uploader TEXT,
+    thumbnail TEXT,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS queries_last_used ON queries (last_used);
+CREATE INDEX IF NOT EXISTS videos_last_used ON videos (last_used);
+'''
+
+
+def normalize_query(query: str) -> str:
+    """Samakan query yang cuma beda huruf besar/spasi"""
+    return re.sub(r'\s+', ' ', query.strip().casefold())
+
+
+def watch_url(video_id: str) -> str:
+    return f"https://www.youtube.com/watch?v={video_id}"
+
+
+def _video(video_id: str, title, duration, uploader, thumbnail) -> dict:
+    return {
+        'id': video_id,
+        'title': title,
+        'duration': duration,
+        'uploader': uploader,
+        'thumbnail': thumbnail,
+        'webpage_url': watch_url(video_id),
+    }
+
+
+class SearchCache:
+    """
+    Cache query search → video ID + metadata ringan (SQLite WAL).
+
+    Semua akses SQLite jalan di satu thread sendiri (busy timeout tidak
+    pernah menahan event loop); method publik async dan bisa melempar
+    sqlite3.Error.
+    """
+
+    def __init__(
+        self,
+        path: str = SEARCH_CACHE_PATH,
+        ttl: float = SEARCH_CACHE_TTL,
+        max_entries: int = SEARCH_CACHE_MAX_ENTRIES
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._db: Optional[sqlite3.Connection] = None
+        self._writes = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='search-cache')
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._db = sqlite3.connect(self.path, isolation_level=None)
+            # WAL + synchronous=NORMAL: tulis murah, baca tidak pernah diblok
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+            self._db.executescript(SCHEMA)
+        return self._db
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    # ───────────────────────────────────────────────────────────
+    # Dipanggil dari event loop
+    # ───────────────────────────────────────────────────────────
+
+    async def lookup(self, query: str) -> Optional[dict]:
+        """Video hasil search sebelumnya untuk query ini, atau None"""
+        if not self.enabled:
+            return None
+        return await self._run(self._lookup, query)
+
+    async def videos(self) -> List[Tuple[str, str, Optional[str], float]]:
+        """(video_id, title, uploader, last_used) semua video yang tersimpan, terlama dulu"""
+        if not self.enabled:
+            return []
+        return await self._run(self._videos)
+
+    async def metadata(self, video_ids: Iterable[str]) -> Dict[str, dict]:
+        """Metadata video yang pernah di-resolve, per video ID (yang tidak ada dilewati)"""
+        if not self.enabled:
+            return {}
+        return await self._run(self._metadata, list(video_ids))
+
+    async def store(self, query: Optional[str], data: dict):
+        """Simpan hasil extract (query boleh None untuk URL langsung)"""
+        if not self.enabled or not data.get('id'):
+            return
+        await self._run(self._store, query, data)
+
+    async def forget(self, query: str):
+        """Hapus query yang hasilnya ternyata tidak bisa diputar"""
+        if self.enabled:
+            await self._run(self._forget, query)
+
+    def close(self):
+        self._executor.submit(self._close)
+
+    # ───────────────────────────────────────────────────────────
+    # Dijalankan di thread search-cache
+    # ───────────────────────────────────────────────────────────
+
+    def _lookup(self, query: str) -> Optional[dict]:
+        db = self._conn()
+        now = time.time()
+        row = db.execute(
+            'SELECT q.video_id, v.title, v.duration, v.uploader, v.thumbnail '
+            'FROM queries q LEFT JOIN videos v ON v.video_id = q.video_id '
+            'WHERE q.query = ? AND q.created > ?',
+            (normalize_query(query), now - self.ttl)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        db.execute('UPDATE queries SET last_used = ? WHERE query = ?', (now, normalize_query(query)))
+        db.execute('UPDATE videos SET last_used = ? WHERE video_id = ?', (now, row[0]))
+        return _video(*row)
+
+    def _metadata(self, video_ids: List[str]) -> Dict[str, dict]:
+        db = self._conn()
+        found = {}
+        for i in range(0, len(video_ids), MAX_VARIABLES):
+            batch = video_ids[i:i + MAX_VARIABLES]
+            for row in db.execute(
+                'SELECT video_id, title, duration, uploader, thumbnail FROM videos '
+                f'WHERE video_id IN ({",".join("?" * len(batch))})',
+                batch
+            ):
+                found[row[0]] = _video(*row)
+        return found
+
+    def _videos(self) -> List[Tuple[str, str, Optional[str], float]]:
+        return self._conn().execute(
+            'SELECT video_id, title, uploader, last_used FROM videos WHERE title IS NOT NULL ORDER BY last_used'
+        ).fetchall()
+
+    def _store(self, query: Optional[str], data: dict):
+        video_id = data['id']
+        db = self._conn()
+        now = time.time()
+        db.execute('BEGIN')
+        try:
+            db.execute(
+                'INSERT INTO videos (video_id, title, duration, uploader, thumbnail, created, last_used) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT(video_id) DO UPDATE SET title = excluded.title, '
+                'duration = excluded.duration, uploader = excluded.uploader, '
+                'thumbnail = excluded.thumbnail, last_used = excluded.last_used',
+                (
+                    video_id,
+                    data.get('title'),
+                    data.get('duration'),
+                    data.get('uploader') or data.get('channel'),
+                    data.get('thumbnail'),
+                    now,
+                    now,
+                )
+            )
+            if query:
+                db.execute(
+                    'INSERT OR REPLACE INTO queries (query, video_id, created, last_used) VALUES (?, ?, ?, ?)',
+                    (normalize_query(query), video_id, now, now)
+                )
+            db.execute('COMMIT')
+        except Exception:
+            db.execute('ROLLBACK')
+            raise
+
+        self._writes += 1
+        if self._writes % EVICT_EVERY == 0:
+            self._evict()
+
+    def _forget(self, query: str):
+        self._conn().execute('DELETE FROM queries WHERE query = ?', (normalize_query(query),))
+
+    def _evict(self):
+        """Buang entry expired (TTL) dan yang paling lama tidak dipakai (LRU)"""
+        db = self._conn()
+        cutoff = time.time() - self.ttl
+        db.execute('BEGIN')
+        try:
+            db.execute('DELETE FROM queries WHERE created < ?', (cutoff,))
+            for table in ('queries', 'videos'):
+                db.execute(
+                    f'DELETE FROM {table} WHERE rowid IN ('
+                    f'SELECT rowid FROM {table} ORDER BY last_used DESC LIMIT -1 OFFSET ?)',
+                    (self.max_entries,)
+                )
+            db.execute('COMMIT')
+        except Exception:
+            db.execute('ROLLBACK')
+            raise
+
+    def _close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+# Dipakai bersama oleh semua server
+SEARCH_CACHE = SearchCache()
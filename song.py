@@ -0,0 +1,115 @@
+import discord
+import logging
+import time
+from typing import Optional
+
+from prefetch import stream_expiry
+from audio_cache import AUDIO_CACHE
+from loudness import LOUDNESS, LOUDNESS_REENCODE_MIN_GAIN
+
+logger = logging.getLogger('MusicBot.Song')
+
+# FFMPEG Options
+FFMPEG_OPTS = {
+    'before_options': '-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5 -nostdin',
+    'options': '-vn'
+}
+
+# Bitrate encode (kbps) kalau source bukan Opus dan bitrate channel tidak diketahui
+DEFAULT_BITRATE = 128
+MAX_BITRATE = 510
+
+
+class Song:
+    """
+    Representasi sebuah lagu. Hanya field yang dipakai playback dan embed
+    yang disimpan - dict yt-dlp tidak ikut disimpan.
+    """
+    __slots__ = (
+        'requester', 'video_id', 'title', 'url', 'stream_url', 'expires_at',
+        'acodec', 'abr', 'thumbnail', 'duration', 'uploader', 'queue_key', 'failed_at',
+    )
+    
+    def __init__(self, data: dict, requester):
+        self.requester = requester
+        # Diisi SongQueue: urutan lagu di queue (dan baris di QueueStore)
+        self.queue_key = 0.0
+        # Diisi StreamPrefetcher: kapan resolve terakhir gagal (0 = belum pernah)
+        self.failed_at = 0.0
+        self.update(data)
+    
+    def update(self, data: dict):
+        """Isi ulang data lagu dari hasil extract terbaru"""
+        self.video_id = data.get('id')
+        self.title = data.get('title', 'Unknown Title')
+        self.url = data.get('webpage_url') or data.get('original_url') or data.get('url', '')
+        self.stream_url = data.get('url', '')
+        self.expires_at = stream_expiry(self.stream_url)
+        self.acodec = data.get('acodec')
+        self.abr = data.get('abr')
+        self.thumbnail = data.get('thumbnail', '')
+        self.duration = data.get('duration', 0)
+        self.uploader = data.get('uploader') or data.get('channel', 'Unknown')
+    
+    def is_fresh(self, margin: float = 0) -> bool:
+        """Bisa langsung diputar: ada di audio cache, atau stream URL masih berlaku"""
+        if AUDIO_CACHE.contains(self.video_id):
+            return True
+        return bool(self.stream_url) and self.expires_at - margin > time.time()
+    
+    @property
+    def duration_str(self) -> str:
+        if not self.duration:
+            return "🔴 LIVE"
+        m, s = divmod(int(self.duration), 60)
+        h, m = divmod(m, 60)
+        return f"{h}:{m:02d}:{s:02d}" if h else f"{m}:{s:02d}"
+    
+    @property
+    def is_opus(self) -> bool:
+        return bool(self.acodec) and self.acodec.startswith('opus')
+    
+    async def probe(self):
+        """Isi codec/bitrate dari ffprobe kalau yt-dlp tidak memberikannya"""
+        if self.acodec or AUDIO_CACHE.contains(self.video_id) or not self.stream_url:
+            return
+        try:
+            self.acodec, self.abr = await discord.FFmpegOpusAudio.probe(self.stream_url)
+        except Exception as e:
+            logger.warning(f"Probe gagal: {str(e)[:50]}")
+    
+    def create_source(self, pcm: bool = False, bitrate: Optional[int] = None) -> discord.AudioSource:
+        # Normalisasi loudness: gain tetap dari hasil analisis sebelumnya (bukan loudnorm realtime)
+        gain = LOUDNESS.gain(self.video_id)
+        options = f"-vn -af volume={gain:.2f}dB" if gain else '-vn'
+        # Packet Opus hanya di-copy; encode ulang cuma kalau selisih volumenya besar
+        copy = abs(gain) < LOUDNESS_REENCODE_MIN_GAIN
+        
+        cached = AUDIO_CACHE.path(self.video_id)
+        if cached:
+            # File lokal sudah Opus: tidak perlu reconnect, tidak perlu encode ulang
+            if pcm:
+                return discord.FFmpegPCMAudio(cached, before_options='-nostdin', options=options)
+            if copy:
+                return discord.FFmpegOpusAudio(cached, before_options='-nostdin', options='-vn', codec='opus')
+            return discord.FFmpegOpusAudio(
+                cached, before_options='-nostdin', options=options, bitrate=bitrate or DEFAULT_BITRATE
+            )
+        
+        if pcm:
+            # PCM dibutuhkan untuk crossfade (mixing di Python)
+            return discord.FFmpegPCMAudio(
+                self.stream_url,
+                before_options=FFMPEG_OPTS['before_options'],
+                options=options
+            )
+        if self.is_opus and copy:
+            # Source sudah Opus: copy packet, FFmpeg tidak decode/encode
+            return discord.FFmpegOpusAudio(self.stream_url, codec='opus', **FFMPEG_OPTS)
+        
+        return discord.FFmpegOpusAudio(
+            self.stream_url,
+            bitrate=bitrate or DEFAULT_BITRATE,
+            before_options=FFMPEG_OPTS['before_options'],
+            options=options
+        )
@@ -0,0 +1,394 @@
+import os
+import random
+from bisect import bisect_right
+from collections import Counter
+from itertools import accumulate, chain, repeat
+from operator import attrgetter
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+# Ukuran chunk; chunk dipecah dua kalau lebih dari 2x ini
+QUEUE_CHUNK_SIZE = int(os.environ.get('QUEUE_CHUNK_SIZE', '256'))
+
+# Tolak !play untuk video yang sudah ada di queue
+QUEUE_DEDUP = os.environ.get('QUEUE_DEDUP', '0') == '1'
+
+# Jumlah lagu per halaman !queue
+QUEUE_PAGE_SIZE = 10
+
+
+# Member discord / StoredRequester sama-sama punya .id
+requester_id = attrgetter('requester.id')
+video_id = attrgetter('video_id')
+queue_key = attrgetter('queue_key')
+
+# Entry journal: queue diganti seluruhnya (shuffle, dedup, clear)
+RESET = None
+
+
+class SongQueue:
+    """
+    Queue lagu berbasis chunked list.
+
+    Lagu disimpan di beberapa list kecil (chunk) + offset awal tiap chunk.
+    Cari posisi = bisect offset (O(log n)), edit = insert/del di satu chunk
+    (memmove C, O(chunk)). Offset setelah chunk yang berubah dihitung ulang
+    malas saat posisi berikutnya dicari. Tiap chunk punya Counter requester
+    supaya filter per requester bisa melompati chunk yang tidak relevan, dan
+    Counter video supaya !jump cukup membuang chunk utuh tanpa menghitung
+    ulang per lagu.
+
+    API-nya kompatibel dengan deque untuk operasi yang dipakai player
+    (append, extend, popleft, remove, iterasi, [0]).
+
+    Tiap lagu punya `queue_key` (float, naik sesuai urutan) yang stabil
+    selama lagu ada di queue. Kalau `journal` berupa list, setiap perubahan
+    dicatat sebagai (key, video_id, requester_id) untuk tambah/ganti,
+    (key, None, None) untuk hapus, atau RESET - supaya QueueStore cukup
+    menulis baris yang berubah, bukan seluruh queue.
+    """
+
+    def __init__(self, songs: Iterable = (), chunk_size: int = QUEUE_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self._chunks: List[list] = []
+        # None = belum dihitung sejak rebuild (lihat _counters)
+        self._requesters: List[Optional[Counter]] = []
+        self._videos: List[Optional[Counter]] = []
+        self._offsets: List[int] = []
+        # Offset chunk mulai index ini perlu dihitung ulang
+        self._stale = 0
+        # Jumlah popleft sejak offset dihitung: offset disimpan dalam koordinat
+        # lama, jadi popleft cukup menggeser chunk pertama (O(1))
+        self._shift = 0
+        self._len = 0
+        self.journal: Optional[list] = None
+        self.extend(songs)
+
+    # ───────────────────────────────────────────────────────────
+    # Internal
+    # ───────────────────────────────────────────────────────────
+
+    def _refresh(self):
+        if self._stale >= len(self._chunks) and len(self._offsets) == len(self._chunks):
+            return
+        del self._offsets[min(self._stale, len(self._chunks)):]
+        start = len(self._offsets)
+        if start < len(self._chunks):
+            total = self._offsets[-1] + len(self._chunks[start - 1]) if start else self._shift
+            self._offsets.extend(accumulate(map(len, self._chunks[start:-1]), initial=total))
+        self._stale = len(self._chunks)
+
+    def _touch(self, k: int):
+        self._stale = min(self._stale, k + 1)
+
+    def _locate(self, index: int) -> Tuple[int, int]:
+        """Posisi → (index chunk, index di dalam chunk)"""
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError('queue index out of range')
+        self._refresh()
+        index += self._shift
+        k = bisect_right(self._offsets, index) - 1
+        return k, index - self._offsets[k]
+
+    def _counters(self, k: int) -> Tuple[Counter, Counter]:
+        """Counter requester & video chunk k, dihitung saat pertama dibutuhkan setelah rebuild"""
+        requesters = self._requesters[k]
+        if requesters is None:
+            chunk = self._chunks[k]
+            requesters = self._requesters[k] = Counter(map(requester_id, chunk))
+            self._videos[k] = Counter(map(video_id, chunk))
+        return requesters, self._videos[k]
+
+    def _count(self, song, delta: int, k: int):
+        self._len += delta
+        requesters, videos = self._counters(k)
+        videos[song.video_id] += delta
+        if videos[song.video_id] <= 0:
+            del videos[song.video_id]
+        user_id = requester_id(song)
+        requesters[user_id] += delta
+        if requesters[user_id] <= 0:
+            del requesters[user_id]
+
+    def _split(self, k: int):
+        chunk = self._chunks[k]
+        if len(chunk) <= 2 * self.chunk_size:
+            return
+        half = len(chunk) // 2
+        right = chunk[half:]
+        del chunk[half:]
+        self._chunks.insert(k + 1, right)
+        self._requesters[k] = Counter(map(requester_id, chunk))
+        self._requesters.insert(k + 1, Counter(map(requester_id, right)))
+        self._videos[k] = Counter(map(video_id, chunk))
+        self._videos.insert(k + 1, Counter(map(video_id, right)))
+        self._stale = min(self._stale, k + 1)
+
+    def _drop_if_empty(self, k: int):
+        if not self._chunks[k]:
+            del self._chunks[k]
+            del self._requesters[k]
+            del self._videos[k]
+            self._stale = min(self._stale, k)
+
+    def _added(self, song):
+        if self.journal is not None and song.video_id:
+            self.journal.append((song.queue_key, song.video_id, requester_id(song)))
+
+    def _removed(self, song):
+        if self.journal is not None:
+            self.journal.append((song.queue_key, None, None))
+
+    def _renumber(self, songs: Iterable):
+        for key, song in enumerate(songs):
+            song.queue_key = float(key)
+        if self.journal is not None:
+            self.journal[:] = [RESET]
+
+    def _key_between(self, k: int, i: int) -> float:
+        """Key untuk lagu yang disisipkan tepat sebelum chunk k index i"""
+        after = self._chunks[k][i].queue_key
+        if i:
+            before = self._chunks[k][i - 1].queue_key
+        elif k:
+            before = self._chunks[k - 1][-1].queue_key
+        else:
+            return after - 1
+        key = (before + after) / 2
+        if before < key < after:
+            return key
+        # Presisi float habis (banyak sisipan di titik yang sama)
+        self._respace(k)
+        return self._key_between(k, i)
+
+    def _respace(self, k: int):
+        """Sebar ulang key chunk k, diperlebar ke chunk tetangga sampai celahnya cukup"""
+        first = last = k
+        while True:
+            songs = list(chain.from_iterable(self._chunks[first:last + 1]))
+            low = self._chunks[first - 1][-1].queue_key if first else songs[0].queue_key - len(songs)
+            high = self._chunks[last + 1][0].queue_key if last + 1 < len(self._chunks) else low + len(songs) + 1
+            step = (high - low) / (len(songs) + 1)
+            if step > 1e-9 * max(abs(low), abs(high), 1.0):
+                break
+            first, last = max(first - 1, 0), min(last + 1, len(self._chunks) - 1)
+        for song in songs:
+            self._removed(song)
+        for j, song in enumerate(songs, 1):
+            song.queue_key = low + step * j
+            self._added(song)
+
+    def _rebuild(self, songs: list):
+        self._renumber(songs)
+        size = self.chunk_size
+        self._chunks = [songs[i:i + size] for i in range(0, len(songs), size)]
+        # Counter per chunk menyusul saat dibutuhkan: shuffle / clear tetap murah
+        self._requesters = [None] * len(self._chunks)
+        self._videos = [None] * len(self._chunks)
+        self._len = len(songs)
+        self._offsets = []
+        self._stale = 0
+        self._shift = 0
+
+    # ───────────────────────────────────────────────────────────
+    # Operasi ala deque
+    # ───────────────────────────────────────────────────────────
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __bool__(self) -> bool:
+        return self._len > 0
+
+    def __iter__(self) -> Iterator:
+        return chain.from_iterable(self._chunks)
+
+    def __getitem__(self, index: int):
+        if index == 0 and self._chunks:
+            return self._chunks[0][0]
+        k, i = self._locate(index)
+        return self._chunks[k][i]
+
+    def append(self, song):
+        song.queue_key = self._chunks[-1][-1].queue_key + 1 if self._chunks else 0.0
+        if not self._chunks or len(self._chunks[-1]) >= self.chunk_size:
+            self._chunks.append([])
+            self._requesters.append(Counter())
+            self._videos.append(Counter())
+        self._chunks[-1].append(song)
+        self._count(song, 1, len(self._chunks) - 1)
+        self._added(song)
+
+    def extend(self, songs: Iterable):
+        for song in songs:
+            self.append(song)
+
+    def insert(self, index: int, song):
+        """Sisipkan di posisi `index` (0 = paling depan, >= len = paling belakang)"""
+        index = max(index, 0)
+        if index >= self._len:
+            return self.append(song)
+        k, i = self._locate(index)
+        song.queue_key = self._key_between(k, i)
+        self._chunks[k].insert(i, song)
+        self._count(song, 1, k)
+        self._added(song)
+        self._touch(k)
+        self._split(k)
+
+    def appendleft(self, song):
+        self.insert(0, song)
+
+    def pop(self, index: int = -1):
+        k, i = self._locate(index)
+        song = self._chunks[k].pop(i)
+        self._count(song, -1, k)
+        self._removed(song)
+        self._touch(k)
+        self._drop_if_empty(k)
+        return song
+
+    def popleft(self):
+        if not self._len:
+            raise IndexError('pop from an empty queue')
+        chunk = self._chunks[0]
+        song = chunk.pop(0)
+        self._count(song, -1, 0)
+        self._removed(song)
+        self._shift += 1
+        if self._offsets:
+            self._offsets[0] += 1
+        if not chunk:
+            del self._chunks[0]
+            del self._requesters[0]
+            del self._videos[0]
+            if self._offsets:
+                del self._offsets[0]
+                self._stale = max(self._stale - 1, 0)
+        return song
+
+    def remove(self, song):
+        """Hapus lagu (objek yang sama); ValueError kalau tidak ada"""
+        for k, chunk in enumerate(self._chunks):
+            for i, item in enumerate(chunk):
+                if item is song:
+                    del chunk[i]
+                    self._count(song, -1, k)
+                    self._removed(song)
+                    self._touch(k)
+                    self._drop_if_empty(k)
+                    return
+        raise ValueError('song not in queue')
+
+    def clear(self):
+        self._rebuild([])
+
+    # ───────────────────────────────────────────────────────────
+    # Edit berdasarkan posisi
+    # ───────────────────────────────────────────────────────────
+
+    def move(self, source: int, target: int):
+        """Pindahkan lagu di posisi `source` ke posisi `target`"""
+        song = self.pop(source)
+        self.insert(target, song)
+        return song
+
+    def jump(self, index: int) -> list:
+        """Buang semua lagu sebelum posisi `index`, return lagu yang dibuang (urut)"""
+        index = max(min(index, self._len), 0)
+        if not index:
+            return []
+        if index == self._len:
+            skipped = list(self)
+            self.clear()
+            return skipped
+
+        k, i = self._locate(index)
+        skipped = []
+        for chunk in self._chunks[:k]:
+            skipped += chunk
+        skipped += self._chunks[k][:i]
+        # Chunk yang terlewati dibuang utuh beserta Counter-nya; hanya chunk
+        # pertama yang tersisa dihitung ulang (O(chunk))
+        del self._chunks[:k]
+        del self._requesters[:k]
+        del self._videos[:k]
+        head = self._chunks[0]
+        del head[:i]
+        self._requesters[0] = Counter(map(requester_id, head))
+        self._videos[0] = Counter(map(video_id, head))
+        self._len -= len(skipped)
+        self._offsets = []
+        self._stale = 0
+        self._shift = 0
+        if self.journal is not None:
+            self.journal.extend(zip(map(queue_key, skipped), repeat(None), repeat(None)))
+        return skipped
+
+    def shuffle(self):
+        songs = list(self)
+        random.shuffle(songs)
+        self._rebuild(songs)
+
+    # ───────────────────────────────────────────────────────────
+    # View & filter
+    # ───────────────────────────────────────────────────────────
+
+    def page(self, start: int, count: int) -> List[Tuple[int, object]]:
+        """(posisi, lagu) untuk satu halaman - hanya chunk yang terlihat yang disentuh"""
+        if start >= self._len or count <= 0:
+            return []
+        k, i = self._locate(max(start, 0))
+        result = []
+        position = max(start, 0)
+        while k < len(self._chunks) and len(result) < count:
+            for song in self._chunks[k][i:i + count - len(result)]:
+                result.append((position, song))
+                position += 1
+            k, i = k + 1, 0
+        return result
+
+    def count_requester(self, user_id: Optional[int]) -> int:
+        return sum(self._counters(k)[0].get(user_id, 0) for k in range(len(self._chunks)))
+
+    def by_requester(self, user_id: Optional[int], start: int = 0, count: int = 10) -> List[Tuple[int, object]]:
+        """Halaman lagu milik satu requester: (posisi di queue, lagu), chunk lain dilewati"""
+        self._refresh()
+        result = []
+        seen = 0
+        for k in range(len(self._chunks)):
+            matches = self._counters(k)[0].get(user_id, 0)
+            if not matches:
+                continue
+            if seen + matches <= start:
+                seen += matches
+                continue
+            for i, song in enumerate(self._chunks[k]):
+                if requester_id(song) != user_id:
+                    continue
+                if seen >= start:
+                    result.append((self._offsets[k] - self._shift + i, song))
+                    if len(result) >= count:
+                        return result
+                seen += 1
+        return result
+
+    def contains_video(self, video_id: Optional[str]) -> bool:
+        return bool(video_id) and any(video_id in self._counters(k)[1] for k in range(len(self._chunks)))
+
+    def dedup(self) -> int:
+        """Buang lagu duplikat (video yang sama), sisakan yang paling depan"""
+        videos = set(chain.from_iterable(self._counters(k)[1] for k in range(len(self._chunks))))
+        if len(videos) == self._len:
+            return 0
+        seen = set()
+        songs = []
+        for song in self:
+            if song.video_id and song.video_id in seen:
+                continue
+            seen.add(song.video_id)
+            songs.append(song)
+        removed = self._len - len(songs)
+        self._rebuild(songs)
+        return removed
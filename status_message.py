@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Optional
+
+import discord
+
+from metrics import STATUS_UPDATES_TOTAL
+
+logger = logging.getLogger('MusicBot.Status')
+
+# ═══════════════════════════════════════════════════════════════
+# KONFIGURASI PESAN NOW PLAYING
+# ═══════════════════════════════════════════════════════════════
+
+# Jarak minimal antar request HTTP per server (limit channel Discord: 5 / 5 detik)
+STATUS_MIN_INTERVAL = float(os.environ.get('STATUS_MIN_INTERVAL', '1.5'))
+
+# Tunggu sebentar supaya burst update (skip beruntun, lagu gagal) jadi satu edit
+STATUS_DEBOUNCE = float(os.environ.get('STATUS_DEBOUNCE', '0.3'))
+
+# Jumlah notifikasi terakhir (skip / error) yang ikut ditampilkan
+STATUS_NOTICES = 3
+
+
+class NowPlayingMessage:
+    """
+    Satu pesan "Now Playing" per server yang di-edit, bukan dikirim ulang.
+
+    `update()` / `notice()` hanya mengganti state lalu membangunkan task
+    pengirim - tidak pernah menunggu HTTP, jadi aman dipanggil dari jalur
+    playback. Task pengirim selalu merender state terbaru: update yang
+    datang selama request sebelumnya berjalan (atau selama discord.py
+    menunggu rate limit) digabung, versi lamanya dibuang.
+    """
+
+    def __init__(self, min_interval: float = STATUS_MIN_INTERVAL, debounce: float = STATUS_DEBOUNCE):
+        self.min_interval = min_interval
+        self.debounce = debounce
+        self.channel = None
+        self.message: Optional[discord.Message] = None
+        self._embed: Optional[discord.Embed] = None
+        self._notices: deque = deque(maxlen=STATUS_NOTICES)
+        self._notices_shown = False
+        self._pending = False
+        self._last_request = 0.0
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def update(self, channel, embed: discord.Embed):
+        """Ganti isi pesan (lagu baru, queue kosong)"""
+        # Notifikasi yang sudah sempat tampil tidak dibawa ke lagu berikutnya
+        if self._notices_shown:
+            self._notices.clear()
+            self._notices_shown = False
+        self._embed = embed
+        self._schedule(channel)
+
+    def notice(self, channel, text: str):
+        """Tambahkan notifikasi singkat ke pesan (lagu di-skip, error)"""
+        self._notices.append(text)
+        self._notices_shown = False
+        self._schedule(channel)
+
+    def close(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def _schedule(self, channel):
+        if channel is None:
+            return
+        if channel is not self.channel:
+            # Pindah text channel: pesan baru di channel baru
+            self.channel = channel
+            self.message = None
+        if self._pending:
+            STATUS_UPDATES_TOTAL.inc(result='coalesced')
+        self._pending = True
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        self._wakeup.set()
+
+    def _render(self) -> discord.Embed:
+        if self._embed is not None:
+            embed = self._embed.copy()
+        else:
+            embed = discord.Embed(color=discord.Color.orange())
+        if self._notices:
+            embed.add_field(name="ℹ️ Info", value='\n'.join(self._notices)[:1024], inline=False)
+            self._notices_shown = True
+        return embed
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            delay = max(self.debounce, self._last_request + self.min_interval - time.monotonic())
+            await asyncio.sleep(delay)
+            self._wakeup.clear()
+            if not self._pending:
+                continue
+            self._pending = False
+            try:
+                await self._publish(self._render())
+            except discord.RateLimited as e:
+                # Hanya terjadi kalau bot di-set max_ratelimit_timeout; coba lagi nanti
+                logger.warning(f"⏳ Now playing rate limited ({e.retry_after:.1f}s)")
+                STATUS_UPDATES_TOTAL.inc(result='rate_limited')
+                self._pending = True
+                self._wakeup.set()
+                await asyncio.sleep(e.retry_after)
+            except Exception as e:
+                logger.warning(f"Gagal update now playing: {str(e)[:80]}")
+                STATUS_UPDATES_TOTAL.inc(result='failed')
+            finally:
+                self._last_request = time.monotonic()
+
+    async def _publish(self, embed: discord.Embed):
+        channel = self.channel
+        if self.message is not None:
+            try:
+                message = await self.message.edit(embed=embed)
+                if channel is self.channel:
+                    self.message = message
+                STATUS_UPDATES_TOTAL.inc(result='edited')
+                return
+            except discord.NotFound:
+                # Pesan dihapus: kirim yang baru
+                self.message = None
+        message = await channel.send(embed=embed)
+        if channel is self.channel:
+            self.message = message
+        STATUS_UPDATES_TOTAL.inc(result='sent')
@@ -0,0 +1,85 @@
+"""
+Setup bersama untuk test: semua state (SQLite, cache audio) di direktori
+sementara, tanpa auto-update yt-dlp, dan yt-dlp "palsu" yang tetap memakai
+error handling yt_dlp.YoutubeDL asli.
+"""
+import os
+import sys
+import tempfile
+
+os.environ['DATA_DIR'] = tempfile.mkdtemp(prefix='musicbot-test-')
+os.environ['YTDLP_UPDATE'] = 'off'
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+import yt_dlp
+from yt_dlp.extractor.common import InfoExtractor
+from yt_dlp.utils import ExtractorError
+
+
+class ScriptedYoutube:
+    """Jawaban extractor per URL: `errors[substring] = pesan ExtractorError`"""
+
+    def __init__(self):
+        self.errors = {}
+        self.calls = []
+
+    def info(self, url: str) -> dict:
+        video_id = url.rsplit('=', 1)[-1][-11:].rjust(11, '0')
+        return {
+            'id': video_id,
+            'title': f"Song {video_id}",
+            'url': f"https://rr1.googlevideo.com/videoplayback?id={video_id}",
+            'ext': 'webm',
+            'acodec': 'opus',
+            'vcodec': 'none',
+            'duration': 180,
+        }
+
+
+@pytest.fixture
+def youtube(monkeypatch) -> ScriptedYoutube:
+    """Ganti extractor yt-dlp; YoutubeDL (ignoreerrors, DownloadError, dll) tetap asli"""
+    script = ScriptedYoutube()
+
+    class ScriptedIE(InfoExtractor):
+        IE_NAME = 'youtube'
+        _VALID_URL = r'.+'
+
+        def _real_extract(self, url):
+            script.calls.append(url)
+            for needle, message in script.errors.items():
+                if needle in url:
+                    raise ExtractorError(message, expected=True, video_id=url[-11:])
+            info = script.info(url)
+            return self.playlist_result([info]) if url.startswith('ytsearch') else info
+
+    real = yt_dlp.YoutubeDL
+
+    class ScriptedYoutubeDL(real):
+        def __init__(self, params=None, auto_init=True):
+            super().__init__(params, auto_init=False)
+            self.add_info_extractor(ScriptedIE())
+
+    monkeypatch.setattr(yt_dlp, 'YoutubeDL', ScriptedYoutubeDL)
+    return script
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    """time.monotonic yang hanya maju lewat clock.advance()"""
+    fake = Clock()
+    monkeypatch.setattr('time.monotonic', fake)
+    return fake
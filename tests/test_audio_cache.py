@@ -0,0 +1,139 @@
+import asyncio
+import os
+import subprocess
+import time
+from types import SimpleNamespace
+
+import audio_cache
+from audio_cache import PARTIAL_STALE_SECONDS, AudioCache
+
+
+def write(directory, name, size, age=0):
+    path = os.path.join(directory, name)
+    with open(path, 'wb') as f:
+        f.write(b'\0' * size)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def song(video_id, duration=200):
+    return SimpleNamespace(
+        video_id=video_id, duration=duration, acodec='opus',
+        stream_url=f"https://x.googlevideo.com/videoplayback?id={video_id}"
+    )
+
+
+class FakeFfmpeg:
+    """create_subprocess_exec palsu: tulis `size` byte ke file output, exit dengan `returncode`"""
+
+    def __init__(self, size=100, returncode=0, write=True):
+        self.size = size
+        self.returncode = returncode
+        self.write = write
+
+    async def __call__(self, *args, **kwargs):
+        output = args[-1]
+        if self.write:
+            with open(output, 'wb') as f:
+                f.write(b'\0' * self.size)
+        fake = self
+
+        class Proc:
+            pid = 999999
+            returncode = fake.returncode
+
+            async def communicate(self):
+                return b'', b'Invalid data found when processing input'
+
+        return Proc()
+
+
+def download(cache, *songs):
+    async def run():
+        for item in songs:
+            cache.schedule(item)
+            await asyncio.gather(*cache._tasks.values())
+    asyncio.run(run())
+
+
+def test_eviction_keeps_cache_under_budget_lru(tmp_path):
+    directory = str(tmp_path)
+    write(directory, 'aaaaaaaaaaa.ogg', 400, age=30)
+    write(directory, 'bbbbbbbbbbb.ogg', 400, age=20)
+    write(directory, 'ccccccccccc.ogg', 400, age=10)
+    cache = AudioCache(directory, max_bytes=1000)
+
+    # Dipakai lagi: jadi yang paling baru
+    assert cache.path('aaaaaaaaaaa')
+    cache.evict()
+    assert not os.path.exists(os.path.join(directory, 'bbbbbbbbbbb.ogg'))
+    assert cache.contains('aaaaaaaaaaa') and cache.contains('ccccccccccc')
+    assert cache.total_bytes == 800
+
+
+def test_download_is_cached_then_evicts_oldest(tmp_path, monkeypatch):
+    directory = str(tmp_path)
+    write(directory, 'aaaaaaaaaaa.ogg', 600, age=10)
+    monkeypatch.setattr(audio_cache.asyncio, 'create_subprocess_exec', FakeFfmpeg(size=500))
+    cache = AudioCache(directory, max_bytes=1000)
+
+    download(cache, song('ddddddddddd'))
+    assert cache.path('ddddddddddd') == os.path.join(directory, 'ddddddddddd.ogg')
+    assert not cache.contains('aaaaaaaaaaa')
+    assert cache.total_bytes == 500
+    assert not [name for name in os.listdir(directory) if name.endswith('.part')]
+
+
+def test_failed_download_leaves_nothing_behind(tmp_path, monkeypatch):
+    directory = str(tmp_path)
+    monkeypatch.setattr(audio_cache.asyncio, 'create_subprocess_exec', FakeFfmpeg(returncode=1))
+    cache = AudioCache(directory, max_bytes=1000)
+
+    download(cache, song('eeeeeeeeeee'))
+    assert not cache.contains('eeeeeeeeeee')
+    assert os.listdir(directory) == []
+
+
+def test_missing_partial_on_finalize_is_a_miss(tmp_path, monkeypatch):
+    directory = str(tmp_path)
+    # ffmpeg "berhasil" tapi file .part hilang (direktori dibersihkan dari luar)
+    monkeypatch.setattr(audio_cache.asyncio, 'create_subprocess_exec', FakeFfmpeg(write=False))
+    cache = AudioCache(directory, max_bytes=1000)
+
+    download(cache, song('fffffffffff'))
+    assert not cache.contains('fffffffffff')
+
+
+def test_stale_partials_are_removed_on_load(tmp_path):
+    directory = str(tmp_path)
+    other = subprocess.Popen(['sleep', '30'])
+    dead = subprocess.Popen(['true'])
+    dead.wait()
+    try:
+        live = write(directory, f"aaaaaaaaaaa.{other.pid}.part", 10)
+        own = write(directory, f"bbbbbbbbbbb.{os.getpid()}.part", 10)
+        orphan = write(directory, f"ccccccccccc.{dead.pid}.part", 10)
+        old = write(directory, f"ddddddddddd.{other.pid}.part", 10, age=PARTIAL_STALE_SECONDS + 60)
+        junk = write(directory, "eeeeeeeeeee.part", 10)
+
+        cache = AudioCache(directory, max_bytes=1000)
+        assert cache.total_bytes == 0
+        # Download worker lain yang masih jalan tidak disentuh
+        assert os.path.exists(live)
+        assert not any(os.path.exists(path) for path in (own, orphan, old))
+        # Nama tidak dikenali: dibiarkan (bukan milik cache ini)
+        assert os.path.exists(junk)
+    finally:
+        other.kill()
+        other.wait()
+
+
+def test_deleted_file_is_dropped_from_index(tmp_path):
+    directory = str(tmp_path)
+    path = write(directory, 'aaaaaaaaaaa.ogg', 100)
+    cache = AudioCache(directory, max_bytes=1000)
+    assert cache.contains('aaaaaaaaaaa')
+    os.remove(path)
+    assert cache.path('aaaaaaaaaaa') is None
+    assert not cache.contains('aaaaaaaaaaa')
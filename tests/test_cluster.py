@@ -0,0 +1,72 @@
+import asyncio
+import json
+
+from cluster import IDENTIFY_INTERVAL, Supervisor, Worker, assign_shards, identify_time, merge_metrics
+
+
+def test_uneven_shards_are_split_into_contiguous_blocks():
+    blocks = assign_shards(10, 3)
+    assert blocks == [[0, 1, 2, 3], [4, 5, 6], [7, 8, 9]]
+    assert sorted(shard for block in blocks for shard in block) == list(range(10))
+
+
+def test_more_processes_than_shards():
+    assert assign_shards(2, 5) == [[0], [1]]
+    assert assign_shards(3, 0) == [[0, 1, 2]]
+
+
+def test_identify_time_uses_max_concurrency():
+    assert identify_time([0, 1, 2, 3], 1) == 4 * IDENTIFY_INTERVAL
+    assert identify_time([0, 1, 2, 3], 16) == IDENTIFY_INTERVAL
+    assert identify_time([4, 5, 6], 2) == 2 * IDENTIFY_INTERVAL
+
+
+WORKER_METRICS = '''# HELP musicbot_plays_total Lagu yang diputar
+# TYPE musicbot_plays_total counter
+musicbot_plays_total {plays}
+# HELP musicbot_extractions_total Extraction per method
+# TYPE musicbot_extractions_total counter
+musicbot_extractions_total{{method="1",outcome="success"}} {extractions}
+'''
+
+
+def test_merged_metrics_keep_one_sample_per_worker():
+    merged = merge_metrics({
+        '0': WORKER_METRICS.format(plays=3, extractions=5),
+        '1': WORKER_METRICS.format(plays=4, extractions=7),
+    })
+    lines = merged.splitlines()
+    # Header satu kali per family, sample tiap worker diberi label cluster
+    assert lines.count('# TYPE musicbot_plays_total counter') == 1
+    assert 'musicbot_plays_total{cluster="0"} 3' in lines
+    assert 'musicbot_plays_total{cluster="1"} 4' in lines
+    assert 'musicbot_extractions_total{cluster="1",method="1",outcome="success"} 7' in lines
+
+    # sum by (family) di Prometheus = total semua worker
+    totals = {}
+    for line in lines:
+        if line.startswith('#'):
+            continue
+        name, value = line.split('{', 1)[0], float(line.rsplit(' ', 1)[1])
+        totals[name] = totals.get(name, 0) + value
+    assert totals == {'musicbot_plays_total': 7, 'musicbot_extractions_total': 12}
+
+
+def test_stats_sum_across_workers():
+    supervisor = Supervisor('token', processes=3, shard_count=10)
+    supervisor.workers = [Worker(i, block, 9000 + i) for i, block in enumerate(assign_shards(10, 3))]
+    responses = [
+        (200, json.dumps({'guilds': 120, 'voice_connections': 4, 'players': 6})),
+        (200, json.dumps({'guilds': 80, 'voice_connections': 1, 'players': 2})),
+        # Worker yang sedang restart tidak ikut dihitung
+        (0, 'connection refused'),
+    ]
+
+    async def fetch_all(path):
+        return responses
+
+    supervisor._fetch_all = fetch_all
+    stats = asyncio.run(supervisor.stats())
+    assert (stats['guilds'], stats['voice_connections'], stats['players']) == (200, 5, 8)
+    assert [cluster['shards'] for cluster in stats['clusters']] == [[0, 1, 2, 3], [4, 5, 6], [7, 8, 9]]
+    assert 'guilds' not in stats['clusters'][2]
@@ -0,0 +1,60 @@
+import pytest
+
+from extract_scheduler import is_throttled
+from extraction import classify_error
+
+# Pesan DownloadError yt-dlp apa adanya (str(e))
+FATAL = [
+    ("ERROR: [youtube] dQw4w9WgXcQ: Private video. Sign in if you've been granted access to this video",
+     "Video is private"),
+    ("ERROR: [youtube] dQw4w9WgXcQ: Video unavailable. This video has been removed by the uploader",
+     "Video was removed"),
+    ("ERROR: [youtube] dQw4w9WgXcQ: Video unavailable. This video is no longer available because the "
+     "YouTube account associated with this video has been terminated.",
+     "Video was removed"),
+    ("ERROR: [youtube] dQw4w9WgXcQ: Video unavailable. This video contains content from SME, "
+     "who has blocked it on copyright grounds",
+     "Video blocked due to copyright"),
+    ("ERROR: [youtube] dQw4w9WgXcQ: Join this channel to get access to members-only content "
+     "like this video, and other exclusive perks.",
+     "Video is members-only"),
+    ("ERROR: [youtube] dQw4w9WgXcQ: The uploader has not made this video available in your country",
+     "Video is not available in this region"),
+    ("ERROR: [youtube] dQw4w9WgXcQ: Video unavailable", "Video is unavailable"),
+]
+
+THROTTLED = [
+    "ERROR: [youtube] dQw4w9WgXcQ: Sign in to confirm you’re not a bot. Use --cookies-from-browser "
+    "or --cookies for the authentication.",
+    "ERROR: unable to download video data: HTTP Error 429: Too Many Requests",
+]
+
+# Bisa dicoba lagi dengan method lain, tapi bukan rate limit
+RETRYABLE = [
+    "ERROR: [youtube] dQw4w9WgXcQ: Sign in to confirm your age. This video may be inappropriate for some users.",
+    "ERROR: unable to download video data: HTTP Error 403: Forbidden",
+    "ERROR: [youtube] dQw4w9WgXcQ: Requested format is not available. Use --list-formats for a list of available formats",
+]
+
+
+@pytest.mark.parametrize('message, reason', FATAL)
+def test_unplayable_videos_are_fatal(message, reason):
+    assert classify_error(message) == reason
+    assert not is_throttled(message)
+
+
+@pytest.mark.parametrize('message', THROTTLED)
+def test_rate_limits_are_throttling(message):
+    assert is_throttled(message)
+    assert classify_error(message) is None
+
+
+@pytest.mark.parametrize('message', RETRYABLE)
+def test_other_errors_are_retryable(message):
+    assert classify_error(message) is None
+    assert not is_throttled(message)
+
+
+def test_no_message_is_not_throttling():
+    assert not is_throttled(None)
+    assert not is_throttled('')
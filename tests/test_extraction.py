@@ -0,0 +1,221 @@
+import asyncio
+import sqlite3
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from extraction import (
+    HEDGE_DELAY, HEDGE_DELAY_MAX, HEDGE_DELAY_MIN, UNAVAILABLE, MethodStats, NegativeCache, run_extraction
+)
+import music_cog
+from music_cog import Music
+from extract_scheduler import PRIORITY_INTERACTIVE, SCHEDULER, ExtractionScheduler
+from search_cache import SEARCH_CACHE
+
+PRIVATE = "Private video. Sign in if you've been granted access to this video"
+BOT_CHECK = "Sign in to confirm you’re not a bot. Use --cookies-from-browser or --cookies for the authentication."
+
+
+def test_run_extraction_returns_stream(youtube):
+    data, warning, fatal = run_extraction('https://www.youtube.com/watch?v=dQw4w9WgXcQ', 0)
+    assert warning is None and fatal is None
+    assert data['id'] == 'dQw4w9WgXcQ'
+    assert data['url'].startswith('https://')
+    # Hanya field yang dipakai bot
+    assert 'formats' not in data
+
+
+def test_run_extraction_reports_private_video_as_fatal(youtube):
+    youtube.errors['aaaaaaaaaaa'] = PRIVATE
+    data, warning, fatal = run_extraction('https://www.youtube.com/watch?v=aaaaaaaaaaa', 0)
+    assert data is None
+    assert 'Private video' in warning
+    assert fatal == "Video is private"
+
+
+def test_run_extraction_keeps_throttling_message(youtube):
+    youtube.errors['ytsearch'] = BOT_CHECK
+    data, warning, fatal = run_extraction('ytsearch:lagu', 0)
+    assert data is None and fatal is None
+    assert 'not a bot' in warning
+
+
+def test_unavailable_video_stops_after_first_method(youtube):
+    youtube.errors['bbbbbbbbbbb'] = "Video unavailable. This video has been removed by the uploader"
+    cog = Music(bot=None)
+
+    async def play():
+        return await cog.extract_info('https://youtu.be/bbbbbbbbbbb')
+
+    assert asyncio.run(play()) is None
+    # Method lain tidak dicoba, dan video diingat di negative cache
+    assert len(youtube.calls) == 1
+    assert UNAVAILABLE.get('v:bbbbbbbbbbb') == "Video was removed"
+
+    # Request berikutnya tidak menyentuh yt-dlp sama sekali
+    assert asyncio.run(play()) is None
+    assert len(youtube.calls) == 1
+
+
+def test_locked_search_cache_is_a_miss(youtube, monkeypatch):
+    def locked(*args):
+        raise sqlite3.OperationalError('database is locked')
+
+    monkeypatch.setattr(SEARCH_CACHE, '_lookup', locked)
+    data = asyncio.run(Music(bot=None).extract_info('lagu yang dicache'))
+    assert data is not None
+    assert youtube.calls[0].startswith('ytsearch')
+
+
+def test_search_cache_write_does_not_delay_play(youtube, monkeypatch):
+    release = threading.Event()
+    stored = []
+
+    def slow_store(query, data):
+        release.wait(5)
+        stored.append((query, data['id']))
+
+    monkeypatch.setattr(SEARCH_CACHE, '_store', slow_store)
+
+    async def play():
+        data = await Music(bot=None).extract_info('lagu baru')
+        # Tulis cache masih tertahan, tapi hasil extract sudah kembali
+        assert stored == []
+        release.set()
+        while not stored:
+            await asyncio.sleep(0.01)
+        return data
+
+    data = asyncio.run(play())
+    assert stored == [('lagu baru', data['id'])]
+
+
+def test_unplayable_list_falls_back_to_the_video(youtube):
+    youtube.errors['list='] = "The playlist does not exist"
+    cog = Music(bot=None)
+    player = cog.get_player(1)
+    ctx = SimpleNamespace(guild=SimpleNamespace(id=1), author=None, voice_client=None)
+
+    async def enqueue():
+        return await cog._enqueue_playlist(ctx, player, 'https://www.youtube.com/watch?v=ccccccccccc&list=LL', None)
+
+    granted = sum(SCHEDULER.granted)
+    # False: caller memutar watch?v=ccccccccccc seperti URL video biasa
+    assert asyncio.run(enqueue()) is False
+    assert not player.queue
+    assert len(youtube.calls) == 1
+    # Request playlist ikut rate limit scheduler
+    assert sum(SCHEDULER.granted) == granted + 1
+
+
+def test_method_stats_prefers_fast_reliable_method():
+    stats = MethodStats(methods=3, window=10)
+    for _ in range(10):
+        stats.record(0, False, 1.0)
+        stats.record(1, True, 2.0)
+    stats.record(2, True, 0.5)
+    stats.record(2, False, 0.5)
+
+    # Method 0 selalu gagal, method 2 cepat tapi baru setengah berhasil
+    assert stats.order() == [2, 1, 0]
+    assert stats.success_rate(0) == pytest.approx(1 / 12)
+    assert stats.latency(1) == pytest.approx(2.0)
+
+
+def test_method_stats_window_forgets_old_results():
+    stats = MethodStats(methods=1, window=4)
+    for _ in range(4):
+        stats.record(0, False, 1.0)
+    for _ in range(4):
+        stats.record(0, True, 1.0)
+    assert stats.summary()[0] == {'success_rate': pytest.approx(5 / 6, abs=1e-3), 'latency': 1.0, 'samples': 4}
+
+
+def test_method_stats_budget():
+    stats = MethodStats(methods=3)
+    # Belum ada sampel berhasil: pakai HEDGE_DELAY
+    assert stats.budget(0) == HEDGE_DELAY
+    stats.record(1, True, 0.1)
+    stats.record(2, True, 60.0)
+    assert stats.budget(1) == HEDGE_DELAY_MIN
+    assert stats.budget(2) == HEDGE_DELAY_MAX
+
+
+def test_negative_cache_expires(clock):
+    cache = NegativeCache(ttl=60, size=10)
+    cache.add('v:aaaaaaaaaaa', "Video is private")
+    clock.advance(59)
+    assert cache.get('v:aaaaaaaaaaa') == "Video is private"
+    clock.advance(2)
+    assert cache.get('v:aaaaaaaaaaa') is None
+
+
+def test_negative_cache_drops_oldest_entry():
+    cache = NegativeCache(ttl=60, size=2)
+    cache.add('a', "Video is private")
+    cache.add('b', "Video is private")
+    # Ditambah ulang = paling baru
+    cache.add('a', "Video was removed")
+    cache.add('c', "Video is private")
+    assert cache.get('b') is None
+    assert cache.get('a') == "Video was removed"
+    assert cache.get('c') == "Video is private"
+
+
+class SlowBackend:
+    """Backend palsu: setiap extraction makan `seconds` setelah dapat slot"""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.calls = []
+
+    async def extract(self, query, method, on_start=None):
+        self.calls.append(method)
+        if on_start is not None:
+            on_start()
+        await asyncio.sleep(self.seconds)
+        video_id = query[-11:]
+        return {'id': video_id, 'title': video_id, 'url': f"https://x.googlevideo.com/{video_id}"}, None, None
+
+
+def test_method_latency_excludes_scheduler_wait(monkeypatch):
+    backend = SlowBackend(0.05)
+    stats = MethodStats()
+    monkeypatch.setattr(music_cog, 'SCHEDULER', ExtractionScheduler(backend, rate=20, burst=2))
+    monkeypatch.setattr(music_cog, 'METHOD_STATS', stats)
+    cog = Music(bot=None)
+
+    async def burst():
+        await asyncio.gather(*(
+            cog._extract_with_method(f"https://youtu.be/{i:011d}", 0, guild_id=i) for i in range(12)
+        ))
+
+    asyncio.run(burst())
+    # Request terakhir antri ~0.5s di token bucket; yang dicatat hanya ~0.05s
+    assert stats.summary()[0]['samples'] == 12
+    assert stats.latency(0) < 0.1
+
+
+def test_hedge_budget_starts_when_method_runs(monkeypatch):
+    backend = SlowBackend(0.05)
+    scheduler = ExtractionScheduler(backend, rate=4, burst=1)
+    scheduler.bucket.drain()
+    monkeypatch.setattr(music_cog, 'SCHEDULER', scheduler)
+    monkeypatch.setattr(music_cog, 'METHOD_STATS', SimpleNamespace(budget=lambda method: 0.1, record=lambda *args: None))
+    cog = Music(bot=None)
+    launched = []
+    extract_with_method = cog._extract_with_method
+
+    def spy(query, method, *args):
+        launched.append(method)
+        return extract_with_method(query, method, *args)
+
+    monkeypatch.setattr(cog, '_extract_with_method', spy)
+
+    async def play():
+        return await cog._extract_hedged('https://youtu.be/ccccccccccc', [0, 1], None, PRIORITY_INTERACTIVE)
+
+    # Method 1 menunggu token ~0.25s (lebih lama dari budget), tapi yt-dlp-nya cepat: tidak perlu hedge
+    assert asyncio.run(play())['id'] == 'ccccccccccc'
+    assert launched == [0]
@@ -0,0 +1,59 @@
+import threading
+from array import array
+
+from gapless import OPUS_SILENCE, GaplessSource, mix
+
+
+class Song:
+    def __init__(self, title, duration=60):
+        self.title = title
+        self.duration = duration
+
+
+class SlowSource:
+    """Frame Opus palsu; frame pertama baru keluar setelah `ready` di-set (FFmpeg baru start)"""
+
+    def __init__(self, frames, ready=None):
+        self.frames = list(frames)
+        self.ready = ready
+        self.cleaned = False
+
+    def read(self):
+        if self.ready is not None:
+            self.ready.wait()
+        return self.frames.pop(0) if self.frames else b''
+
+    def is_opus(self):
+        return True
+
+    def cleanup(self):
+        self.cleaned = True
+
+
+def test_switch_does_not_wait_for_slow_next_track():
+    ready = threading.Event()
+    transitions = []
+    engine = GaplessSource(
+        Song('a'), SlowSource([b'a1']), on_need_next=lambda: None, on_transition=transitions.append
+    )
+    engine.set_next(Song('b'), SlowSource([b'b1', b'b2'], ready))
+
+    assert engine.read() == b'a1'
+    # Lagu a habis, FFmpeg lagu b belum menghasilkan frame: hening, bukan blok
+    assert engine.read() == OPUS_SILENCE
+    assert [song.title for song in transitions] == ['b']
+
+    ready.set()
+    frames = []
+    while len(frames) < 2:
+        data = engine.read()
+        if data != OPUS_SILENCE:
+            frames.append(data)
+    assert frames == [b'b1', b'b2']
+    assert engine.read() == b''
+
+
+def test_mix_matches_weighted_sum():
+    a = array('h', [1000, -2000, 32767, -32768]).tobytes()
+    b = array('h', [3000, 2000, 32767, -32768]).tobytes()
+    assert array('h', mix(a, b, 0.25, 0.75)).tolist() == [2500, 1000, 32767, -32768]
@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+
+import discord
+
+import gateway
+from gateway import TRIMMED_EVENTS, UNUSED_GUILD_FIELDS, trim_guild_payloads
+
+
+def client_with_parsers():
+    seen = {}
+
+    def parser(event):
+        def parse(data):
+            seen[event] = dict(data)
+        return parse
+
+    parsers = {event: parser(event) for event in (*TRIMMED_EVENTS, 'MESSAGE_CREATE')}
+    return SimpleNamespace(_connection=SimpleNamespace(parsers=parsers)), parsers, seen
+
+
+def guild_payload():
+    payload = {'id': '1', 'name': 'server', 'channels': [], 'voice_states': []}
+    payload.update({field: [{'id': '9'}] for field in UNUSED_GUILD_FIELDS})
+    return payload
+
+
+def test_trims_guild_payloads_on_tested_version(monkeypatch):
+    monkeypatch.setattr(discord, '__version__', '2.3.2')
+    client, parsers, seen = client_with_parsers()
+    original = dict(parsers)
+
+    assert trim_guild_payloads(client)
+    for event in TRIMMED_EVENTS:
+        assert parsers[event] is not original[event]
+        parsers[event](guild_payload())
+        assert seen[event] == {'id': '1', 'name': 'server', 'channels': [], 'voice_states': []}
+    # Event lain tidak dibungkus
+    assert parsers['MESSAGE_CREATE'] is original['MESSAGE_CREATE']
+
+
+def test_other_versions_are_left_alone(monkeypatch):
+    monkeypatch.setattr(discord, '__version__', '2.4.0')
+    client, parsers, _ = client_with_parsers()
+    original = dict(parsers)
+    assert not trim_guild_payloads(client)
+    assert parsers == original
+
+
+def test_missing_parsers_are_left_alone(monkeypatch):
+    monkeypatch.setattr(discord, '__version__', '2.3.2')
+    client, parsers, _ = client_with_parsers()
+    del parsers['GUILD_UPDATE']
+    original = dict(parsers)
+    assert not trim_guild_payloads(client)
+    assert parsers == original
+
+    # Client tanpa ConnectionState sama sekali
+    assert not trim_guild_payloads(SimpleNamespace())
+
+
+def test_setup_client_trims_only_in_low_memory_mode(monkeypatch):
+    calls = []
+    monkeypatch.setattr(gateway, 'trim_guild_payloads', calls.append)
+    gateway.setup_client('client', low_memory=False)
+    gateway.setup_client('client', low_memory=True)
+    assert calls == ['client']
+
+
+def test_real_client_parsers_are_wrapped():
+    # Memastikan nama internal (_connection.parsers, GUILD_CREATE) cocok dengan discord.py yang terpasang
+    client = discord.Client(intents=discord.Intents.none())
+    version = '.'.join(discord.__version__.split('.')[:2])
+    assert trim_guild_payloads(client) == (version in gateway.TRIM_TESTED_VERSIONS)
@@ -0,0 +1,107 @@
+import asyncio
+import subprocess
+from types import SimpleNamespace
+
+import idle_reaper
+from idle_reaper import IdleReaper, source_pids
+
+
+class VoiceClient:
+    def __init__(self, guild_id, members=(), playing=False, source=None):
+        self.guild = SimpleNamespace(id=guild_id)
+        self.channel = SimpleNamespace(members=list(members))
+        self.playing = playing
+        self.source = source
+
+    def is_playing(self):
+        return self.playing
+
+
+def member(bot=False):
+    return SimpleNamespace(bot=bot)
+
+
+def reaper_for(voice_clients, players=None):
+    released = []
+
+    async def release(guild_id, reason):
+        released.append((guild_id, reason))
+
+    bot = SimpleNamespace(voice_clients=voice_clients)
+    reaper = IdleReaper(
+        bot, players if players is not None else {}, release, set,
+        idle_timeout=300, alone_timeout=60, evict_after=600
+    )
+    return reaper, released
+
+
+def test_empty_channel_is_disconnected_after_timeout(clock, monkeypatch):
+    monkeypatch.setattr(idle_reaper, 'ffmpeg_pids', list)
+    voice = VoiceClient(1, members=[member(bot=True)], playing=True)
+    reaper, released = reaper_for([voice])
+
+    asyncio.run(reaper.sweep())
+    clock.advance(59)
+    asyncio.run(reaper.sweep())
+    assert released == []
+
+    clock.advance(1)
+    asyncio.run(reaper.sweep())
+    assert released == [(1, 'alone')]
+
+
+def test_listener_resets_alone_timer(clock, monkeypatch):
+    monkeypatch.setattr(idle_reaper, 'ffmpeg_pids', list)
+    voice = VoiceClient(1, members=[member(bot=True)], playing=True)
+    reaper, released = reaper_for([voice])
+
+    asyncio.run(reaper.sweep())
+    clock.advance(50)
+    voice.channel.members.append(member())
+    asyncio.run(reaper.sweep())
+    voice.channel.members.pop()
+    clock.advance(50)
+    asyncio.run(reaper.sweep())
+    assert released == []
+
+
+def test_idle_player_and_disconnected_player(clock, monkeypatch):
+    monkeypatch.setattr(idle_reaper, 'ffmpeg_pids', list)
+    voice = VoiceClient(1, members=[member()], playing=False)
+    reaper, released = reaper_for([voice], players={1: object(), 2: object()})
+
+    asyncio.run(reaper.sweep())
+    clock.advance(300)
+    asyncio.run(reaper.sweep())
+    assert released == [(1, 'idle')]
+
+    # Guild 2 tidak punya koneksi voice: dibuang setelah evict_after
+    clock.advance(300)
+    asyncio.run(reaper.sweep())
+    assert released == [(1, 'idle'), (2, 'evict')]
+
+
+def test_stray_ffmpeg_is_killed_and_live_source_kept(monkeypatch):
+    live = subprocess.Popen(['sleep', '30'])
+    stray = subprocess.Popen(['sleep', '30'])
+    try:
+        # Source dibungkus seperti PCMVolumeTransformer(FFmpegOpusAudio)
+        source = SimpleNamespace(original=SimpleNamespace(_process=live))
+        assert source_pids(source) == {live.pid}
+
+        monkeypatch.setattr(idle_reaper, 'ffmpeg_pids', lambda: [live.pid, stray.pid])
+        reaper, _ = reaper_for([VoiceClient(1, members=[member()], playing=True, source=source)])
+
+        # Sweep pertama hanya mencurigai (source baru mungkin belum di-play)
+        reaper.reap_stray_ffmpeg()
+        assert stray.poll() is None
+        reaper.reap_stray_ffmpeg()
+        assert reaper.killed == 1
+        # Sudah mati (kalau tidak, sleep 30 membuat wait timeout)
+        stray.wait(timeout=5)
+        assert live.poll() is None
+    finally:
+        for proc in (live, stray):
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
@@ -0,0 +1,77 @@
+import os
+
+import pytest
+
+from loudness import (
+    LOUDNESS_MAX_BOOST, LOUDNESS_MAX_CUT, LOUDNESS_PEAK_CEILING, LOUDNESS_TARGET, LoudnessAnalyzer, parse_ebur128
+)
+
+# stderr ffmpeg -af ebur128=peak=true -f null - (dipotong)
+EBUR128 = """\
+Input #0, matroska,webm, from 'https://rr1.googlevideo.com/videoplayback?...':
+  Duration: 00:03:32.04, start: -0.007000, bitrate: 134 kb/s
+  Stream #0:0(eng): Audio: opus, 48000 Hz, stereo, fltp (default)
+[Parsed_ebur128_0 @ 0x55d0c8a3c040] t: 0.0999792  TARGET:-23 LUFS    M:-120.7 S:-120.7     I: -70.0 LUFS       LRA:   0.0 LU  FTPK: -inf -inf dBFS  TPK: -inf -inf dBFS
+[Parsed_ebur128_0 @ 0x55d0c8a3c040] t: 211.9       TARGET:-23 LUFS    M: -9.8 S: -10.4     I:  -8.6 LUFS       LRA:   4.1 LU  FTPK: -0.4 -0.5 dBFS  TPK:  0.3  0.2 dBFS
+[Parsed_ebur128_0 @ 0x55d0c8a3c040] Summary:
+
+  Integrated loudness:
+    I:          -8.7 LUFS
+    Threshold: -18.9 LUFS
+
+  Loudness range:
+    LRA:         4.1 LU
+    Threshold: -28.9 LUFS
+    LRA low:    -12.0 LUFS
+    LRA high:    -7.9 LUFS
+
+  True peak:
+    Peak:        0.4 dBFS
+"""
+
+
+def test_parse_uses_summary_not_running_values():
+    assert parse_ebur128(EBUR128) == (-8.7, 0.4)
+
+
+def test_parse_silence_and_missing_peak():
+    silent = EBUR128.replace('I:          -8.7 LUFS', 'I:          -inf LUFS')
+    assert parse_ebur128(silent) is None
+    no_peak = EBUR128[:EBUR128.index('  True peak:')]
+    assert parse_ebur128(no_peak) == (-8.7, None)
+    assert parse_ebur128('Invalid data found when processing input') is None
+
+
+def analyzer(tmp_path, **values):
+    loudness = LoudnessAnalyzer(os.path.join(tmp_path, 'loudness.db'), enabled=True)
+    loudness._values = values
+    return loudness
+
+
+def test_gain_from_canned_summary(tmp_path):
+    loudness = analyzer(tmp_path, aaaaaaaaaaa=parse_ebur128(EBUR128))
+    # Terlalu keras: diturunkan ke target
+    assert loudness.gain('aaaaaaaaaaa') == pytest.approx(LOUDNESS_TARGET + 8.7)
+
+
+def test_gain_is_clamped(tmp_path):
+    loudness = analyzer(
+        tmp_path,
+        quiet=(-40.0, -30.0),
+        loud=(5.0, 0.0),
+        peaky=(-20.0, -3.0),
+        close=(LOUDNESS_TARGET - 0.2, -10.0),
+    )
+    assert loudness.gain('quiet') == LOUDNESS_MAX_BOOST
+    assert loudness.gain('loud') == -LOUDNESS_MAX_CUT
+    # Boost dibatasi supaya peak tidak lewat LOUDNESS_PEAK_CEILING
+    assert loudness.gain('peaky') == pytest.approx(LOUDNESS_PEAK_CEILING + 3.0)
+    # Selisih kecil tidak perlu filter volume
+    assert loudness.gain('close') == 0.0
+    assert loudness.gain('unknown') == 0.0
+
+
+def test_disabled_analyzer_never_changes_gain(tmp_path):
+    loudness = analyzer(tmp_path, quiet=(-40.0, -30.0))
+    loudness.enabled = False
+    assert loudness.gain('quiet') == 0.0
@@ -0,0 +1,26 @@
+import time
+
+from prefetch import DEFAULT_STREAM_TTL, stream_expiry
+
+
+def test_expiry_from_query():
+    url = 'https://rr3---sn-abc.googlevideo.com/videoplayback?expire=1700000000&ei=x&itag=251'
+    assert stream_expiry(url) == 1700000000.0
+
+
+def test_expiry_from_path():
+    url = 'https://rr3---sn-abc.googlevideo.com/videoplayback/expire/1700000000/ei/x/itag/251'
+    assert stream_expiry(url) == 1700000000.0
+
+
+def test_unknown_expiry_uses_default_ttl():
+    before = time.time()
+    expiry = stream_expiry('https://cdn.example.com/audio.webm?token=abc')
+    assert before + DEFAULT_STREAM_TTL <= expiry <= time.time() + DEFAULT_STREAM_TTL
+    # Parameter rusak diperlakukan sama
+    assert stream_expiry('https://x.googlevideo.com/videoplayback?expire=soon') >= before + DEFAULT_STREAM_TTL
+
+
+def test_no_url_is_already_expired():
+    assert stream_expiry('') == 0.0
+    assert stream_expiry(None) == 0.0
@@ -0,0 +1,201 @@
+import asyncio
+import os
+import random
+from types import SimpleNamespace
+
+from music_cog import Music
+from queue_store import PlayerState, QueueStore
+from song_queue import SongQueue
+
+
+class Requester:
+    def __init__(self, user_id):
+        self.id = user_id
+
+
+class FakeSong:
+    __slots__ = ('video_id', 'requester', 'queue_key')
+
+    def __init__(self, video_id, user_id=1):
+        self.video_id = video_id
+        self.requester = Requester(user_id)
+
+
+class Guild:
+    def __init__(self, guild_id, channels=()):
+        self.id = guild_id
+        self.name = f"guild {guild_id}"
+        self.voice_client = None
+        self.channels = {channel.id: channel for channel in channels}
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    def get_member(self, user_id):
+        return None
+
+
+class VoiceChannel:
+    def __init__(self, channel_id, guild, members):
+        self.id = channel_id
+        self.name = f"channel {channel_id}"
+        self.guild = guild
+        self.members = members
+        self.connects = 0
+
+    async def connect(self, self_deaf=False):
+        self.connects += 1
+        self.guild.voice_client = SimpleNamespace(channel=self, is_playing=lambda: False)
+
+
+class Bot:
+    def __init__(self, *guilds):
+        self.guilds = {guild.id: guild for guild in guilds}
+
+    def get_guild(self, guild_id):
+        return self.guilds.get(guild_id)
+
+    def get_channel(self, channel_id):
+        return None
+
+
+def make_cog(guild_id=7):
+    """Music dengan player yang queue-nya kecil per chunk (supaya split & respace ikut teruji)"""
+    cog = Music(Bot(Guild(guild_id)))
+    player = cog.get_player(guild_id)
+    player.queue = SongQueue(chunk_size=4)
+    player.queue.journal = []
+    cog.full_writes = 0
+    return cog, player
+
+
+def stored(store, guild_id):
+    async def load():
+        return (await store.load()).get(guild_id)
+    return asyncio.run(load())
+
+
+def run(store, cog, *guild_ids):
+    def snapshot(guild_id, full):
+        state = cog._snapshot(guild_id, full)
+        if state is not None and state.changes is None:
+            cog.full_writes += 1
+        return state
+
+    async def flush():
+        store.start(snapshot)
+        for guild_id in guild_ids:
+            store.mark(guild_id)
+        await store.flush()
+    asyncio.run(flush())
+
+
+def test_edits_are_written_incrementally(tmp_path):
+    store = QueueStore(os.path.join(tmp_path, 'queues.db'), interval=0)
+    cog, player = make_cog()
+    player.queue.extend(FakeSong(f"v{i:010d}") for i in range(40))
+    # Flush pertama (queue sudah ada sebelum store jalan) boleh menulis semua
+    run(store, cog, 7)
+    cog.full_writes = 0
+
+    rng = random.Random(3)
+    for step in range(200):
+        op = rng.random()
+        if op < 0.4:
+            # Sisipan berulang di titik yang sama menghabiskan presisi key
+            player.queue.insert(5, FakeSong(f"i{step:010d}"))
+        elif op < 0.6:
+            player.queue.move(rng.randrange(len(player.queue)), rng.randrange(len(player.queue)))
+        elif op < 0.8:
+            player.current = player.queue.popleft()
+        else:
+            player.queue.pop(rng.randrange(len(player.queue)))
+        if step % 20 == 0:
+            run(store, cog, 7)
+            state = stored(store, 7)
+            assert [row[1] for row in state.queue] == [song.video_id for song in player.queue]
+            assert state.current == (player.current.video_id, 1) if player.current else state.current is None
+
+    # Tidak ada flush yang menulis ulang seluruh queue
+    assert cog.full_writes == 0
+
+
+def test_shuffle_rewrites_whole_queue(tmp_path):
+    store = QueueStore(os.path.join(tmp_path, 'queues.db'), interval=0)
+    cog, player = make_cog()
+    player.queue.extend(FakeSong(f"v{i:010d}") for i in range(30))
+    run(store, cog, 7)
+    cog.full_writes = 0
+    player.queue.shuffle()
+    run(store, cog, 7)
+    assert cog.full_writes == 1
+    assert [row[1] for row in stored(store, 7).queue] == [song.video_id for song in player.queue]
+
+
+def test_empty_player_is_deleted(tmp_path):
+    store = QueueStore(os.path.join(tmp_path, 'queues.db'), interval=0)
+    cog, player = make_cog()
+    player.queue.append(FakeSong('aaaaaaaaaaa'))
+    run(store, cog, 7)
+    player.queue.popleft()
+    run(store, cog, 7)
+    assert stored(store, 7) is None
+
+
+def saved_state(guild_id=7, channel_id=10):
+    return PlayerState(
+        guild_id, voice_channel_id=channel_id,
+        current=('aaaaaaaaaaa', 1), queue=[(0.0, 'bbbbbbbbbbb', 2)], size=1
+    )
+
+
+def resume_setup(listeners=True):
+    guild = Guild(7)
+    channel = VoiceChannel(10, guild, [SimpleNamespace(bot=not listeners)])
+    guild.channels[channel.id] = channel
+    cog = Music(Bot(guild))
+    started = []
+
+    async def play_next(target):
+        started.append(target)
+
+    cog.play_next = play_next
+    return cog, guild, channel, started
+
+
+def test_resume_restores_queue_and_joins_channel():
+    cog, guild, channel, started = resume_setup()
+    cog.saved_states[7] = saved_state()
+
+    asyncio.run(cog._try_resume(guild))
+    assert channel.connects == 1
+    assert started == [guild]
+    assert [song.video_id for song in cog.players[7].queue] == ['aaaaaaaaaaa', 'bbbbbbbbbbb']
+    assert 7 not in cog.saved_states
+
+
+def test_resume_waits_for_a_listener():
+    cog, guild, channel, started = resume_setup(listeners=False)
+    cog.saved_states[7] = saved_state()
+
+    asyncio.run(cog._try_resume(guild))
+    assert channel.connects == 0
+    assert 7 not in cog.players
+    assert 7 in cog.saved_states
+
+
+def test_existing_player_discards_saved_state():
+    cog, guild, channel, started = resume_setup()
+    player = cog.get_player(7)
+    player.queue.append(FakeSong('ccccccccccc'))
+    # State lama yang baru selesai dimuat setelah player dipakai
+    cog.saved_states[7] = saved_state()
+
+    asyncio.run(cog._try_resume(guild))
+    assert channel.connects == 0 and started == []
+    assert [song.video_id for song in player.queue] == ['ccccccccccc']
+    assert 7 not in cog.saved_states
+
+    cog.saved_states[7] = saved_state()
+    assert cog.get_player(7) is player
+    assert 7 not in cog.saved_states
@@ -0,0 +1,36 @@
+import pytest
+
+from extract_scheduler import TokenBucket
+
+
+def test_bucket_allows_burst_then_paces(clock):
+    bucket = TokenBucket(rate=2, burst=3)
+    assert [bucket.take() for _ in range(3)] == [0, 0, 0]
+    # Token habis: token berikutnya baru ada setengah detik lagi (rate 2/detik)
+    assert bucket.take() == pytest.approx(0.5)
+
+    clock.advance(0.5)
+    assert bucket.take() == 0
+    assert bucket.take() == pytest.approx(0.5)
+
+
+def test_bucket_refill_is_capped_at_burst(clock):
+    bucket = TokenBucket(rate=10, burst=2)
+    bucket.take()
+    bucket.take()
+    clock.advance(60)
+    assert [bucket.take() for _ in range(2)] == [0, 0]
+    assert bucket.take() > 0
+
+
+def test_drain_empties_bucket(clock):
+    bucket = TokenBucket(rate=1, burst=5)
+    bucket.drain()
+    assert bucket.take() == pytest.approx(1.0)
+    clock.advance(1)
+    assert bucket.take() == 0
+
+
+def test_zero_rate_is_unlimited(clock):
+    bucket = TokenBucket(rate=0, burst=1)
+    assert all(bucket.take() == 0 for _ in range(100))
@@ -0,0 +1,144 @@
+import random
+
+from song_queue import RESET, SongQueue
+
+
+class Requester:
+    def __init__(self, user_id):
+        self.id = user_id
+
+
+class FakeSong:
+    __slots__ = ('video_id', 'requester', 'queue_key')
+
+    def __init__(self, video_id, user_id=1):
+        self.video_id = video_id
+        self.requester = Requester(user_id)
+
+    def __repr__(self):
+        return self.video_id
+
+
+def songs(count, users=3):
+    return [FakeSong(f"v{i}", i % users) for i in range(count)]
+
+
+def check(queue, expected):
+    """Queue sama dengan list biasa, dan key naik sesuai urutan"""
+    assert list(queue) == expected
+    assert len(queue) == len(expected)
+    assert [queue[i] for i in range(len(expected))] == expected
+    keys = [song.queue_key for song in queue]
+    assert keys == sorted(keys) and len(set(keys)) == len(keys)
+
+
+def test_matches_list_under_random_edits():
+    rng = random.Random(1)
+    queue = SongQueue(chunk_size=4)
+    expected = []
+    for step in range(2000):
+        op = rng.random()
+        if op < 0.35 or not expected:
+            song = FakeSong(f"s{step}", rng.randrange(5))
+            index = rng.randrange(len(expected) + 1)
+            queue.insert(index, song)
+            expected.insert(index, song)
+        elif op < 0.5:
+            assert queue.popleft() is expected.pop(0)
+        elif op < 0.65:
+            index = rng.randrange(len(expected))
+            assert queue.pop(index) is expected.pop(index)
+        elif op < 0.8:
+            source, target = rng.randrange(len(expected)), rng.randrange(len(expected))
+            queue.move(source, target)
+            expected.insert(target, expected.pop(source))
+        elif op < 0.9:
+            song = rng.choice(expected)
+            queue.remove(song)
+            expected.remove(song)
+        elif op < 0.95:
+            index = rng.randrange(len(expected) + 1)
+            assert queue.jump(index) == expected[:index]
+            del expected[:index]
+        else:
+            song = FakeSong(f"s{step}", rng.randrange(5))
+            queue.append(song)
+            expected.append(song)
+        if step % 50 == 0:
+            check(queue, expected)
+    check(queue, expected)
+
+
+def test_page_and_requester_filter():
+    items = songs(50)
+    queue = SongQueue(items, chunk_size=4)
+    assert queue.page(10, 5) == [(i, items[i]) for i in range(10, 15)]
+    assert queue.page(48, 10) == [(48, items[48]), (49, items[49])]
+    assert queue.page(50, 10) == []
+
+    mine = [(i, song) for i, song in enumerate(items) if song.requester.id == 1]
+    assert queue.count_requester(1) == len(mine)
+    assert queue.by_requester(1, start=3, count=4) == mine[3:7]
+
+    queue.popleft()
+    assert queue.by_requester(1, count=2) == [(i - 1, song) for i, song in mine[:2]]
+
+
+def test_dedup_keeps_first_occurrence():
+    queue = SongQueue(chunk_size=4)
+    queue.extend(FakeSong(vid) for vid in ['a', 'b', 'a', 'c', 'b', 'a'])
+    assert queue.contains_video('a')
+    assert queue.dedup() == 3
+    assert [song.video_id for song in queue] == ['a', 'b', 'c']
+    assert queue.dedup() == 0
+    assert not queue.contains_video('x')
+
+
+def test_journal_records_changes():
+    queue = SongQueue(chunk_size=4)
+    queue.journal = []
+    a, b = FakeSong('a', 1), FakeSong('b', 2)
+    queue.append(a)
+    queue.insert(0, b)
+    queue.popleft()
+    assert queue.journal == [
+        (a.queue_key, 'a', 1),
+        (b.queue_key, 'b', 2),
+        (b.queue_key, None, None),
+    ]
+    assert b.queue_key < a.queue_key
+
+    queue.journal = []
+    queue.shuffle()
+    assert RESET in queue.journal
+
+
+def test_repeated_insert_keeps_keys_ordered():
+    # Sisipan di titik yang sama berkali-kali menghabiskan presisi float
+    queue = SongQueue(songs(20), chunk_size=4)
+    expected = list(queue)
+    for i in range(200):
+        song = FakeSong(f"i{i}")
+        queue.insert(3, song)
+        expected.insert(3, song)
+    check(queue, expected)
+
+
+def test_counters_survive_shuffle_and_jump():
+    queue = SongQueue(songs(100), chunk_size=4)
+    queue.shuffle()
+    expected = list(queue)
+    skipped = queue.jump(37)
+    assert skipped == expected[:37]
+    rest = expected[37:]
+    check(queue, rest)
+
+    assert queue.count_requester(2) == sum(1 for song in rest if song.requester.id == 2)
+    assert queue.by_requester(2, count=100) == [(i, song) for i, song in enumerate(rest) if song.requester.id == 2]
+    assert all(queue.contains_video(song.video_id) for song in rest)
+    assert not any(queue.contains_video(song.video_id) for song in skipped)
+
+    queue.extend(skipped[:5])
+    assert queue.dedup() == 0
+    queue.append(FakeSong(rest[0].video_id))
+    assert queue.dedup() == 1
@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+import discord
+
+from status_message import NowPlayingMessage
+
+
+class Message:
+    def __init__(self, channel, embed):
+        self.channel = channel
+        self.embed = embed
+
+    async def edit(self, embed):
+        self.channel.requests.append(('edit', embed.title, time.monotonic()))
+        self.embed = embed
+        return self
+
+
+class Channel:
+    def __init__(self):
+        self.requests = []
+
+    async def send(self, embed):
+        self.requests.append(('send', embed.title, time.monotonic()))
+        return Message(self, embed)
+
+
+def song(title):
+    return discord.Embed(title=title)
+
+
+async def settle(status, seconds=0.3):
+    await asyncio.sleep(seconds)
+    status.close()
+
+
+def test_burst_of_updates_sends_one_message_with_last_state():
+    channel = Channel()
+
+    async def burst():
+        status = NowPlayingMessage(min_interval=0.1, debounce=0.05)
+        for title in ('a', 'b', 'c'):
+            status.update(channel, song(title))
+        await settle(status)
+
+    asyncio.run(burst())
+    assert [request[:2] for request in channel.requests] == [('send', 'c')]
+
+
+def test_updates_during_rate_limit_window_become_one_edit():
+    channel = Channel()
+
+    async def play():
+        status = NowPlayingMessage(min_interval=0.2, debounce=0.01)
+        status.update(channel, song('a'))
+        await asyncio.sleep(0.05)
+        # Masih dalam min_interval sejak send pertama: digabung jadi satu edit
+        for title in ('b', 'c', 'd'):
+            status.update(channel, song(title))
+            await asyncio.sleep(0.01)
+        await settle(status, 0.4)
+
+    asyncio.run(play())
+    assert [request[:2] for request in channel.requests] == [('send', 'a'), ('edit', 'd')]
+    assert channel.requests[1][2] - channel.requests[0][2] >= 0.2 - 0.01
+
+
+def test_notices_are_shown_then_dropped_on_next_song():
+    channel = Channel()
+
+    async def play():
+        status = NowPlayingMessage(min_interval=0.05, debounce=0.01)
+        status.update(channel, song('a'))
+        status.notice(channel, "⏭️ skipped")
+        await asyncio.sleep(0.1)
+        fields = [field.value for field in status.message.embed.fields]
+        status.update(channel, song('b'))
+        await settle(status, 0.1)
+        return fields, status.message.embed
+
+    fields, embed = asyncio.run(play())
+    assert fields == ["⏭️ skipped"]
+    assert embed.title == 'b' and not embed.fields
+    assert [request[0] for request in channel.requests] == ['send', 'edit']
+
+
+def test_new_channel_gets_new_message():
+    first, second = Channel(), Channel()
+
+    async def play():
+        status = NowPlayingMessage(min_interval=0.05, debounce=0.01)
+        status.update(first, song('a'))
+        await asyncio.sleep(0.1)
+        status.update(second, song('b'))
+        await settle(status, 0.1)
+
+    asyncio.run(play())
+    assert [request[:2] for request in first.requests] == [('send', 'a')]
+    assert [request[:2] for request in second.requests] == [('send', 'b')]
@@ -0,0 +1,55 @@
+from title_index import TitleIndex, tokenize
+
+
+def ids(entries):
+    return [entry.video_id for entry in entries]
+
+
+def test_tokenize_folds_case_and_accents():
+    assert tokenize("Beyoncé - HALO (Official)") == ['beyonce', 'halo', 'official']
+
+
+def test_prefix_match_ranks_above_fuzzy():
+    index = TitleIndex()
+    index.add('a', "Halo", "Beyoncé", last_used=1)
+    index.add('b', "Hello", "Adele", last_used=3)
+    index.add('c', "Hallelujah", "Jeff Buckley", last_used=2)
+
+    # Kata terakhir belum lengkap tetap cocok sebagai awalan
+    assert ids(index.search("beyon")) == ['a']
+    assert ids(index.search("hal"))[:2] == ['c', 'a']
+    # Salah ketik masih ketemu
+    assert 'b' in ids(index.search("adell helo"))
+    # Query kosong: yang terakhir dipakai
+    assert ids(index.search("", limit=2)) == ['b', 'c']
+
+
+def test_readd_updates_title():
+    index = TitleIndex()
+    index.add('a', "Old Title")
+    index.add('a', "Brand New")
+    assert len(index) == 1
+    assert ids(index.search("brand")) == ['a']
+    assert ids(index.search("old title")) == []
+
+
+def test_remove_and_compact():
+    index = TitleIndex()
+    for i in range(10):
+        index.add(f"v{i}", f"Track number {i}", last_used=i)
+    for i in range(6):
+        index.remove(f"v{i}")
+    assert 'v0' not in index and 'v9' in index
+    # Compaction sudah membuang doc yang dihapus dari posting list
+    assert index._dead < 6
+    assert sorted(ids(index.search("track"))) == ['v6', 'v7', 'v8', 'v9']
+
+
+def test_evicts_least_recently_used():
+    index = TitleIndex(max_entries=10)
+    for i in range(11):
+        index.add(f"v{i}", f"Song {i}", last_used=i)
+    # Lewat batas: 10% (minimal 1) terlama dibuang sekaligus
+    assert len(index) == 9
+    assert 'v0' not in index and 'v1' not in index
+    assert 'v10' in index
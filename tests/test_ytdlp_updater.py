@@ -0,0 +1,61 @@
+import os
+
+from ytdlp_updater import YtdlpUpdater
+
+
+def stage(staging_dir, name, complete=True):
+    """Buat direktori versi staged palsu; `complete` = ada package yt_dlp di dalamnya"""
+    path = os.path.join(staging_dir, name)
+    os.makedirs(os.path.join(path, 'yt_dlp') if complete else path)
+    return path
+
+
+def remaining(staging_dir):
+    return sorted(os.listdir(staging_dir))
+
+
+def test_prune_keeps_newest_versions(tmp_path):
+    staging = str(tmp_path)
+    for version in ('2024.01.01', '2024.02.01', '2024.03.10', '2024.03.10.1'):
+        stage(staging, f"yt-dlp-{version}")
+    updater = YtdlpUpdater(mode='off', staging_dir=staging)
+
+    assert updater.prune(keep=2) == 2
+    # Urut versi numerik, bukan string: 2024.03.10.1 > 2024.03.10
+    assert remaining(staging) == ['yt-dlp-2024.03.10', 'yt-dlp-2024.03.10.1']
+    assert updater.prune(keep=2) == 0
+
+
+def test_prune_keeps_active_path(tmp_path):
+    staging = str(tmp_path)
+    oldest = stage(staging, 'yt-dlp-2024.01.01')
+    for version in ('2024.02.01', '2024.03.01', '2024.04.01'):
+        stage(staging, f"yt-dlp-{version}")
+    updater = YtdlpUpdater(mode='off', staging_dir=staging)
+    # Worker ini belum swap: versi lama masih di-import
+    updater.active_path = oldest
+
+    assert updater.prune(keep=2) == 1
+    assert remaining(staging) == ['yt-dlp-2024.01.01', 'yt-dlp-2024.03.01', 'yt-dlp-2024.04.01']
+
+
+def test_prune_ignores_partial_stages(tmp_path):
+    staging = str(tmp_path)
+    stage(staging, 'yt-dlp-2024.01.01')
+    stage(staging, 'yt-dlp-2024.02.01')
+    # Worker lain sedang pip install: .part tidak boleh dihitung atau dihapus,
+    # walau package yt_dlp-nya sudah muncul
+    stage(staging, 'yt-dlp-2024.05.01.part123')
+    stage(staging, 'yt-dlp-2024.05.01.part456', complete=False)
+    updater = YtdlpUpdater(mode='off', staging_dir=staging)
+
+    assert updater.prune(keep=1) == 1
+    assert remaining(staging) == [
+        'yt-dlp-2024.02.01', 'yt-dlp-2024.05.01.part123', 'yt-dlp-2024.05.01.part456'
+    ]
+    assert updater._staged()[1] == os.path.join(staging, 'yt-dlp-2024.02.01')
+
+
+def test_prune_without_staging_dir(tmp_path):
+    updater = YtdlpUpdater(mode='off', staging_dir=str(tmp_path / 'missing'))
+    assert updater.prune() == 0
@@ -0,0 +1,209 @@
+import heapq
+import logging
+import math
+import os
+import re
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, List, Optional, Set
+
+from search_cache import SEARCH_CACHE
+
+logger = logging.getLogger('MusicBot.TitleIndex')
+
+# ═══════════════════════════════════════════════════════════════
+# KONFIGURASI TITLE INDEX (AUTOCOMPLETE /play)
+# ═══════════════════════════════════════════════════════════════
+
+# Maksimal judul di memory; kalau lewat, yang paling lama tidak dipakai dibuang
+TITLE_INDEX_MAX = int(os.environ.get('TITLE_INDEX_MAX', '20000'))
+
+# Discord menerima maksimal 25 pilihan autocomplete
+AUTOCOMPLETE_LIMIT = 25
+
+# Bagian trigram query yang harus cocok (toleransi typo)
+MIN_MATCH = 0.6
+
+# Query yang sangat umum ("th"): hanya sekian doc terbaru yang dinilai
+CANDIDATE_LIMIT = 2000
+
+# Kandidat (urut skor trigram) yang dicek ulang dengan pencocokan awalan kata
+RERANK_FACTOR = 4
+
+WORD_RE = re.compile(r'\w+')
+EMPTY = array('I')
+
+
+def tokenize(text: str) -> List[str]:
+    """Kata-kata huruf kecil tanpa aksen ("Beyoncé" → "beyonce")"""
+    text = unicodedata.normalize('NFKD', text.casefold())
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return WORD_RE.findall(text)
+
+
+def word_grams(word: str) -> Set[str]:
+    """Trigram kata dengan padding depan: awalan kata ("  h", " he") ikut ter-index"""
+    padded = '  ' + word
+    return {padded[i:i + 3] for i in range(len(word))}
+
+
+class TitleEntry:
+    __slots__ = ('video_id', 'title', 'uploader', 'words', 'last_used')
+
+    def __init__(self, video_id: str, title: str, uploader: Optional[str], last_used: float):
+        self.video_id = video_id
+        self.title = title
+        self.uploader = uploader
+        self.words = tuple(tokenize(f"{title} {uploader or ''}"))
+        self.last_used = last_used
+
+    def grams(self) -> Set[str]:
+        return set().union(*(word_grams(word) for word in self.words))
+
+
+def contains(posting: array, doc: int) -> bool:
+    i = bisect_left(posting, doc)
+    return i < len(posting) and posting[i] == doc
+
+
+class TitleIndex:
+    """
+    Index trigram in-memory atas judul & uploader yang pernah di-resolve,
+    untuk autocomplete /play tanpa request ke YouTube. Diisi dari tabel
+    videos search cache saat start (jadi bertahan antar restart) dan
+    ditambah setiap extraction berhasil.
+
+    Posting list berupa array int terurut (4 byte per entry, bukan set
+    string): doc baru selalu di-append, doc yang dihapus dibuang saat
+    compaction.
+    """
+
+    def __init__(self, max_entries: int = TITLE_INDEX_MAX):
+        self.max_entries = max_entries
+        self._docs: Dict[int, TitleEntry] = {}
+        self._ids: Dict[str, int] = {}
+        self._next_doc = 0
+        # trigram → doc yang judul/uploader-nya mengandung trigram itu
+        self._postings: Dict[str, array] = {}
+        self._dead = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, video_id: str) -> bool:
+        return video_id in self._ids
+
+    async def load(self) -> int:
+        """Isi index dari search cache (SQLite dibaca di thread search cache)"""
+        started = time.monotonic()
+        try:
+            rows = await SEARCH_CACHE.videos()
+        except Exception as e:
+            logger.warning(f"Title index tidak bisa dimuat: {str(e)[:80]}")
+            return 0
+        for video_id, title, uploader, last_used in rows:
+            self.add(video_id, title, uploader, last_used)
+        logger.info(f"🔤 Title index: {len(self)} judul ({(time.monotonic() - started) * 1000:.0f}ms)")
+        return len(rows)
+
+    def add(self, video_id: Optional[str], title: Optional[str], uploader: Optional[str] = None, last_used: Optional[float] = None):
+        if not video_id or not title:
+            return
+        entry = TitleEntry(video_id, title, uploader, time.time() if last_used is None else last_used)
+        doc = self._ids.get(video_id)
+        if doc is not None:
+            old = self._docs[doc]
+            if old.words == entry.words:
+                old.last_used = max(old.last_used, entry.last_used)
+                return
+            self.remove(video_id)
+
+        doc = self._next_doc
+        self._next_doc += 1
+        self._docs[doc] = entry
+        self._ids[video_id] = doc
+        for gram in entry.grams():
+            posting = self._postings.get(gram)
+            if posting is None:
+                posting = self._postings[gram] = array('I')
+            posting.append(doc)
+
+        if len(self._docs) > self.max_entries:
+            self._evict()
+
+    def remove(self, video_id: str):
+        doc = self._ids.pop(video_id, None)
+        if doc is None:
+            return
+        del self._docs[doc]
+        self._dead += 1
+        if self._dead > len(self._docs) // 2:
+            self._compact()
+
+    def _evict(self):
+        # Buang 10% sekaligus supaya scan ini jarang terjadi
+        count = len(self._docs) - self.max_entries + max(self.max_entries // 10, 1)
+        for entry in heapq.nsmallest(count, self._docs.values(), key=lambda e: e.last_used):
+            self.remove(entry.video_id)
+
+    def _compact(self):
+        """Buang doc yang sudah dihapus dari semua posting list"""
+        docs = self._docs
+        for gram, posting in list(self._postings.items()):
+            alive = array('I', (doc for doc in posting if doc in docs))
+            if alive:
+                self._postings[gram] = alive
+            else:
+                del self._postings[gram]
+        self._dead = 0
+
+    def search(self, text: str, limit: int = AUTOCOMPLETE_LIMIT) -> List[TitleEntry]:
+        """Judul yang paling cocok dengan teks yang sedang diketik (kata terakhir boleh belum lengkap)"""
+        tokens = tokenize(text)
+        if not tokens:
+            # Belum mengetik apa-apa: lagu yang terakhir dipakai
+            return heapq.nlargest(limit, self._docs.values(), key=lambda e: e.last_used)
+
+        grams = set().union(*(word_grams(token) for token in tokens))
+        postings = sorted((self._postings.get(gram, EMPTY) for gram in grams), key=len)
+        needed = math.ceil(len(postings) * MIN_MATCH)
+
+        # Judul yang cocok minimal `needed` trigram pasti mengandung salah satu
+        # dari (total - needed + 1) trigram paling jarang: cukup itu yang di-scan,
+        # trigram umum ("  a", "off") hanya dicek membership-nya
+        rare = len(postings) - needed + 1
+        candidates: Counter = Counter()
+        for posting in postings[:rare]:
+            # Doc id naik sesuai urutan masuk: ekor posting list = judul terbaru
+            candidates.update(posting[-CANDIDATE_LIMIT:])
+        common = postings[rare:]
+
+        docs = self._docs
+        scored = []
+        for doc, count in candidates.most_common(CANDIDATE_LIMIT):
+            entry = docs.get(doc)
+            if entry is None:
+                continue
+            count += sum(1 for posting in common if contains(posting, doc))
+            if count >= needed:
+                scored.append((count, entry.last_used, doc))
+
+        # Cek awalan kata (lebih mahal) hanya untuk kandidat teratas
+        ranked = []
+        for count, last_used, doc in heapq.nlargest(limit * RERANK_FACTOR, scored):
+            entry = docs[doc]
+            # Semua kata query adalah awalan kata di judul → di atas hasil fuzzy
+            prefix = all(any(word.startswith(token) for word in entry.words) for token in tokens)
+            ranked.append((prefix, count, last_used, entry))
+        ranked.sort(key=lambda item: item[:3], reverse=True)
+        return [item[3] for item in ranked[:limit]]
+
+    def stats(self) -> dict:
+        return {'titles': len(self._docs), 'trigrams': len(self._postings)}
+
+
+# Dipakai bersama oleh semua server
+TITLE_INDEX = TitleIndex()
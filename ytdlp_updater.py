@@ -0,0 +1,182 @@
+import asyncio
+import importlib
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+import urllib.request
+from typing import Optional, List, Tuple, Callable, Awaitable
+
+logger = logging.getLogger('MusicBot.Updater')
+
+# ═══════════════════════════════════════════════════════════════
+# KONFIGURASI UPDATE YT-DLP
+# ═══════════════════════════════════════════════════════════════
+
+# background: cog langsung siap, update dicek & dipasang di background
+# startup   : tunggu update selesai sebelum cog siap (tidak memblok event loop)
+# off       : pakai yt-dlp yang terinstall saja
+YTDLP_UPDATE = os.environ.get('YTDLP_UPDATE', 'background')
+
+DATA_DIR = os.environ.get('DATA_DIR', 'data')
+
+# Versi baru di-stage di sini (pip --target), bisa dipakai bareng replica lain
+YTDLP_STAGING_DIR = os.environ.get('YTDLP_STAGING_DIR', os.path.join(DATA_DIR, 'ytdlp'))
+
+YTDLP_UPDATE_INTERVAL = float(os.environ.get('YTDLP_UPDATE_INTERVAL_HOURS', '12')) * 3600
+
+# Versi staged yang disimpan setelah swap: versi sekarang + satu sebelumnya
+# (worker cluster lain mungkin belum swap)
+YTDLP_KEEP_VERSIONS = 2
+
+PYPI_URL = 'https://pypi.org/pypi/yt-dlp/json'
+
+
+def parse_version(version: str) -> Tuple[int, ...]:
+    """'2024.03.10.1' → (2024, 3, 10, 1)"""
+    return tuple(int(part) for part in re.findall(r'\d+', version))
+
+
+def installed_version() -> str:
+    import yt_dlp
+    return yt_dlp.version.__version__
+
+
+def fetch_latest_version() -> str:
+    """Versi terbaru di PyPI (blocking, jalankan di executor)"""
+    with urllib.request.urlopen(PYPI_URL, timeout=15) as resp:
+        return json.load(resp)['info']['version']
+
+
+class YtdlpUpdater:
+    """Cek, stage dan hot-swap yt-dlp tanpa memblok startup"""
+
+    def __init__(
+        self,
+        mode: str = YTDLP_UPDATE,
+        staging_dir: str = YTDLP_STAGING_DIR,
+        interval: float = YTDLP_UPDATE_INTERVAL
+    ):
+        self.mode = mode
+        self.staging_dir = staging_dir
+        self.interval = interval
+        self.active_path: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _versions(self) -> List[Tuple[Tuple[int, ...], str]]:
+        """Semua versi staged yang lengkap (versi, path)"""
+        if not os.path.isdir(self.staging_dir):
+            return []
+        versions = []
+        for name in os.listdir(self.staging_dir):
+            path = os.path.join(self.staging_dir, name)
+            if name.startswith('yt-dlp-') and '.part' not in name and os.path.isdir(os.path.join(path, 'yt_dlp')):
+                versions.append((parse_version(name[len('yt-dlp-'):]), path))
+        return versions
+
+    def _staged(self) -> Optional[Tuple[Tuple[int, ...], str]]:
+        """Versi staged tertinggi (versi, path)"""
+        return max(self._versions(), default=None)
+
+    def prune(self, keep: int = YTDLP_KEEP_VERSIONS) -> int:
+        """Hapus versi staged lama, sisakan `keep` versi tertinggi dan yang sedang aktif"""
+        removed = 0
+        for _, path in sorted(self._versions(), reverse=True)[keep:]:
+            if path == self.active_path:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+        if removed:
+            logger.info(f"🧹 {removed} versi yt-dlp lama dihapus dari staging")
+        return removed
+
+    def activate(self, path: str):
+        """Pakai yt-dlp dari `path` untuk import berikutnya"""
+        if self.active_path in sys.path:
+            sys.path.remove(self.active_path)
+        sys.path.insert(0, path)
+        self.active_path = path
+
+        # Buang modul lama; extraction.py meng-import yt_dlp saat dipakai
+        for name in list(sys.modules):
+            if name == 'yt_dlp' or name.startswith('yt_dlp.'):
+                del sys.modules[name]
+        importlib.invalidate_caches()
+        logger.info(f"✅ yt-dlp aktif: {installed_version()}")
+
+    def activate_staged(self):
+        """Saat startup: pakai versi staged kalau lebih baru dari yang terinstall"""
+        staged = self._staged()
+        if staged and staged[0] > parse_version(installed_version()):
+            self.activate(staged[1])
+
+    async def check(self, swap: Callable[[Callable[[], None]], Awaitable[None]]) -> bool:
+        """Stage versi terbaru kalau ada, lalu hot-swap lewat `swap`"""
+        loop = asyncio.get_running_loop()
+        try:
+            latest = await loop.run_in_executor(None, fetch_latest_version)
+        except Exception as e:
+            logger.warning(f"Cek update yt-dlp gagal: {str(e)[:50]}")
+            return False
+
+        current = installed_version()
+        if parse_version(latest) <= parse_version(current):
+            logger.info(f"yt-dlp {current} sudah terbaru")
+            return False
+
+        target = os.path.join(self.staging_dir, f"yt-dlp-{latest}")
+        if not os.path.isdir(target):
+            logger.info(f"🔄 Staging yt-dlp {latest}...")
+            # .part per process: worker cluster lain bisa stage versi yang sama bersamaan
+            partial = f"{target}.part{os.getpid()}"
+            shutil.rmtree(partial, ignore_errors=True)
+            os.makedirs(self.staging_dir, exist_ok=True)
+
+            proc = await asyncio.create_subprocess_exec(
+                sys.executable, '-m', 'pip', 'install', '-q',
+                '--no-deps', '--target', partial, f"yt-dlp=={latest}",
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE
+            )
+            _, stderr = await proc.communicate()
+            if proc.returncode != 0:
+                logger.error(f"❌ Failed to update yt-dlp: {stderr.decode(errors='ignore')[:100]}")
+                shutil.rmtree(partial, ignore_errors=True)
+                return False
+            try:
+                os.replace(partial, target)
+            except OSError:
+                # Process lain sudah selesai duluan
+                shutil.rmtree(partial, ignore_errors=True)
+                if not os.path.isdir(target):
+                    raise
+
+        await swap(lambda: self.activate(target))
+        await loop.run_in_executor(None, self.prune)
+        return True
+
+    async def start(self, swap: Callable[[Callable[[], None]], Awaitable[None]]):
+        """Dipanggil saat cog load"""
+        if self.mode == 'off':
+            return
+        self.activate_staged()
+        if self.mode == 'startup':
+            await self.check(swap)
+        self._task = asyncio.create_task(self._run(swap))
+
+    async def _run(self, swap):
+        if self.mode == 'startup':
+            await asyncio.sleep(self.interval)
+        while True:
+            await self.check(swap)
+            await asyncio.sleep(self.interval)
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+
+UPDATER = YtdlpUpdater()